@@ -1,6 +1,56 @@
 from django.contrib import admin
+from django.db.models import Q
 from django.utils.html import format_html
-from .models import Level, TestSession, Question, Answer, TestResult
+from .models import Level, TestSession, Question, Answer, TestResult, TelegramMessage, DailyLevelStat
+from .pagination import EstimatedCountPaginator
+
+# Prefiks qidiruvi uchun oraliqning yuqori chegarasi
+PREFIX_END = '\U0010ffff'
+
+
+class PrefixSearchMixin:
+    """
+    Katta jadvallar uchun qidiruv: ``icontains`` (to'liq skan) o'rniga
+    indekslangan ustunlarda prefiks oralig'i (``>= so'z AND < so'z + max``).
+    Qidiruv ko'rinishiga qarab ustun tanlanadi: ``IT_...`` - sessiya ID (katta
+    harflarda), raqam yoki ``+`` - telefon, qolgani so'zlarga bo'linadi va har
+    bir so'z familya yoki ism boshi bo'lishi kerak (Django dagi kabi AND).
+
+    Shart ``TestSession`` bo'yicha alohida ``IN (SELECT id ...)`` so'roviga
+    qo'yiladi: aks holda ro'yxatning ``ORDER BY -pk`` tartibi uchun SQLite
+    indekslar (MULTI-INDEX OR) o'rniga butun jadvalni teskari skan qiladi.
+    """
+    session_field = 'pk'
+    search_help_text = "Familya/ism boshi, telefon raqami boshi yoki IT_... sessiya ID"
+
+    def prefix_filter(self, field, term):
+        return Q(**{f'{field}__gte': term, f'{field}__lt': term + PREFIX_END})
+
+    def name_filter(self, word):
+        # Ism va familya katta harf bilan saqlanadi, lekin yozilgandek ham qidiriladi.
+        # Har bir oraliq o'z indeksidan o'qiladi (session_name_idx, session_first_name_idx)
+        condition = Q()
+        for variant in {word, word[:1].upper() + word[1:]}:
+            condition |= self.prefix_filter('last_name', variant) | self.prefix_filter('first_name', variant)
+        return condition
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        compact = ''.join(term.split())
+        if compact.upper().startswith('IT_'):
+            # Sessiya ID si to'liq katta harflarda (IT_20240101_ABCD1234)
+            condition = self.prefix_filter('session_id', compact.upper())
+        elif compact.lstrip('+').isdigit():
+            condition = self.prefix_filter('phone_number', compact)
+        else:
+            condition = Q()
+            for word in term.split():
+                condition &= self.name_filter(word)
+        sessions = TestSession.objects.filter(condition).values('pk')
+        return queryset.filter(**{f'{self.session_field}__in': sessions}), False
+
 
 class AnswerInline(admin.TabularInline):
     model = Answer
@@ -19,6 +69,7 @@ class LevelAdmin(admin.ModelAdmin):
 class QuestionAdmin(admin.ModelAdmin):
     list_display = ('level', 'short_question_text', 'has_image', 'is_active')
     list_filter = ('level', 'is_active')
+    list_select_related = ('level',)
     search_fields = ('question_text',)
     inlines = [AnswerInline]
     
@@ -32,21 +83,29 @@ class QuestionAdmin(admin.ModelAdmin):
     has_image.short_description = 'Rasm'
 
 @admin.register(TestSession)
-class TestSessionAdmin(admin.ModelAdmin):
+class TestSessionAdmin(PrefixSearchMixin, admin.ModelAdmin):
     list_display = ('session_id', 'full_name', 'level', 'start_time', 'completed')
     list_filter = ('level', 'completed', 'start_time')
     search_fields = ('first_name', 'last_name', 'phone_number', 'session_id')
-    readonly_fields = ('session_id', 'start_time', 'end_time')
+    list_select_related = ('level',)
+    # Millionlab qatorda COUNT(*) o'rniga taxminiy son
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    readonly_fields = ('session_id', 'start_time', 'end_time', 'question_ids', 'answer_ids')
     
     def full_name(self, obj):
         return f"{obj.first_name} {obj.last_name}"
     full_name.short_description = 'Ism Familya'
 
 @admin.register(TestResult)
-class TestResultAdmin(admin.ModelAdmin):
+class TestResultAdmin(PrefixSearchMixin, admin.ModelAdmin):
     list_display = ('session_info', 'level', 'score', 'correct_answers', 'time_taken_display', 'telegram_sent', 'admin_notified', 'created_at')
     list_filter = ('telegram_sent', 'admin_notified', 'session__level', 'created_at')
-    search_fields = ('session__first_name', 'session__last_name', 'session__session_id')
+    search_fields = ('session__first_name', 'session__last_name', 'session__phone_number', 'session__session_id')
+    list_select_related = ('session__level',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    session_field = 'session'
     readonly_fields = ('created_at',)
     
     def session_info(self, obj):
@@ -61,4 +120,17 @@ class TestResultAdmin(admin.ModelAdmin):
         return obj.get_time_taken_display()
     time_taken_display.short_description = 'Sarflangan vaqt'
 
+@admin.register(TelegramMessage)
+class TelegramMessageAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'chat_id', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'created_at')
+    list_filter = ('status', 'kind')
+    readonly_fields = ('created_at', 'sent_at', 'last_error')
+
+@admin.register(DailyLevelStat)
+class DailyLevelStatAdmin(admin.ModelAdmin):
+    list_display = ('date', 'level', 'started', 'count', 'avg_score')
+    list_filter = ('level',)
+    date_hierarchy = 'date'
+    list_select_related = ('level',)
+
 admin.site.register(Answer)
\ No newline at end of file
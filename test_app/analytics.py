@@ -0,0 +1,80 @@
+# test_app/analytics.py
+"""
+Savollar tahlili (klassik test nazariyasi).
+
+Har bir yakunlangan sessiyada berilgan savollar va tanlangan javoblar
+``QuestionResponse`` jadvaliga bitta ``bulk_create`` bilan yoziladi. Tahlil
+bitta guruhlangan so'rov bilan hisoblanadi:
+
+- qiyinlik (difficulty) - savolga to'g'ri javob berganlar ulushi (p);
+- ajratish (discrimination) - savolni to'g'ri yechish va umumiy ball
+  orasidagi point-biserial korrelyatsiya. Past yoki manfiy qiymat savol
+  kuchli va kuchsiz o'quvchilarni ajratmasligini bildiradi.
+
+To'g'rilik ``Answer.is_correct`` dan olinadi, shuning uchun javoblar kaliti
+tuzatilsa tahlil ham darhol yangilanadi.
+"""
+from django.db.models import Case, Count, F, FloatField, IntegerField, Sum, When
+
+from .models import Question, QuestionResponse
+
+# Shu chegaralardan tashqaridagi savollar ko'rib chiqish uchun belgilanadi
+MIN_DIFFICULTY = 0.2
+MAX_DIFFICULTY = 0.95
+MIN_DISCRIMINATION = 0.2
+
+
+def record_responses(session, question_ids, answer_ids):
+    # Sessiya davomida o'chirilgan savollar tashlab yuboriladi
+    existing = set(Question.objects.filter(id__in=question_ids).values_list('id', flat=True))
+    QuestionResponse.objects.bulk_create([
+        QuestionResponse(session=session, question_id=question_id, answer_id=answer_id)
+        for question_id, answer_id in zip(question_ids, answer_ids)
+        if question_id in existing
+    ])
+
+
+def item_statistics(level=None, min_responses=1):
+    """Har bir savol uchun javoblar soni, qiyinlik va ajratish ko'rsatkichi"""
+    responses = QuestionResponse.objects.filter(session__result__isnull=False)
+    if level is not None:
+        responses = responses.filter(question__level=level)
+
+    score = F('session__result__score')
+    correct = When(answer__is_correct=True, then=1)
+    rows = responses.order_by().values('question', 'question__question_text').annotate(
+        n=Count('id'),
+        correct=Sum(Case(correct, default=0, output_field=IntegerField())),
+        score_sum=Sum(score),
+        score_sq_sum=Sum(score * score, output_field=FloatField()),
+        correct_score_sum=Sum(Case(
+            When(answer__is_correct=True, then=score), default=0.0, output_field=FloatField()
+        )),
+    ).filter(n__gte=min_responses)
+
+    items = []
+    for row in rows:
+        n, k = row['n'], row['correct']
+        p = k / n
+        mean = row['score_sum'] / n
+        stddev = max(row['score_sq_sum'] / n - mean * mean, 0) ** 0.5
+        if 0 < k < n and stddev > 0:
+            mean_correct = row['correct_score_sum'] / k
+            mean_wrong = (row['score_sum'] - row['correct_score_sum']) / (n - k)
+            discrimination = (mean_correct - mean_wrong) / stddev * (p * (1 - p)) ** 0.5
+        else:
+            discrimination = None
+        items.append({
+            'question_id': row['question'],
+            'question_text': row['question__question_text'],
+            'responses': n,
+            'difficulty': round(p, 3),
+            'discrimination': round(discrimination, 3) if discrimination is not None else None,
+        })
+    return items
+
+
+def is_flagged(item):
+    if not MIN_DIFFICULTY <= item['difficulty'] <= MAX_DIFFICULTY:
+        return True
+    return item['discrimination'] is None or item['discrimination'] < MIN_DISCRIMINATION
@@ -0,0 +1,183 @@
+# test_app/async_views.py
+"""
+Test oqimi API sining async versiyalari (ASGI uchun).
+
+ASGI da (test_project/asgi.py) bu view lar views.py dagi sinxron
+versiyalar o'rniga ulanadi (test_project/urls_async.py), shuning uchun
+bitta uvicorn worker bazani kutayotgan ko'plab so'rovlarga xizmat qiladi.
+O'qishlar Django async ORM orqali bajariladi, tranzaksiyali yozuvlar esa
+(services.py) ``sync_to_async`` bilan chaqiriladi. Telegram xabarlari
+outbox orqali fonda yuboriladi, shuning uchun so'rov yo'lida tashqi HTTP
+chaqiruv yo'q.
+"""
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, JsonResponse
+
+from .models import Level, TestSession, TestResult
+from .services import start_session, assign_questions, finish_session
+from .snapshots import snapshot_store
+from .levels import levels_cache, levels_response
+from .throttling import admit_write, rate_limit
+from .views import questions_response, result_data
+
+logger = logging.getLogger(__name__)
+
+
+def csrf_exempt(view):
+    # django.views.decorators.csrf.csrf_exempt Django 4.2 da async view ni
+    # sinxron funksiyaga o'rab qo'yadi
+    view.csrf_exempt = True
+    return view
+
+
+async def aget_or_404(queryset, **kwargs):
+    try:
+        return await queryset.aget(**kwargs)
+    except queryset.model.DoesNotExist:
+        raise Http404(f"{queryset.model._meta.object_name} topilmadi")
+
+
+@csrf_exempt
+async def get_levels(request):
+    if request.method == 'GET':
+        payload = levels_cache.get_cached()
+        if payload is None:
+            payload = await sync_to_async(levels_cache.get)()
+        return levels_response(request, payload)
+
+
+@csrf_exempt
+@rate_limit('start_session')
+@admit_write
+async def start_test_session(request):
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body)
+            level_id = data.get('level_id')
+            first_name = data.get('first_name', '').strip()
+            last_name = data.get('last_name', '').strip()
+            phone_number = data.get('phone_number', '').strip()
+
+            if not level_id:
+                return JsonResponse({
+                    'success': False,
+                    'error': 'Level ID talab qilinadi'
+                })
+
+            if not first_name or not last_name:
+                return JsonResponse({
+                    'success': False,
+                    'error': 'Ism va Familya talab qilinadi'
+                })
+
+            level = await aget_or_404(Level.objects.all(), id=level_id)
+            session = await sync_to_async(start_session)(level, first_name, last_name, phone_number)
+
+            return JsonResponse({
+                'success': True,
+                'session_id': session.session_id,
+                'time_limit': level.time_limit,
+                'question_count': level.question_count
+            })
+
+        except Exception as e:
+            logger.error(f"Session yaratishda xatolik: {e}")
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            }, status=500)
+
+
+@csrf_exempt
+async def get_questions(request, session_id):
+    if request.method == 'GET':
+        try:
+            session = await aget_or_404(
+                TestSession.objects.select_related('level'),
+                session_id=session_id
+            )
+            level = session.level
+
+            # Snapshot odatda xotirada, faqat qayta qurish bazaga murojaat qiladi
+            snapshot = snapshot_store.get_cached(level.id)
+            if snapshot is None:
+                snapshot = await sync_to_async(snapshot_store.get)(level.id)
+            question_ids = session.question_ids
+            if question_ids is None:
+                question_ids = await sync_to_async(assign_questions)(
+                    session, snapshot, level.question_count
+                )
+            return questions_response(request, level, snapshot, question_ids)
+        except Exception as e:
+            logger.error(f"Savollarni olishda xatolik: {e}")
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            }, status=500)
+
+
+@csrf_exempt
+@rate_limit('submit_test')
+@admit_write
+async def submit_test(request):
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body)
+            session_id = data.get('session_id')
+            answers = data.get('answers', [])
+            time_taken = data.get('time_taken', 0)
+
+            if not session_id:
+                return JsonResponse({'success': False, 'error': 'Session ID talab qilinadi'})
+
+            session = await aget_or_404(
+                TestSession.objects.select_related('level'),
+                session_id=session_id
+            )
+            test_result, telegram_queued, admin_queued = await sync_to_async(finish_session)(
+                session, answers, time_taken
+            )
+
+            return JsonResponse({
+                'success': True,
+                'session_id': session_id,
+                'correct': test_result.correct_answers,
+                'total': test_result.total_questions,
+                'score': test_result.score,
+                'time_taken': test_result.time_taken,
+                # Xabar fonda yuboriladi: *_sent outbox yetkazgach rost bo'ladi
+                'telegram_sent': test_result.telegram_sent,
+                'telegram_queued': telegram_queued,
+                'admin_notified': test_result.admin_notified,
+                'admin_queued': admin_queued
+            })
+
+        except Exception as e:
+            logger.error(f"Test yuborishda xatolik: {e}")
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            }, status=500)
+
+
+@csrf_exempt
+async def get_test_result(request, session_id):
+    try:
+        session = await aget_or_404(
+            TestSession.objects.select_related('level'),
+            session_id=session_id
+        )
+        result = await aget_or_404(TestResult.objects.all(), session=session)
+
+        return JsonResponse({
+            'success': True,
+            'result': result_data(session, result)
+        })
+    except Http404:
+        return JsonResponse({
+            'success': False,
+            'error': 'Test natijasi topilmadi'
+        }, status=404)
@@ -0,0 +1,388 @@
+# test_app/bench.py
+"""
+Benchmark buyruqlari (management/commands/bench_*.py) va testlar uchun
+umumiy yordamchilar.
+
+Sintetik ma'lumotlar tranzaksiya ichida yaratiladi va oxirida bekor qilinadi,
+shuning uchun benchmark ishlab turgan bazani ifloslantirmaydi.
+
+To'liq test oqimi uchun yuklama (``bench_load``): ``take_test`` bitta
+foydalanuvchini boshlash -> savollar -> yuborish -> natija bo'ylab o'tkazadi,
+``run_load`` esa ko'p foydalanuvchini parallel oqimlarda. So'rovlar
+``ClientTransport`` (Django test klienti) yoki ``HTTPTransport`` +
+``LocalWSGIServer`` (haqiqiy HTTP) orqali yuboriladi.
+"""
+import http.client
+import json
+import random
+import socket
+import statistics
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from django.db import connection, connections, transaction
+from django.test import Client
+
+from .models import Level, Question, Answer, TestSession, TestResult
+
+
+@contextmanager
+def rollback_after(using='default'):
+    """Blok ichidagi barcha yozuvlarni oxirida bekor qiladi"""
+    with transaction.atomic(using=using):
+        yield
+        transaction.set_rollback(True, using=using)
+
+
+def seed_level(n_questions, answers_per_question=4, question_count=20, batch_size=2000):
+    """``n_questions`` ta savoli bor sintetik daraja yaratadi"""
+    code = f"bench_{uuid.uuid4().hex[:8]}"
+    level = Level.objects.create(
+        name=code, code=code, question_count=question_count
+    )
+    for start in range(0, n_questions, batch_size):
+        size = min(batch_size, n_questions - start)
+        questions = Question.objects.bulk_create([
+            Question(level=level, question_text=f"Savol {start + i}")
+            for i in range(size)
+        ])
+        Answer.objects.bulk_create([
+            Answer(
+                question=question,
+                answer_text=f"Javob {j}",
+                is_correct=(j == 0),
+                order=j,
+            )
+            for question in questions
+            for j in range(answers_per_question)
+        ])
+    return level
+
+
+def seed_sessions(level, n_sessions, completed_ratio=0.8, days=365, batch_size=5000):
+    """
+    ``n_sessions`` ta sessiya va yakunlanganlari uchun natija yaratadi.
+    Vaqtlar oxirgi ``days`` kun bo'ylab tarqatiladi (faqat SQLite).
+    """
+    prefix = uuid.uuid4().hex[:8]
+    rng = random.Random(n_sessions)
+    for start in range(0, n_sessions, batch_size):
+        size = min(batch_size, n_sessions - start)
+        sessions = TestSession.objects.bulk_create([
+            TestSession(
+                session_id=f"BENCH_{prefix}_{start + i}",
+                level=level,
+                first_name=f"Ism{start + i}",
+                last_name="Familya",
+                completed=rng.random() < completed_ratio,
+            )
+            for i in range(size)
+        ])
+        TestResult.objects.bulk_create([
+            TestResult(
+                session=session,
+                correct_answers=(session.pk * 7) % 21,
+                total_questions=20,
+                score=((session.pk * 7) % 21) * 5,
+                time_taken=(session.pk * 13) % 900,
+            )
+            for session in sessions if session.completed
+        ])
+    # auto_now_add maydonlari bulk_create da hozirgi vaqtni oladi - tarqatamiz
+    spread = "strftime('%%Y-%%m-%%d %%H:%%M:%%f', 'now', '-' || ((id * 7919) %% %s) || ' seconds')"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE test_app_testsession SET start_time = {spread} WHERE level_id = %s",
+            [days * 86400, level.pk]
+        )
+        cursor.execute(
+            f"UPDATE test_app_testresult SET created_at = {spread} WHERE session_id IN "
+            "(SELECT id FROM test_app_testsession WHERE level_id = %s)",
+            [days * 86400, level.pk]
+        )
+
+
+def measure(fn, repeat=50, warmup=3):
+    """``fn`` ni bir necha marta chaqirib, millisekundlardagi vaqtlarni qaytaradi"""
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(timings):
+    return {
+        'p50': statistics.median(timings),
+        'p95': percentile(timings, 95),
+        'p99': percentile(timings, 99),
+        'mean': statistics.fmean(timings),
+    }
+
+
+class FakeTelegramServer:
+    """
+    Telegram Bot API o'rnini bosuvchi lokal HTTP server.
+
+    ``responses`` ro'yxatidagi ``(status, body)`` javoblar navbat bilan
+    qaytariladi, ro'yxat tugagach ``200 {"ok": true}`` qaytariladi.
+    Qabul qilingan so'rovlar ``requests`` ro'yxatida saqlanadi.
+    """
+
+    def __init__(self, responses=None, delay=0):
+        self.responses = list(responses or [])
+        self.delay = delay
+        self.requests = []
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                payload = json.loads(self.rfile.read(length) or b'{}')
+                with server._lock:
+                    server.requests.append((self.path, payload))
+                    status, body = server.responses.pop(0) if server.responses else (200, {'ok': True})
+                if server.delay:
+                    time.sleep(server.delay)
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class QueryCounter:
+    """Joriy oqim ulanishidagi SQL so'rovlarni sanaydi (``connection.execute_wrapper``)"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class ClientTransport:
+    """Django test klienti orqali, tarmoqsiz. Har bir oqimga alohida klient"""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def __call__(self, method, path, data=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = Client(HTTP_HOST='localhost')
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            if method == 'post':
+                response = client.post(path, data=json.dumps(data), content_type='application/json', secure=True)
+            else:
+                response = client.get(path, secure=True)
+        return response.status_code, response.json(), counter.count
+
+
+class LocalWSGIServer:
+    """
+    Django ilovasini lokal ko'p oqimli WSGI serverda ishga tushiradi. Har bir
+    javobga so'rov davomidagi SQL so'rovlar soni ``X-Bench-Queries``
+    sarlavhasida qo'shiladi.
+    """
+
+    def __init__(self):
+        application = get_wsgi_application()
+
+        def counted(environ, start_response):
+            counter = QueryCounter()
+
+            def start(status, headers, exc_info=None):
+                return start_response(status, headers + [('X-Bench-Queries', str(counter.count))], exc_info)
+
+            with connection.execute_wrapper(counter):
+                return application(environ, start)
+
+        class QuietHandler(WSGIRequestHandler):
+            def setup(self):
+                super().setup()
+                # Sarlavha va tana alohida yoziladi: Nagle + kechiktirilgan ACK ~40ms qo'shmasin
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadedWSGIServer(('127.0.0.1', 0), QuietHandler)
+        self._server.set_app(counted)
+        self.host, self.port = self._server.server_address[:2]
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class HTTPTransport:
+    """``LocalWSGIServer`` ga keep-alive HTTP ulanishlari orqali. Har bir oqimga alohida ulanish"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self._local = threading.local()
+
+    def __call__(self, method, path, data=None):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        body = json.dumps(data) if data is not None else None
+        conn.request(method.upper(), path, body=body, headers={
+            'Host': 'localhost', 'Content-Type': 'application/json',
+        })
+        response = conn.getresponse()
+        payload = response.read()
+        return response.status, json.loads(payload), int(response.getheader('X-Bench-Queries', 0))
+
+
+FLOW_ENDPOINTS = ('start-session', 'questions', 'submit-test', 'test-result')
+
+
+class LoadStats:
+    """Endpoint bo'yicha kechikishlar, SQL so'rovlar soni va xatolar (oqimlar uchun xavfsiz)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timings = defaultdict(list)
+        self.queries = defaultdict(list)
+        self.errors = Counter()
+        self.completed = 0
+
+    def add(self, endpoint, ms, queries, ok):
+        with self._lock:
+            if ok:
+                self.timings[endpoint].append(ms)
+                self.queries[endpoint].append(queries)
+            else:
+                self.errors[endpoint] += 1
+
+    def complete(self):
+        with self._lock:
+            self.completed += 1
+
+    def report(self, elapsed):
+        """Har bir endpoint uchun p50/p95/p99 (ms), req/s va o'rtacha SQL so'rovlar"""
+        rows = []
+        for endpoint in FLOW_ENDPOINTS:
+            timings = self.timings[endpoint]
+            row = {'endpoint': endpoint, 'count': len(timings), 'errors': self.errors[endpoint]}
+            if timings:
+                row.update(summarize(timings))
+                row['rps'] = len(timings) / elapsed if elapsed else 0.0
+                row['queries'] = statistics.fmean(self.queries[endpoint])
+            rows.append(row)
+        return rows
+
+
+def take_test(send, level_id, stats, rng, number=0):
+    """
+    Bitta foydalanuvchining to'liq oqimi. Xatolik bo'lsa oqim to'xtaydi;
+    muvaffaqiyatli tugaganini qaytaradi.
+    """
+    def step(endpoint, method, path, data=None):
+        started = time.perf_counter()
+        try:
+            status, body, queries = send(method, path, data)
+            ok = status == 200 and body.get('success', True)
+        except Exception:
+            body, queries, ok = None, 0, False
+        stats.add(endpoint, (time.perf_counter() - started) * 1000, queries, ok)
+        return body if ok else None
+
+    body = step('start-session', 'post', '/api/start-session/', {
+        'level_id': level_id, 'first_name': f"Bench{number}", 'last_name': 'Load',
+        'phone_number': f"99890{number % 10000000:07d}",
+    })
+    if body is None:
+        return False
+    session_id = body['session_id']
+
+    body = step('questions', 'get', f'/api/questions/{session_id}/')
+    if body is None:
+        return False
+    # Savol: [id, matn, [[javob_id, matn], ...], ...]
+    answers = [
+        {'question_id': question[0], 'answer_id': rng.choice(question[2])[0]}
+        for question in body['questions'] if question[2]
+    ]
+
+    if step('submit-test', 'post', '/api/submit-test/', {
+        'session_id': session_id, 'answers': answers, 'time_taken': rng.randint(60, 1200),
+    }) is None:
+        return False
+    return step('test-result', 'get', f'/api/test-results/{session_id}/') is not None
+
+
+def run_load(send, level_ids, users, concurrency, seed=0):
+    """
+    ``users`` ta foydalanuvchini ``concurrency`` ta oqimda o'tkazadi.
+    ``(LoadStats, soniyalardagi umumiy vaqt)`` qaytaradi.
+    """
+    stats = LoadStats()
+    numbers = iter(range(users))
+    numbers_lock = threading.Lock()
+
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        try:
+            while True:
+                with numbers_lock:
+                    number = next(numbers, None)
+                if number is None:
+                    return
+                if take_test(send, level_ids[number % len(level_ids)], stats, rng, number):
+                    stats.complete()
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return stats, time.perf_counter() - started
@@ -0,0 +1,128 @@
+# test_app/caching.py
+"""
+Bosqichli kesh backendi (``settings.CACHES['default']``).
+
+``TieredCache`` CACHES dagi boshqa backendlarni ``OPTIONS['TIERS']`` tartibida
+so'raydi: jarayon ichidagi LRU (``LocMemCache``) va barcha workerlar uchun
+umumiy fayl keshi (``FileBasedCache``). Har bir bosqichning o'z TTL
+(``TIMEOUT``) va hajm chegarasi (``MAX_ENTRIES``) bor. Pastki bosqichda
+topilgan qiymat yuqoriga ko'tariladi, yozish va o'chirish barcha bosqichlarga
+tegadi. Yuqori bosqichdagi muddat o'z ``TIMEOUT`` idan oshmaydi, shuning uchun
+boshqa workerda bekor qilingan qiymat ko'pi bilan shu vaqtgacha ko'rinadi.
+
+Bosqichlar bo'yicha hit/miss hisoblagichlari ``/metrics/`` da
+(``cache_requests_total``).
+"""
+import threading
+from collections import defaultdict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+_MISSING = object()
+_counters = defaultdict(int)  # (bosqich, 'hit' | 'miss') -> soni
+_counters_lock = threading.Lock()
+
+
+def record(tier, hit):
+    with _counters_lock:
+        _counters[(tier, 'hit' if hit else 'miss')] += 1
+
+
+def cache_counters():
+    with _counters_lock:
+        return dict(_counters)
+
+
+def reset_counters():
+    with _counters_lock:
+        _counters.clear()
+
+
+def render_metrics():
+    """Prometheus matn formatidagi qatorlar"""
+    lines = [
+        "# HELP cache_requests_total Kesh so'rovlari (bosqich va natija bo'yicha)",
+        "# TYPE cache_requests_total counter",
+    ]
+    for (tier, result), count in sorted(cache_counters().items()):
+        lines.append(f'cache_requests_total{{tier="{tier}",result="{result}"}} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+def shared_cache():
+    """Barcha workerlar uchun umumiy bosqich (``TieredCache`` ning oxirgisi)"""
+    backend = caches['default']
+    if isinstance(backend, TieredCache):
+        return backend.tiers[-1][1]
+    return backend
+
+
+class TieredCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.tier_aliases = list(params.get('OPTIONS', {}).get('TIERS', ()))
+
+    @property
+    def tiers(self):
+        return [(alias, caches[alias]) for alias in self.tier_aliases]
+
+    def _timeout(self, tier, timeout, last):
+        # Umumiy (oxirgi) bosqichga berilgani, yuqoridagilarga o'z TIMEOUT idan oshmagani
+        if last or timeout is DEFAULT_TIMEOUT:
+            return timeout
+        if timeout is None:
+            return tier.default_timeout
+        return min(timeout, tier.default_timeout)
+
+    def get(self, key, default=None, version=None):
+        tiers = self.tiers
+        for index, (alias, tier) in enumerate(tiers):
+            value = tier.get(key, _MISSING, version=version)
+            record(alias, value is not _MISSING)
+            if value is not _MISSING:
+                for _, upper in tiers[:index]:
+                    upper.set(key, value, version=version)
+                return value
+        return default
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        tiers = self.tiers
+        for index, (_, tier) in enumerate(tiers):
+            tier.set(key, value, self._timeout(tier, timeout, index == len(tiers) - 1), version=version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        # Kalit borligini umumiy bosqich hal qiladi
+        tiers = self.tiers
+        if not tiers[-1][1].add(key, value, timeout, version=version):
+            return False
+        for _, tier in tiers[:-1]:
+            tier.set(key, value, self._timeout(tier, timeout, False), version=version)
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        tiers = self.tiers
+        touched = False
+        for index, (_, tier) in enumerate(tiers):
+            touched = tier.touch(key, self._timeout(tier, timeout, index == len(tiers) - 1), version=version)
+        return touched
+
+    def delete(self, key, version=None):
+        deleted = False
+        for _, tier in self.tiers:
+            deleted = tier.delete(key, version=version) or deleted
+        return deleted
+
+    def has_key(self, key, version=None):
+        return any(tier.has_key(key, version=version) for _, tier in self.tiers)
+
+    def incr(self, key, delta=1, version=None):
+        tiers = self.tiers
+        value = tiers[-1][1].incr(key, delta, version=version)
+        for _, tier in tiers[:-1]:
+            tier.delete(key, version=version)
+        return value
+
+    def clear(self):
+        for _, tier in self.tiers:
+            tier.clear()
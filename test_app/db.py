@@ -0,0 +1,18 @@
+# test_app/db.py
+"""SQLite ulanishlarini sozlash: har bir yangi ulanishda ``SQLITE_PRAGMAS`` qo'llanadi"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+def apply_pragmas(connection, pragmas):
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    apply_pragmas(connection, getattr(settings, 'SQLITE_PRAGMAS', {}))
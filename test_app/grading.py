@@ -0,0 +1,132 @@
+# test_app/grading.py
+from .models import Answer
+
+
+def parse_submitted_answers(answers):
+    """
+    Yuborilgan ``[{'question_id': .., 'answer_id': ..}]`` ro'yxatini
+    ``{answer_id: question_id | None}`` ko'rinishiga keltiradi.
+    Noto'g'ri elementlar tashlab yuboriladi.
+    """
+    submitted = {}
+    for answer_data in answers:
+        try:
+            answer_id = int(answer_data['answer_id'])
+        except (KeyError, TypeError, ValueError):
+            continue
+        question_id = answer_data.get('question_id')
+        try:
+            question_id = int(question_id) if question_id is not None else None
+        except (TypeError, ValueError):
+            continue
+        submitted[answer_id] = question_id
+    return submitted
+
+
+def grade_answers(level_id, answers):
+    """
+    To'g'ri javoblar sonini bitta ``id__in`` so'rovi bilan hisoblaydi.
+
+    Faqat sessiya darajasidagi savollarga tegishli javoblar hisobga olinadi,
+    yuborilgan ``question_id`` javob savoliga mos kelishi kerak va har bir
+    savol uchun bitta javob sanaladi.
+    """
+    submitted = parse_submitted_answers(answers)
+    if not submitted:
+        return 0
+
+    # Daraja filtri Python da tekshiriladi: SQL dagi level_id sharti SQLite ni
+    # savollar indeksidan boshlashga majburlaydi va so'rov ancha sekinlashadi
+    answer_key = {
+        answer_id: (question_id, is_correct)
+        for answer_id, question_id, is_correct, answer_level_id in Answer.objects.filter(
+            id__in=list(submitted)
+        ).order_by().values_list('id', 'question_id', 'is_correct', 'question__level_id')
+        if answer_level_id == level_id
+    }
+
+    correct = 0
+    graded_questions = set()
+    for answer_id, claimed_question_id in submitted.items():
+        if answer_id not in answer_key:
+            continue
+        question_id, is_correct = answer_key[answer_id]
+        if claimed_question_id is not None and claimed_question_id != question_id:
+            continue
+        if question_id in graded_questions:
+            continue
+        graded_questions.add(question_id)
+        if is_correct:
+            correct += 1
+    return correct
+
+
+def score_for(correct, total):
+    return round(correct / total * 100, 1) if total > 0 else 0
+
+
+def count_correct(question_ids, answer_ids, answer_key):
+    """
+    Manifest bo'yicha to'g'ri javoblarni sanaydi. ``answer_key`` -
+    ``{answer_id: (question_id, is_correct)}``; javob o'z savoliga tegishli
+    bo'lishi kerak.
+    """
+    correct = 0
+    for question_id, answer_id in zip(question_ids, answer_ids):
+        if answer_id is None or answer_id not in answer_key:
+            continue
+        answer_question_id, is_correct = answer_key[answer_id]
+        if answer_question_id == question_id and is_correct:
+            correct += 1
+    return correct
+
+
+def load_answer_key(answer_ids):
+    """``{answer_id: (question_id, is_correct)}`` - bitta ``id__in`` so'rovi"""
+    return {
+        answer_id: (question_id, is_correct)
+        for answer_id, question_id, is_correct in Answer.objects.filter(
+            id__in=list(answer_ids)
+        ).order_by().values_list('id', 'question_id', 'is_correct')
+    }
+
+
+def grade_manifest(question_ids, answers, cached_key=None):
+    """
+    Sessiyaga berilgan savollar (manifest) bo'yicha baholaydi.
+
+    Faqat berilgan savollarning javoblari hisobga olinadi, har bir savol uchun
+    birinchi javob sanaladi. ``cached_key`` - daraja snapshotidagi javoblar
+    kaliti; unda yo'q javoblar (masalan, test davomida nofaol qilingan
+    savollarniki) bazadan olinadi. ``(to'g'ri javoblar soni, answer_ids)``
+    qaytaradi, ``answer_ids`` - ``question_ids`` tartibida tanlangan javoblar
+    (yoki None).
+    """
+    submitted = parse_submitted_answers(answers)
+    if not submitted:
+        return 0, [None] * len(question_ids)
+
+    cached_key = cached_key or {}
+    answer_key = {
+        answer_id: cached_key[answer_id] for answer_id in submitted if answer_id in cached_key
+    }
+    missing = [answer_id for answer_id in submitted if answer_id not in answer_key]
+    if missing:
+        answer_key.update(load_answer_key(missing))
+
+    served = set(question_ids)
+    answer_key = {
+        answer_id: key for answer_id, key in answer_key.items() if key[0] in served
+    }
+
+    chosen = {}
+    for answer_id, claimed_question_id in submitted.items():
+        if answer_id not in answer_key:
+            continue
+        question_id = answer_key[answer_id][0]
+        if claimed_question_id is not None and claimed_question_id != question_id:
+            continue
+        chosen.setdefault(question_id, answer_id)
+
+    answer_ids = [chosen.get(question_id) for question_id in question_ids]
+    return count_correct(question_ids, answer_ids, answer_key), answer_ids
@@ -0,0 +1,130 @@
+# test_app/images.py
+"""
+Savol rasmlarining kichraytirilgan nusxalari (derivativlar).
+
+Yuklangan asl rasm telefonlarga to'liq hajmda yuborilmasligi uchun har bir
+rasmdan bir nechta kenglikda WebP va JPEG nusxalar yaratiladi. Fayl nomi
+asl rasm tarkibining xeshidan olinadi (``questions/derived/<xesh>-<kenglik>.<format>``),
+shuning uchun bir xil rasm qayta ishlanmaydi va URL lar muddatsiz keshlanishi
+mumkin. Nusxalar ro'yxati ``Question.image_derivatives`` da saqlanadi va
+``get_questions`` javobida ``srcset`` sifatida yuboriladi.
+
+Yangi rasm yuklanganda nusxalar signal orqali, tranzaksiya commit qilingandan
+keyin yaratiladi (signals.py), mavjud rasmlar uchun
+``manage.py build_image_derivatives``.
+"""
+import hashlib
+import io
+import logging
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from .models import Question
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_WIDTHS = (320, 640, 1024)
+# format -> (Pillow formati, saqlash parametrlari)
+DERIVATIVE_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+DERIVATIVE_DIR = 'questions/derived'
+# Mijoz srcset ni qo'llamasa ishlatiladigan nusxa
+FALLBACK_WIDTH = 640
+
+
+def content_hash(field_file):
+    digest = hashlib.sha256()
+    field_file.open('rb')
+    try:
+        for chunk in field_file.chunks():
+            digest.update(chunk)
+    finally:
+        field_file.close()
+    return digest.hexdigest()[:16]
+
+
+def target_widths(width):
+    """Asl rasmdan katta bo'lmagan kengliklar (kichik rasm uchun o'zi)"""
+    widths = [w for w in DERIVATIVE_WIDTHS if w < width]
+    largest = min(width, DERIVATIVE_WIDTHS[-1])
+    if largest not in widths:
+        widths.append(largest)
+    return widths
+
+
+def encode(image, fmt):
+    pil_format, params = DERIVATIVE_FORMATS[fmt]
+    if pil_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        # Shaffof PNG lar oq fonga qo'yiladi
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A') if 'A' in image.getbands() else None)
+        image = background
+    buffer = io.BytesIO()
+    image.save(buffer, pil_format, **params)
+    return buffer.getvalue()
+
+
+def build_derivatives(field_file):
+    """
+    Rasm nusxalarini yaratadi (mavjudlari qayta yozilmaydi) va
+    ``{'webp': [[kenglik, nom], ...], 'jpeg': [...]}`` qaytaradi.
+    """
+    storage = field_file.storage
+    digest = content_hash(field_file)
+
+    field_file.open('rb')
+    try:
+        source = Image.open(field_file)
+        source = ImageOps.exif_transpose(source)
+        source.load()
+    finally:
+        field_file.close()
+    if source.mode not in ('RGB', 'RGBA', 'L'):
+        source = source.convert('RGBA' if 'transparency' in source.info else 'RGB')
+
+    derivatives = {fmt: [] for fmt in DERIVATIVE_FORMATS}
+    for width in target_widths(source.width):
+        resized = None
+        for fmt in DERIVATIVE_FORMATS:
+            name = f"{DERIVATIVE_DIR}/{digest}-{width}.{fmt}"
+            if not storage.exists(name):
+                if resized is None:
+                    height = max(1, round(source.height * width / source.width))
+                    resized = source.resize((width, height), Image.LANCZOS)
+                storage.save(name, ContentFile(encode(resized, fmt)))
+            derivatives[fmt].append([width, name])
+    return derivatives
+
+
+def refresh_question_derivatives(question):
+    """Savol rasmi uchun nusxalarni yaratib, ``image_derivatives`` ni yangilaydi"""
+    derivatives = None
+    if question.image:
+        try:
+            derivatives = build_derivatives(question.image)
+        except Exception as e:
+            logger.error(f"Rasm nusxalarini yaratishda xatolik ({question.image.name}): {e}")
+    # update() - post_save signalini qayta chaqirmaslik uchun
+    Question.objects.filter(pk=question.pk).update(image_derivatives=derivatives)
+    question.image_derivatives = derivatives
+    return derivatives
+
+
+def image_sources(field_file, derivatives):
+    """
+    ``(asosiy URL, {format: srcset} yoki None)``. Asosiy URL - ``FALLBACK_WIDTH``
+    ga yaqin JPEG nusxa, nusxalar bo'lmasa asl rasm.
+    """
+    if not derivatives:
+        return field_file.url, None
+
+    storage = field_file.storage
+    srcset = {
+        fmt: ', '.join(f"{storage.url(name)} {width}w" for width, name in variants)
+        for fmt, variants in derivatives.items()
+    }
+    fallback = min(derivatives['jpeg'], key=lambda variant: abs(variant[0] - FALLBACK_WIDTH))[1]
+    return storage.url(fallback), srcset
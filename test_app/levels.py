@@ -0,0 +1,100 @@
+# test_app/levels.py
+"""
+``/api/levels/`` javobining tayyor nusxasi.
+
+Darajalar ro'yxati faqat admin tahrirlaganda o'zgaradi, shuning uchun u bir
+marta JSON ga o'giriladi va keshda (caching.py: jarayon xotirasi + umumiy
+fayl keshi) saqlanadi - yangi yoki qayta ishga tushgan worker uni bazadan
+qayta qurmaydi. Level saqlanganda yoki o'chirilganda signal (signals.py)
+nusxani bekor qiladi, boshqa workerlar o'zgarishni lokal kesh muddati
+o'tgach ko'radi.
+
+ETag javob tanasining xeshi, shuning uchun barcha workerlarda bir xil va
+brauzer/CDN ``If-None-Match`` bilan so'raganda 304 qaytariladi.
+``Last-Modified`` yuborilmaydi: Level da o'zgarish vaqti yo'q, qurilish vaqti
+esa har bir worker va qayta qurishda boshqacha bo'lib, ``If-Modified-Since``
+tekshiruvini buzadi.
+"""
+import hashlib
+import json
+import threading
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+from .models import Level
+
+LEVELS_CACHE_KEY = 'test_app:levels'
+LEVELS_TTL = 60
+
+
+def level_data(level):
+    return {
+        'id': level.id,
+        'name': level.name,
+        'code': level.code,
+        'description': level.description,
+        'time_limit': level.time_limit,
+        'question_count': level.question_count
+    }
+
+
+class LevelsPayload:
+    __slots__ = ('body', 'etag')
+
+    def __init__(self, body):
+        self.body = body
+        self.etag = '"%s"' % hashlib.sha1(body).hexdigest()
+
+    @classmethod
+    def build(cls):
+        levels = Level.objects.filter(is_active=True).order_by('order')
+        body = json.dumps({
+            'success': True,
+            'levels': [level_data(level) for level in levels]
+        }).encode()
+        return cls(body)
+
+
+class LevelsCache:
+    def __init__(self, ttl=LEVELS_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    def get_cached(self):
+        """Keshdagi nusxa yoki ``None`` (bazaga murojaat qilmaydi)"""
+        return cache.get(LEVELS_CACHE_KEY)
+
+    def get(self):
+        payload = self.get_cached()
+        if payload is not None:
+            return payload
+
+        generation = self._generation
+        payload = LevelsPayload.build()
+        with self._lock:
+            # Qurish vaqtida daraja o'zgargan bo'lsa, eskirgan nusxani saqlamaymiz
+            if self._generation == generation:
+                cache.set(LEVELS_CACHE_KEY, payload, self.ttl)
+        return payload
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            cache.delete(LEVELS_CACHE_KEY)
+
+
+levels_cache = LevelsCache()
+
+
+def levels_response(request, payload):
+    """ETag bilan javob, ``If-None-Match`` mos kelsa 304"""
+    response = get_conditional_response(request, etag=payload.etag)
+    if response is None:
+        response = HttpResponse(payload.body, content_type='application/json')
+    response.headers['ETag'] = payload.etag
+    # Har safar qayta tekshirish: daraja o'zgarsa darhol ko'rinadi
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
@@ -0,0 +1,191 @@
+# test_app/logs.py
+"""
+Bloklamaydigan log yozish (``settings.LOGGING``).
+
+So'rov oqimi yozuvni faqat xotiradagi navbatga qo'yadi (``QueueHandler``),
+diskka va konsolga alohida fon oqimi (``QueueListener``) yozadi. Faylga har
+bir qator bitta JSON obyekt. Navbat to'lsa yozuv tashlab yuboriladi va
+``dropped`` oshadi (``/metrics/`` da ``log_records_dropped_total``) - log
+uchun so'rov kutib qolmaydi.
+
+Bir nechta gunicorn worker bitta faylga ``O_APPEND`` bilan yozadi. Oddiy
+``RotatingFileHandler`` ni ular birgalikda ishlata olmaydi (har biri faylni
+alohida qayta nomlaydi va eski inode ga yozishda davom etadi), shuning uchun:
+
+* ``max_bytes > 0`` (settings da standart) - ``SharedRotatingFileHandler``:
+  hajm tekshiruvi va aylantirish ``<fayl>.lock`` dagi ``flock`` ostida, boshqa
+  jarayon aylantirgan faylni qolganlari qayta ochadi. ``fcntl`` yo'q
+  platformada har bir jarayon o'z faylini aylantiradi (``debug.<pid>.log``).
+* ``max_bytes=0`` - aylantirilmaydi (``WatchedFileHandler``), bu ishni
+  tashqi logrotate qiladi; fayl almashtirilsa handler uni qayta ochadi.
+
+Listener oqimi handler yaratilganda ishga tushadi, shuning uchun gunicorn
+``--preload`` siz ishlatiladi (har bir worker o'z oqimini oladi).
+"""
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import sys
+import weakref
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, WatchedFileHandler
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# LogRecord ning standart atributlari: qolganlari (extra=...) JSON ga qo'shiladi
+RESERVED_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+CONSOLE_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+
+_handlers = weakref.WeakSet()
+
+
+def process_filename(filename, pid=None):
+    """``debug.log`` -> ``debug.<pid>.log``"""
+    root, ext = os.path.splitext(filename)
+    return f"{root}.{os.getpid() if pid is None else pid}{ext}"
+
+
+def render_metrics():
+    """Prometheus matn formatidagi qatorlar"""
+    dropped = sum(handler.dropped for handler in list(_handlers))
+    return (
+        "# HELP log_records_dropped_total Navbat to'lgani uchun tashlangan log yozuvlari\n"
+        "# TYPE log_records_dropped_total counter\n"
+        f"log_records_dropped_total {dropped}\n"
+    )
+
+
+class JsonFormatter(logging.Formatter):
+    """Bitta qatorli JSON: vaqt, daraja, logger, xabar, xatolik va ``extra`` maydonlar"""
+
+    def format(self, record):
+        data = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exc'] = record.exc_text
+        if record.stack_info:
+            data['stack'] = record.stack_info
+        for key, value in vars(record).items():
+            if key not in RESERVED_ATTRS and not key.startswith('_'):
+                data[key] = value
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class SharedRotatingFileHandler(RotatingFileHandler):
+    """
+    Bir nechta jarayon uchun umumiy fayl, hajm bo'yicha aylantiriladi. Har bir
+    yozuv ``<fayl>.lock`` qulfi ostida yoziladi: fayl boshqa jarayon tomonidan
+    aylantirilgan bo'lsa (inode o'zgargan) u qayta ochiladi, hajm oshsa
+    aylantirishni qulfni olgan jarayon bajaradi.
+    """
+
+    def __init__(self, filename, maxBytes, backupCount, encoding=None):
+        super().__init__(filename, maxBytes=maxBytes, backupCount=backupCount, encoding=encoding, delay=True)
+        self._lock_fd = None
+
+    def _reopen_if_rotated(self):
+        if self.stream is None:
+            return
+        try:
+            current = os.stat(self.baseFilename).st_ino
+        except FileNotFoundError:
+            current = None
+        if current != os.fstat(self.stream.fileno()).st_ino:
+            self.stream.close()
+            self.stream = None
+
+    def emit(self, record):
+        if self._lock_fd is None:
+            self._lock_fd = os.open(self.baseFilename + '.lock', os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        try:
+            self._reopen_if_rotated()
+            super().emit(record)
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def close(self):
+        super().close()
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+
+class QueueListenerHandler(QueueHandler):
+    """
+    ``LOGGING`` dagi yagona handler: yozuvlarni navbatga qo'yadi, fon oqimi
+    ularni JSON faylga va konsolga yozadi.
+    """
+
+    def __init__(self, filename, max_bytes=0, backup_count=5, console=True, queue_size=10000):
+        super().__init__(queue.Queue(queue_size))
+        self.dropped = 0
+        if max_bytes and fcntl is not None:
+            file_handler = SharedRotatingFileHandler(
+                filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+            )
+        elif max_bytes:
+            file_handler = RotatingFileHandler(
+                process_filename(filename), maxBytes=max_bytes, backupCount=backup_count,
+                encoding='utf-8', delay=True
+            )
+        else:
+            file_handler = WatchedFileHandler(filename, encoding='utf-8', delay=True)
+        file_handler.setFormatter(JsonFormatter())
+        targets = [file_handler]
+        if console:
+            console_handler = logging.StreamHandler(sys.stderr)
+            console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+            targets.append(console_handler)
+        self.targets = targets
+        self.listener = QueueListener(self.queue, *targets, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.stop)
+        _handlers.add(self)
+
+    def prepare(self, record):
+        # Xabar va traceback shu yerda matnga aylantiriladi (argumentlar va
+        # traceback obyektlari boshqa oqimda o'zgarishi mumkin), qolgani
+        # formatlash bilan birga fon oqimida
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """Navbatdagi barcha yozuvlar yozilguncha kutadi"""
+        if self.listener._thread is not None:
+            self.listener.stop()
+            self.listener.start()
+
+    def stop(self):
+        if self.listener._thread is not None:
+            self.listener.stop()
+        for handler in self.targets:
+            handler.close()
+
+    def close(self):
+        self.stop()
+        super().close()
@@ -0,0 +1,127 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import AsyncClient, Client, override_settings
+
+from test_app.bench import seed_level, summarize
+from test_app.models import Answer
+
+
+def flow_requests(level_id, answers):
+    """Bitta test topshiruvchining so'rovlari: (metod, yo'l, ma'lumot) generatori"""
+    yield 'get', '/api/levels/', None
+    session_id = yield 'post', '/api/start-session/', {
+        'level_id': level_id, 'first_name': 'Bench', 'last_name': 'Asgi'
+    }
+    yield 'get', f'/api/questions/{session_id}/', None
+    yield 'post', '/api/submit-test/', {'session_id': session_id, 'answers': answers, 'time_taken': 60}
+    yield 'get', f'/api/test-results/{session_id}/', None
+
+
+def sync_flow(level_id, answers):
+    client = Client()
+    started = time.perf_counter()
+    flow = flow_requests(level_id, answers)
+    value = None
+    try:
+        while True:
+            method, path, data = flow.send(value)
+            response = getattr(client, method)(path, data=data, content_type='application/json', secure=True)
+            value = response.json().get('session_id')
+    except StopIteration:
+        pass
+    connections.close_all()
+    return (time.perf_counter() - started) * 1000
+
+
+async def async_flow(level_id, answers):
+    client = AsyncClient()
+    started = time.perf_counter()
+    flow = flow_requests(level_id, answers)
+    value = None
+    try:
+        while True:
+            method, path, data = flow.send(value)
+            response = await getattr(client, method)(path, data=data, content_type='application/json', secure=True)
+            value = response.json().get('session_id')
+    except StopIteration:
+        pass
+    return (time.perf_counter() - started) * 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Test oqimini (darajalar, boshlash, savollar, yuborish, natija) bir vaqtda "
+        "ko'p foydalanuvchi bilan sinxron WSGI (oqimlar) va async ASGI (bitta event loop) "
+        "view larida solishtiradi. Vaqtinchalik baza ishlatiladi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help="Test topshiruvchilar soni")
+        parser.add_argument('--concurrency', type=int, default=50, help="Bir vaqtdagi foydalanuvchilar")
+        parser.add_argument('--threads', type=int, default=8, help="WSGI worker oqimlari")
+
+    def run_wsgi(self, level_id, answers, users, threads):
+        with override_settings(ROOT_URLCONF='test_project.urls'):
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                return list(pool.map(lambda _: sync_flow(level_id, answers), range(users)))
+
+    def run_asgi(self, level_id, answers, users, concurrency):
+        async def main():
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def user():
+                async with semaphore:
+                    return await async_flow(level_id, answers)
+
+            return await asyncio.gather(*(user() for _ in range(users)))
+
+        with override_settings(ROOT_URLCONF='test_project.urls_async'):
+            return asyncio.run(main())
+
+    def handle(self, *args, **options):
+        tmpdir = tempfile.mkdtemp(prefix='bench_asgi_')
+        try:
+            connections.close_all()
+            connection.settings_dict['NAME'] = os.path.join(tmpdir, 'bench.sqlite3')
+            call_command('migrate', verbosity=0)
+            level = seed_level(500)
+            answers = [
+                {'question_id': question_id, 'answer_id': answer_id}
+                for answer_id, question_id in Answer.objects.filter(
+                    question__level=level, order=0
+                ).values_list('id', 'question_id')[:20]
+            ]
+            connections.close_all()
+
+            modes = (
+                ('WSGI', lambda: self.run_wsgi(level.id, answers, options['users'], options['threads'])),
+                ('ASGI', lambda: self.run_asgi(level.id, answers, options['users'], options['concurrency'])),
+            )
+            # AsyncClient Host sarlavhasini har doim 'testserver' qilib yuboradi;
+            # barcha foydalanuvchilar bitta IP dan - IP cheklovi o'chiriladi
+            with override_settings(
+                TELEGRAM_OUTBOX_THREAD=False, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                RATE_LIMITS={},
+            ):
+                for name, run in modes:
+                    started = time.perf_counter()
+                    latencies = run()
+                    elapsed = time.perf_counter() - started
+                    connections.close_all()
+                    timing = summarize(latencies)
+                    self.stdout.write(
+                        f"{name}: {len(latencies) / elapsed:.1f} foydalanuvchi/s, "
+                        f"p50={timing['p50']:.1f}ms p95={timing['p95']:.1f}ms"
+                    )
+        finally:
+            connections.close_all()
+            shutil.rmtree(tmpdir, ignore_errors=True)
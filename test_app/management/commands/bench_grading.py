@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from test_app.bench import measure, rollback_after, seed_level, summarize
+from test_app.grading import grade_answers
+from test_app.models import Answer
+
+
+class Command(BaseCommand):
+    help = "Javoblarni bittalab va bitta so'rov bilan baholash tezligini solishtiradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='20,100,500', help="Yuboriladigan javoblar soni (vergul bilan)")
+        parser.add_argument('--repeat', type=int, default=30)
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        with rollback_after():
+            level = seed_level(max(sizes))
+            rows = list(
+                Answer.objects.filter(question__level=level)
+                .order_by('question_id', 'order').values_list('id', 'question_id')
+            )
+            # Har bir savol uchun bitta (birinchi) javob
+            chosen = {}
+            for answer_id, question_id in rows:
+                chosen.setdefault(question_id, answer_id)
+            submission = [
+                {'question_id': question_id, 'answer_id': answer_id}
+                for question_id, answer_id in chosen.items()
+            ]
+
+            self.stdout.write(f"{'javoblar':>9} {'eski p50':>10} {'so`rov':>7} {'yangi p50':>10} {'so`rov':>7}  (ms)")
+            for size in sizes:
+                answers = submission[:size]
+
+                def one_by_one():
+                    correct = 0
+                    for answer_data in answers:
+                        try:
+                            if Answer.objects.get(id=answer_data['answer_id']).is_correct:
+                                correct += 1
+                        except Answer.DoesNotExist:
+                            continue
+
+                def batched():
+                    grade_answers(level.id, answers)
+
+                results = []
+                for fn in (one_by_one, batched):
+                    with CaptureQueriesContext(connection) as queries:
+                        fn()
+                    timing = summarize(measure(fn, repeat=options['repeat']))
+                    results.append((timing['p50'], len(queries)))
+                (old, old_queries), (new, new_queries) = results
+                self.stdout.write(
+                    f"{size:>9} {old:>10.3f} {old_queries:>7} {new:>10.3f} {new_queries:>7}"
+                )
@@ -0,0 +1,77 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from test_app.bench import measure, rollback_after, seed_level, seed_sessions, summarize
+from test_app.models import Question, TestResult, TestSession
+
+# Snapshot so'rovi (daraja + faol, id tartibida) ForeignKey ning level_id
+# indeksidan o'qiladi: SQLite indeksida rowid bor, shuning uchun u ORDER BY id
+# ni ham beradi. Savollar uchun alohida indeks yo'q, so'rov solishtirish uchun qoldi
+INDEXED_MODELS = (TestResult, TestSession)
+
+
+class Command(BaseCommand):
+    help = (
+        "Sintetik ma'lumotlar ustida asosiy so'rovlarning EXPLAIN QUERY PLAN va "
+        "vaqtlarini indekslarsiz va indekslar bilan solishtiradi"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--levels', type=int, default=6)
+        parser.add_argument('--questions', type=int, default=5000, help="Har bir darajadagi savollar soni")
+        parser.add_argument('--sessions', type=int, default=20000, help="Har bir darajadagi sessiyalar soni")
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def queries(self, level):
+        cutoff = timezone.now() - timedelta(days=180)
+        deep = TestResult.objects.order_by('-created_at', '-id').values_list('created_at', flat=True)
+        middle = deep[deep.count() // 2]
+        return {
+            'snapshot savollari': Question.objects.filter(
+                level=level, is_active=True
+            ).order_by('id').values_list('id', flat=True),
+            'natijalar 1-sahifa': TestResult.objects.order_by('-created_at', '-id')[:100],
+            'natijalar chuqur sahifa': TestResult.objects.filter(
+                created_at__lt=middle
+            ).order_by('-created_at', '-id')[:100],
+            'admin: daraja+yakunlangan': TestSession.objects.filter(
+                level=level, completed=True
+            ).values('id')[:100],
+            'admin: boshlanish vaqti': TestSession.objects.filter(
+                start_time__gte=cutoff
+            ).order_by('-start_time')[:100],
+        }
+
+    def set_indexes(self, enabled):
+        editor = connection.schema_editor()
+        with connection.cursor() as cursor:
+            for model in INDEXED_MODELS:
+                for index in model._meta.indexes:
+                    sql = index.create_sql(model, editor) if enabled else index.remove_sql(model, editor)
+                    cursor.execute(str(sql))
+            cursor.execute('ANALYZE')
+
+    def report(self, title, level, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        for name, queryset in self.queries(level).items():
+            plan = queryset.explain().replace('\n', '\n' + ' ' * 6)
+            timing = summarize(measure(lambda: list(queryset.all()), repeat=repeat))
+            self.stdout.write(f"  {name}: p50={timing['p50']:.3f}ms p95={timing['p95']:.3f}ms")
+            self.stdout.write(f"      {plan}")
+
+    def handle(self, *args, **options):
+        with rollback_after():
+            levels = []
+            for _ in range(options['levels']):
+                level = seed_level(options['questions'], answers_per_question=0)
+                seed_sessions(level, options['sessions'])
+                levels.append(level)
+            level = levels[len(levels) // 2]
+
+            self.set_indexes(False)
+            self.report("Indekslarsiz", level, options['repeat'])
+            self.set_indexes(True)
+            self.report("Indekslar bilan", level, options['repeat'])
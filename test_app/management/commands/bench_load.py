@@ -0,0 +1,89 @@
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import override_settings
+
+from test_app.bench import (
+    ClientTransport, FakeTelegramServer, HTTPTransport, LocalWSGIServer, run_load, seed_level, seed_sessions,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "To'liq test oqimi (boshlash -> savollar -> yuborish -> natija) uchun yuklama testi. "
+        "Sintetik darajalar va tarixiy sessiyalar vaqtinchalik bazaga yoziladi, ko'p "
+        "foydalanuvchi parallel oqimlarda test klienti yoki lokal WSGI server orqali "
+        "o'tkaziladi. Telegram lokal soxta serverga yuboriladi. Har bir endpoint uchun "
+        "p50/p95/p99, o'tkazuvchanlik va so'rovdagi SQL so'rovlar soni chiqariladi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--levels', type=int, default=3, help="Darajalar soni")
+        parser.add_argument('--questions', type=int, default=200, help="Har bir darajadagi savollar")
+        parser.add_argument('--question-count', type=int, default=20, help="Bitta testdagi savollar")
+        parser.add_argument('--history', type=int, default=10000, help="Har bir darajadagi tarixiy sessiyalar")
+        parser.add_argument('--users', type=int, default=300, help="Test topshiruvchilar soni")
+        parser.add_argument('--concurrency', type=int, default=8, help="Bir vaqtdagi foydalanuvchilar (oqimlar)")
+        parser.add_argument('--server', action='store_true', help="Test klienti o'rniga lokal WSGI server (HTTP)")
+        parser.add_argument(
+            '--throttle', action='store_true',
+            help="RATE_LIMITS ni qoldirish (odatda o'chiriladi: hamma foydalanuvchi bitta IP dan)",
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        tmpdir = tempfile.mkdtemp(prefix='bench_load_')
+        try:
+            connections.close_all()
+            connection.settings_dict['NAME'] = os.path.join(tmpdir, 'bench.sqlite3')
+            call_command('migrate', verbosity=0)
+            level_ids = []
+            for _ in range(options['levels']):
+                level = seed_level(options['questions'], question_count=options['question_count'])
+                if options['history']:
+                    seed_sessions(level, options['history'])
+                level_ids.append(level.id)
+            connections.close_all()
+
+            # Lokal HTTP serverda TLS yo'q: HTTPS ga yo'naltirish o'chiriladi
+            limits = {} if options['throttle'] else {'RATE_LIMITS': {}}
+            with FakeTelegramServer() as telegram, override_settings(
+                TELEGRAM_API_URL=telegram.url, SECURE_SSL_REDIRECT=False, **limits,
+            ):
+                if options['server']:
+                    with LocalWSGIServer() as server:
+                        stats, elapsed = run_load(
+                            HTTPTransport(server.host, server.port), level_ids,
+                            options['users'], options['concurrency'], options['seed'],
+                        )
+                else:
+                    stats, elapsed = run_load(
+                        ClientTransport(), level_ids, options['users'], options['concurrency'], options['seed'],
+                    )
+                telegram_requests = len(telegram.requests)
+
+            mode = 'WSGI server' if options['server'] else 'test klienti'
+            self.stdout.write(
+                f"{mode}, {options['concurrency']} oqim: {stats.completed}/{options['users']} foydalanuvchi "
+                f"{elapsed:.2f}s da ({stats.completed / elapsed:.1f} foydalanuvchi/s), "
+                f"Telegram: {telegram_requests} so'rov"
+            )
+            self.stdout.write(
+                f"{'endpoint':<14} {'soni':>6} {'xato':>5} {'p50':>8} {'p95':>8} {'p99':>8} "
+                f"{'req/s':>8} {'SQL':>5}  (ms)"
+            )
+            for row in stats.report(elapsed):
+                if not row['count']:
+                    self.stdout.write(f"{row['endpoint']:<14} {0:>6} {row['errors']:>5}")
+                    continue
+                self.stdout.write(
+                    f"{row['endpoint']:<14} {row['count']:>6} {row['errors']:>5} {row['p50']:>8.2f} "
+                    f"{row['p95']:>8.2f} {row['p99']:>8.2f} {row['rps']:>8.1f} {row['queries']:>5.1f}"
+                )
+        finally:
+            connections.close_all()
+            shutil.rmtree(tmpdir, ignore_errors=True)
@@ -0,0 +1,115 @@
+import contextlib
+import logging
+import logging.config
+import os
+import shutil
+import tempfile
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client
+
+from test_app.bench import measure, summarize
+from test_app.logs import QueueListenerHandler
+
+
+def sync_config(filename):
+    """Oldingi sozlama: root INFO, har bir yozuv so'rov oqimida faylga va konsolga"""
+    return {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'handlers': {
+            'console': {'class': 'logging.StreamHandler'},
+            'file': {'class': 'logging.FileHandler', 'filename': filename},
+        },
+        'root': {'handlers': ['console', 'file'], 'level': 'INFO'},
+        # Django ning standart sozlamasi: django.request 4xx ni WARNING bilan yozadi
+        'loggers': {'django': {'level': 'INFO'}},
+    }
+
+
+def queue_config(filename):
+    config = dict(settings.LOGGING)
+    config['handlers'] = {'queue': {**settings.LOGGING['handlers']['queue'], 'filename': filename}}
+    return config
+
+
+def null_config(filename):
+    return {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'handlers': {'null': {'class': 'logging.NullHandler'}},
+        'root': {'handlers': ['null'], 'level': 'CRITICAL'},
+        'loggers': {'django': {'level': 'CRITICAL'}},
+    }
+
+
+CONFIGS = (('log yo`q', null_config), ('sinxron', sync_config), ('navbat', queue_config))
+
+
+class Command(BaseCommand):
+    help = (
+        "Log yozish narxini oldingi sinxron FileHandler sozlamasi va navbatli (QueueHandler) "
+        "sozlama bilan solishtiradi: bitta yozuv (1 va bir nechta oqimda) va 404 so'rov"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=2000, help="Har bir o'lchovdagi yozuvlar")
+        parser.add_argument('--threads', type=int, default=8, help="Parallel oqimlar")
+        parser.add_argument('--requests', type=int, default=300, help="So'rovlar soni")
+
+    def log_calls(self, repeat, threads):
+        logger = logging.getLogger('test_app.views')
+        timings = []
+        lock = threading.Lock()
+
+        def worker():
+            local = measure(lambda: logger.info("Test yakunlandi: %s %s", 'IT_BENCH', 85), repeat=repeat)
+            with lock:
+                timings.extend(local)
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return summarize([t * 1000 for t in timings])  # mikrosekund
+
+    def handle(self, *args, **options):
+        tmpdir = tempfile.mkdtemp(prefix='bench_logging_')
+        client = Client(HTTP_HOST='localhost')
+        rows = []
+        try:
+            # Konsol yozuvlari ham o'lchanadi, lekin ekranga chiqmaydi
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stderr(devnull):
+                for name, build in CONFIGS:
+                    logging.config.dictConfig(build(os.path.join(tmpdir, f"{build.__name__}.log")))
+                    handler = next(
+                        (h for h in logging.getLogger().handlers if isinstance(h, QueueListenerHandler)), None
+                    )
+                    single = self.log_calls(options['repeat'], 1)
+                    threaded = self.log_calls(options['repeat'] // options['threads'], options['threads'])
+                    if handler:
+                        # Navbatdagi yozuvlar keyingi o'lchovga xalaqit bermasin
+                        handler.flush()
+                    request = summarize(measure(
+                        lambda: client.get('/api/test-results/IT_YOQ/', secure=True),
+                        repeat=options['requests'],
+                    ))
+                    dropped = handler.dropped if handler else 0
+                    rows.append((name, single, threaded, request, dropped))
+        finally:
+            logging.config.dictConfig(settings.LOGGING)
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+        self.stdout.write(
+            f"{'sozlama':<10} {'1 oqim p50/p99 (us)':>22} {str(options['threads']) + ' oqim p50/p99 (us)':>22} "
+            f"{'404 so`rov p50/p95 (ms)':>25} {'tashlangan':>11}"
+        )
+        for name, single, threaded, request, dropped in rows:
+            self.stdout.write(
+                f"{name:<10} {single['p50']:>10.1f} / {single['p99']:>9.1f} "
+                f"{threaded['p50']:>10.1f} / {threaded['p99']:>9.1f} "
+                f"{request['p50']:>12.3f} / {request['p95']:>10.3f} {dropped:>11}"
+            )
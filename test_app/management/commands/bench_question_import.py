@@ -0,0 +1,69 @@
+import io
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+
+from test_app.bench import rollback_after
+from test_app.models import Answer, Level, Question
+from test_app.question_bank import export_records, import_questions, read_records, write_records
+
+
+class Command(BaseCommand):
+    help = (
+        "Savollar bankini NDJSON/CSV dan import va eksport qilish vaqtini o'lchaydi hamda "
+        "admin kabi bittalab saqlash bilan solishtiradi (ma'lumotlar bekor qilinadi)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=50000)
+        parser.add_argument('--answers', type=int, default=4, help="Har bir savoldagi javoblar")
+        parser.add_argument('--sample', type=int, default=500, help="Bittalab saqlash uchun namunaviy savollar")
+
+    def records(self, code, count, answers):
+        for i in range(count):
+            yield {
+                'level': code,
+                'question_text': f"Savol {i}: ____ to'g'ri variantni tanlang",
+                'explanation': '',
+                'is_active': True,
+                'answers': [{'text': f"Javob {j}", 'is_correct': j == 0} for j in range(answers)],
+            }
+
+    def handle(self, *args, **options):
+        n = options['questions']
+        with rollback_after():
+            code = f"bench_{uuid.uuid4().hex[:8]}"
+            level = Level.objects.create(name=code, code=code)
+
+            for fmt in ('ndjson', 'csv'):
+                source = io.StringIO()
+                write_records(self.records(code, n, options['answers']), source, fmt)
+                source.seek(0)
+                started = time.perf_counter()
+                questions, answers = import_questions(read_records(source, fmt))
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"import {fmt:>6}: {questions} savol, {answers} javob - {elapsed:.2f}s "
+                    f"({questions / elapsed:,.0f} savol/s), fayl {len(source.getvalue()) // 1024} KB"
+                )
+
+            started = time.perf_counter()
+            count = write_records(export_records(Question.objects.filter(level=level)), io.StringIO(), 'ndjson')
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"export ndjson: {count} savol - {elapsed:.2f}s ({count / elapsed:,.0f} savol/s)")
+
+            # Admin (AnswerInline) kabi: har bir savol va javob alohida save()
+            started = time.perf_counter()
+            for record in self.records(code, options['sample'], options['answers']):
+                question = Question.objects.create(level=level, question_text=record['question_text'])
+                for order, answer in enumerate(record['answers']):
+                    Answer.objects.create(
+                        question=question, answer_text=answer['text'],
+                        is_correct=answer['is_correct'], order=order
+                    )
+            elapsed = time.perf_counter() - started
+            rate = options['sample'] / elapsed
+            self.stdout.write(
+                f"bittalab save(): {rate:,.0f} savol/s -> {n} savol ~{n / rate:.0f}s"
+            )
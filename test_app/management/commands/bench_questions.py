@@ -0,0 +1,54 @@
+import gzip
+import json
+
+from django.core.management.base import BaseCommand
+from django.db.models import Prefetch
+
+from test_app.bench import measure, rollback_after, seed_level, summarize
+from test_app.models import Answer, Question
+from test_app.snapshots import SnapshotStore
+
+
+class Command(BaseCommand):
+    help = "Savollar javobini ORM orqali qurish va snapshotdan olish tezligini solishtiradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=1000, help="Darajadagi savollar soni")
+        parser.add_argument('--count', type=int, default=20, help="Bitta testdagi savollar soni")
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        k = options['count']
+        with rollback_after():
+            level = seed_level(options['questions'], question_count=k)
+            store = SnapshotStore()
+
+            def from_orm():
+                # Eski format: uzun kalitlar va is_correct, har so'rovda ORM + json.dumps
+                ids = store.get(level.id).sample(k)
+                questions = Question.objects.prefetch_related(
+                    Prefetch('answers', queryset=Answer.objects.order_by('order'))
+                ).in_bulk(ids)
+                return json.dumps([{
+                    'id': question.id,
+                    'question_text': question.question_text,
+                    'answers': [
+                        {
+                            'id': answer.id,
+                            'answer_text': answer.answer_text,
+                            'is_correct': answer.is_correct
+                        } for answer in question.answers.all()
+                    ]
+                } for question in questions.values()])
+
+            def from_snapshot():
+                snapshot = store.get(level.id)
+                return ','.join(snapshot.render(snapshot.sample(k), str))
+
+            for name, fn in (('ORM + json.dumps', from_orm), ('snapshot', from_snapshot)):
+                body = fn().encode()
+                result = summarize(measure(fn, repeat=options['repeat']))
+                self.stdout.write(
+                    f"{name:>18}: p50={result['p50']:.3f}ms p95={result['p95']:.3f}ms "
+                    f"hajm={len(body)}B gzip={len(gzip.compress(body))}B"
+                )
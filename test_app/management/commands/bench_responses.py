@@ -0,0 +1,75 @@
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from test_app.analytics import item_statistics, record_responses
+from test_app.bench import measure, rollback_after, seed_level, seed_sessions, summarize
+from test_app.models import Answer, TestResult, TestSession
+
+
+class Command(BaseCommand):
+    help = (
+        "Har bir yuborishdagi javoblarni QuestionResponse ga yozish narxini o'lchaydi "
+        "(byudjetdan oshsa xatolik) va savollar tahlili so'rovi vaqtini chiqaradi"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='20,50,100', help="Sessiyadagi savollar soni (vergul bilan)")
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--budget-ms', type=float, default=10.0, help="Bitta yuborish uchun p95 chegarasi")
+        parser.add_argument('--sessions', type=int, default=5000, help="Tahlil uchun sintetik natijalar")
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        over_budget = []
+        with rollback_after():
+            level = seed_level(max(sizes), question_count=max(sizes))
+            rows = list(
+                Answer.objects.filter(question__level=level)
+                .order_by('question_id', 'order').values_list('question_id', 'id')
+            )
+            question_ids = [question_id for question_id, _ in rows[::4]]
+            answer_ids = [answer_id for _, answer_id in rows[::4]]
+            # Har bir yuborish uchun alohida sessiya oldindan yaratiladi
+            sessions = iter(TestSession.objects.bulk_create([
+                TestSession(
+                    session_id=f"BENCH_{i}", level=level, first_name='Bench', last_name='Responses'
+                ) for i in range(len(sizes) * (options['repeat'] + 4))
+            ]))
+
+            self.stdout.write(f"{'savollar':>9} {'p50':>8} {'p95':>8} {'so`rov':>7}  (ms)")
+            for size in sizes:
+                def submit():
+                    record_responses(next(sessions), question_ids[:size], answer_ids[:size])
+
+                with CaptureQueriesContext(connection) as queries:
+                    submit()
+                timing = summarize(measure(submit, repeat=options['repeat']))
+                self.stdout.write(f"{size:>9} {timing['p50']:>8.3f} {timing['p95']:>8.3f} {len(queries):>7}")
+                if timing['p95'] > options['budget_ms']:
+                    over_budget.append(size)
+
+            TestSession.objects.filter(session_id__startswith='BENCH_').delete()
+            seed_sessions(level, options['sessions'])
+            # Har bir savolga tasodifiy javob (to'rttadan biri to'g'ri)
+            choices = {}
+            for question_id, answer_id in rows:
+                choices.setdefault(question_id, []).append(answer_id)
+            rng = random.Random(0)
+            served = question_ids[:20]
+            for session_id in TestResult.objects.values_list('session_id', flat=True).iterator():
+                record_responses(
+                    TestSession(id=session_id), served,
+                    [rng.choice(choices[question_id]) for question_id in served]
+                )
+            timing = summarize(measure(lambda: item_statistics(level), repeat=5))
+            self.stdout.write(
+                f"savollar tahlili ({options['sessions']} sessiya): p50={timing['p50']:.1f}ms"
+            )
+
+        if over_budget:
+            raise CommandError(
+                f"Byudjetdan oshdi ({options['budget_ms']}ms): {', '.join(map(str, over_budget))} savol"
+            )
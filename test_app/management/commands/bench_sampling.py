@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from test_app.bench import measure, rollback_after, seed_level, summarize
+from test_app.models import Question
+from test_app.snapshots import SnapshotStore
+
+
+class Command(BaseCommand):
+    help = "ORDER BY RANDOM() va snapshotdagi ID lardan savol tanlash tezligini solishtiradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default='100,1000,10000,100000',
+            help="Darajadagi savollar soni (vergul bilan)",
+        )
+        parser.add_argument('--count', type=int, default=20, help="Tanlanadigan savollar soni")
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        k = options['count']
+        repeat = options['repeat']
+
+        self.stdout.write(f"{'savollar':>10} {'random() p50':>14} {'snapshot p50':>13} {'snapshot p95':>13}  (ms)")
+        with rollback_after():
+            for size in sizes:
+                level = seed_level(size, answers_per_question=0, question_count=k)
+                store = SnapshotStore()
+
+                def order_by_random():
+                    list(
+                        Question.objects.filter(level=level, is_active=True)
+                        .order_by('?').values_list('id', flat=True)[:k]
+                    )
+
+                def from_snapshot():
+                    store.get(level.id).sample(k)
+
+                old = summarize(measure(order_by_random, repeat=max(5, repeat // 10)))
+                new = summarize(measure(from_snapshot, repeat=repeat))
+                self.stdout.write(
+                    f"{size:>10} {old['p50']:>14.3f} {new['p50']:>13.4f} {new['p95']:>13.4f}"
+                )
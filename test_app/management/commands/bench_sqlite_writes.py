@@ -0,0 +1,119 @@
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client, override_settings
+
+from test_app.bench import seed_level, summarize
+from test_app.models import Answer
+
+# Django standart sozlamalari: rollback jurnali, har so'rovda qayta ulanish
+BASELINE_PRAGMAS = {
+    'journal_mode': 'DELETE',
+    'synchronous': 'FULL',
+    'busy_timeout': 5000,
+}
+
+
+def run_worker(level_id, answers, deadline, conn_max_age, queue):
+    connection.settings_dict['CONN_MAX_AGE'] = conn_max_age
+    client = Client(HTTP_HOST='localhost')
+    completed = errors = 0
+    latencies = []
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        response = client.post(
+            '/api/start-session/',
+            data=json.dumps({'level_id': level_id, 'first_name': 'Bench', 'last_name': 'Worker'}),
+            content_type='application/json', secure=True,
+        )
+        if response.status_code != 200:
+            errors += 1
+            continue
+        response = client.post(
+            '/api/submit-test/',
+            data=json.dumps({
+                'session_id': response.json()['session_id'],
+                'answers': answers,
+                'time_taken': 60,
+            }),
+            content_type='application/json', secure=True,
+        )
+        if response.status_code != 200:
+            errors += 1
+            continue
+        completed += 1
+        latencies.append((time.perf_counter() - started) * 1000)
+    connections.close_all()
+    queue.put((completed, errors, latencies))
+
+
+class Command(BaseCommand):
+    help = (
+        "Bir nechta jarayon parallel ravishda test boshlab, natija yuboradi va "
+        "standart hamda sozlangan SQLite PRAGMA lari bilan o'tkazuvchanlikni solishtiradi. "
+        "Vaqtinchalik baza ishlatiladi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help="Parallel jarayonlar (gunicorn workerlari)")
+        parser.add_argument('--duration', type=float, default=5.0, help="Har bir rejim davomiyligi (soniya)")
+
+    def run(self, level, answers, workers, duration, conn_max_age):
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        queue = context.Queue()
+        deadline = time.monotonic() + duration
+        processes = [
+            context.Process(target=run_worker, args=(level.id, answers, deadline, conn_max_age, queue))
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        outcomes = [queue.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+        completed = sum(outcome[0] for outcome in outcomes)
+        errors = sum(outcome[1] for outcome in outcomes)
+        latencies = [latency for outcome in outcomes for latency in outcome[2]]
+        return completed, errors, latencies
+
+    def handle(self, *args, **options):
+        tmpdir = tempfile.mkdtemp(prefix='bench_sqlite_')
+        try:
+            connections.close_all()
+            connection.settings_dict['NAME'] = os.path.join(tmpdir, 'bench.sqlite3')
+            call_command('migrate', verbosity=0)
+            level = seed_level(200)
+            answers = [
+                {'question_id': question_id, 'answer_id': answer_id}
+                for answer_id, question_id in Answer.objects.filter(
+                    question__level=level, order=0
+                ).values_list('id', 'question_id')[:20]
+            ]
+
+            modes = (
+                ('standart', BASELINE_PRAGMAS, 0),
+                ('sozlangan', settings.SQLITE_PRAGMAS, settings.DATABASES['default']['CONN_MAX_AGE']),
+            )
+            for name, pragmas, conn_max_age in modes:
+                with override_settings(SQLITE_PRAGMAS=pragmas, TELEGRAM_OUTBOX_THREAD=False, RATE_LIMITS={}):
+                    completed, errors, latencies = self.run(
+                        level, answers, options['workers'], options['duration'], conn_max_age
+                    )
+                timing = summarize(latencies) if latencies else {'p50': 0, 'p95': 0}
+                self.stdout.write(
+                    f"{name:>10}: {completed / options['duration']:.1f} test/s, "
+                    f"xatolar={errors}, p50={timing['p50']:.1f}ms p95={timing['p95']:.1f}ms"
+                )
+        finally:
+            connections.close_all()
+            shutil.rmtree(tmpdir, ignore_errors=True)
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from test_app.images import refresh_question_derivatives
+from test_app.models import Question
+from test_app.snapshots import snapshot_store
+
+
+class Command(BaseCommand):
+    help = "Mavjud savol rasmlari uchun WebP/JPEG kichraytirilgan nusxalarni yaratadi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Nusxasi bor savollarni ham qayta ishlash")
+
+    def handle(self, *args, **options):
+        questions = Question.objects.exclude(image='').exclude(image__isnull=True).order_by('id')
+        if not options['force']:
+            questions = questions.filter(image_derivatives__isnull=True)
+
+        started = time.perf_counter()
+        done = failed = 0
+        original_bytes = derived_bytes = 0
+        for question in questions.iterator():
+            derivatives = refresh_question_derivatives(question)
+            if not derivatives:
+                failed += 1
+                continue
+            done += 1
+            storage = question.image.storage
+            original_bytes += storage.size(question.image.name)
+            # Telefon uchun odatiy nusxa: 640px gacha WebP
+            derived_bytes += storage.size(derivatives['webp'][min(1, len(derivatives['webp']) - 1)][1])
+
+        # update() signal yubormaydi
+        snapshot_store.invalidate()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{done} ta rasm qayta ishlandi, {failed} ta xatolik ({elapsed:.1f}s)"
+        ))
+        if done:
+            self.stdout.write(
+                f"asl rasmlar: {original_bytes // 1024} KB, 640px WebP nusxalar: {derived_bytes // 1024} KB"
+            )
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from test_app.analytics import is_flagged, item_statistics
+from test_app.models import Level, Question
+from test_app.snapshots import snapshot_store
+
+
+class Command(BaseCommand):
+    help = (
+        "Savollarning qiyinligi va ajratish ko'rsatkichini chiqaradi, chegaradan "
+        "tashqaridagilarni belgilaydi (--deactivate bilan ularni o'chiradi)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--level', help="Faqat shu daraja (code) savollari")
+        parser.add_argument('--min-responses', type=int, default=30, help="Tahlil uchun kamida shuncha javob")
+        parser.add_argument('--flagged', action='store_true', help="Faqat belgilangan savollarni chiqarish")
+        parser.add_argument('--deactivate', action='store_true', help="Belgilangan savollarni nofaol qilish")
+
+    def handle(self, *args, **options):
+        level = None
+        if options['level']:
+            try:
+                level = Level.objects.get(code=options['level'])
+            except Level.DoesNotExist:
+                raise CommandError(f"Daraja topilmadi: {options['level']}")
+
+        items = item_statistics(level, min_responses=options['min_responses'])
+        flagged = [item for item in items if is_flagged(item)]
+
+        self.stdout.write(f"{'savol':>7} {'javoblar':>9} {'qiyinlik':>9} {'ajratish':>9}  matn")
+        for item in (flagged if options['flagged'] else items):
+            discrimination = item['discrimination']
+            self.stdout.write(
+                f"{item['question_id']:>7} {item['responses']:>9} {item['difficulty']:>9.3f} "
+                f"{'-' if discrimination is None else f'{discrimination:.3f}':>9}"
+                f"{' *' if is_flagged(item) else '  '}{item['question_text'][:50]}"
+            )
+        self.stdout.write(f"{len(items)} ta savol, {len(flagged)} tasi belgilandi (*)")
+
+        if options['deactivate'] and flagged:
+            questions = Question.objects.filter(id__in=[item['question_id'] for item in flagged])
+            level_ids = set(questions.values_list('level_id', flat=True))
+            updated = questions.update(is_active=False)
+            # update() signal yubormaydi
+            for level_id in level_ids:
+                snapshot_store.invalidate(level_id)
+            self.stdout.write(self.style.SUCCESS(f"{updated} ta savol nofaol qilindi"))
@@ -0,0 +1,72 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Max
+
+from test_app.models import Level, Question
+from test_app.question_bank import (
+    FORMATS, QuestionBankError, detect_format, export_records, import_questions,
+    read_records, write_records,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Savollar bankini JSON/NDJSON/CSV fayldan import qiladi yoki faylga eksport qiladi. "
+        "Daraja Level.code bo'yicha topiladi; '-' - stdin/stdout."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=('import', 'export'))
+        parser.add_argument('path', help="Fayl yo'li yoki '-'")
+        parser.add_argument('--format', choices=FORMATS, help="Standart: fayl kengaytmasidan")
+        parser.add_argument('--level', action='append', help="Eksport: faqat shu daraja(lar) (code)")
+        parser.add_argument('--batch', type=int, default=2000, help="bulk_create partiyasi")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            fmt = options['format'] or (detect_format(path) if path != '-' else None)
+        except QuestionBankError as e:
+            raise CommandError(str(e))
+        if fmt is None:
+            raise CommandError("stdin/stdout uchun --format talab qilinadi")
+
+        started = time.perf_counter()
+        try:
+            if options['action'] == 'import':
+                stream = sys.stdin if path == '-' else open(path, encoding='utf-8', newline='')
+                try:
+                    questions, answers = import_questions(read_records(stream, fmt), options['batch'])
+                finally:
+                    if stream is not sys.stdin:
+                        stream.close()
+                summary = f"{questions} ta savol, {answers} ta javob import qilindi"
+            else:
+                queryset = Question.objects.all()
+                if options['level']:
+                    levels = list(Level.objects.filter(code__in=options['level']))
+                    missing = set(options['level']) - {level.code for level in levels}
+                    if missing:
+                        raise CommandError(f"Daraja topilmadi: {', '.join(sorted(missing))}")
+                    queryset = queryset.filter(level__in=levels)
+                # CSV ustunlari eng ko'p javobli savolga qarab
+                answer_columns = queryset.annotate(n=Count('answers')).aggregate(m=Max('n'))['m'] or 0
+                stream = self.stdout if path == '-' else open(path, 'w', encoding='utf-8', newline='')
+                try:
+                    count = write_records(
+                        export_records(queryset, options['batch']), stream, fmt,
+                        answer_columns=max(answer_columns, 4)
+                    )
+                finally:
+                    if stream is not self.stdout:
+                        stream.close()
+                summary = f"{count} ta savol eksport qilindi"
+        except (QuestionBankError, ValueError, KeyError) as e:
+            raise CommandError(f"{options['action']} xatoligi: {e}")
+
+        elapsed = time.perf_counter() - started
+        # stdout ga eksportda xulosa stderr ga
+        out = self.stderr if path == '-' else self.stdout
+        out.write(self.style.SUCCESS(f"{summary} ({elapsed:.2f}s)"))
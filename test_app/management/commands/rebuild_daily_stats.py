@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from test_app.stats import rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = "Kunlik yig'ma statistikani (DailyLevelStat) barcha natijalardan qayta quradi"
+
+    def handle(self, *args, **options):
+        rows = rebuild_daily_stats()
+        self.stdout.write(self.style.SUCCESS(f"{rows} ta kunlik statistika qatori yaratildi"))
@@ -0,0 +1,82 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from test_app.grading import count_correct, load_answer_key, score_for
+from test_app.models import Level, TestResult
+from test_app.stats import invalidate_statistics, rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Javoblar kaliti tuzatilgandan keyin yakunlangan testlarni sessiya "
+        "manifesti (question_ids / answer_ids) bo'yicha qayta baholaydi"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--level', help="Faqat shu daraja (code) natijalari")
+        parser.add_argument('--batch', type=int, default=2000, help="Bir partiyadagi natijalar soni")
+        parser.add_argument('--dry-run', action='store_true', help="O'zgarishlarni saqlamasdan faqat sanash")
+
+    def handle(self, *args, **options):
+        results = TestResult.objects.filter(
+            session__question_ids__isnull=False,
+            session__answer_ids__isnull=False,
+        )
+        if options['level']:
+            try:
+                level = Level.objects.get(code=options['level'])
+            except Level.DoesNotExist:
+                raise CommandError(f"Daraja topilmadi: {options['level']}")
+            results = results.filter(session__level=level)
+
+        started = time.perf_counter()
+        checked = changed = 0
+        last_id = 0
+        while True:
+            # Kursor (id) bo'yicha partiyalar: OFFSET siz, har biri bitta so'rov
+            batch = list(results.filter(id__gt=last_id).order_by('id').values_list(
+                'id', 'correct_answers', 'total_questions', 'score',
+                'session__question_ids', 'session__answer_ids'
+            )[:options['batch']])
+            if not batch:
+                break
+            last_id = batch[-1][0]
+            checked += len(batch)
+
+            # Partiyadagi barcha tanlangan javoblar uchun bitta so'rov
+            answer_key = load_answer_key({
+                answer_id
+                for *_, answer_ids in batch
+                for answer_id in answer_ids
+                if answer_id is not None
+            })
+            updates = []
+            for result_id, old_correct, old_total, old_score, question_ids, answer_ids in batch:
+                correct = count_correct(question_ids, answer_ids, answer_key)
+                total = len(question_ids)
+                score = score_for(correct, total)
+                if (correct, total, score) != (old_correct, old_total, old_score):
+                    updates.append(TestResult(
+                        id=result_id, correct_answers=correct, total_questions=total, score=score
+                    ))
+            changed += len(updates)
+            if updates and not options['dry_run']:
+                # Har bir partiya alohida tranzaksiya: SQLite yozish qulfi butun
+                # qayta baholash davomida ushlanmaydi va test yuborish kutib qolmaydi
+                with transaction.atomic():
+                    TestResult.objects.bulk_update(
+                        updates, ['correct_answers', 'total_questions', 'score']
+                    )
+
+        if changed and not options['dry_run']:
+            # bulk_update signal yubormaydi: yig'ma statistika qayta quriladi
+            rebuild_daily_stats()
+            invalidate_statistics()
+
+        elapsed = time.perf_counter() - started
+        verb = "o'zgaradi" if options['dry_run'] else "yangilandi"
+        self.stdout.write(self.style.SUCCESS(
+            f"{checked} ta natija tekshirildi, {changed} tasi {verb} ({elapsed:.2f}s)"
+        ))
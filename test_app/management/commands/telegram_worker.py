@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from test_app.outbox import POLL_INTERVAL, deliver_pending
+
+
+class Command(BaseCommand):
+    help = "Navbatdagi Telegram xabarlarini yuboradi (outbox worker)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Bir marta yuborib to'xtash")
+        parser.add_argument('--interval', type=float, default=POLL_INTERVAL, help="Tekshirish oralig'i (soniya)")
+        parser.add_argument('--batch', type=int, default=50)
+
+    def handle(self, *args, **options):
+        while True:
+            sent = deliver_pending(options['batch'])
+            if sent:
+                self.stdout.write(f"{sent} ta xabar yuborildi")
+            if options['once']:
+                break
+            if not sent:
+                close_old_connections()
+                time.sleep(options['interval'])
@@ -0,0 +1,149 @@
+# test_app/media.py
+"""
+Yuklangan media fayllarni (savol rasmlari) DEBUG siz, gunicorn ning o'zida
+berish.
+
+- Nomi tarkib xeshidan olingan fayllar (``questions/<xesh>.jpg``,
+  ``questions/derived/<xesh>-<kenglik>.webp``) hech qachon o'zgarmaydi, shuning
+  uchun ``Cache-Control: immutable`` bilan bir yilga keshlanadi;
+- boshqa (eski nomli) fayllar qisqa muddat keshlanadi va ETag/Last-Modified
+  bilan qayta tekshiriladi (304);
+- ``Range: bytes=..`` so'rovlariga 206 qaytariladi;
+- fayl yonida ``.br`` / ``.gz`` nusxa bo'lsa va mijoz qabul qilsa, o'sha
+  yuboriladi.
+"""
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+MUTABLE_MAX_AGE = 60 * 60
+# <16 ta hex>[-kenglik][_storage qo'shimchasi].<kengaytma>
+HASHED_NAME_RE = re.compile(r'(^|/)[0-9a-f]{16}(-\d+)?(_[A-Za-z0-9]{7})?\.[A-Za-z0-9]+$')
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+# Afzallik tartibida
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+
+
+def is_immutable(path):
+    return bool(HASHED_NAME_RE.search(path))
+
+
+def parse_range(header, size):
+    """
+    Bitta oraliqli ``Range`` sarlavhasini ``(boshi, oxiri)`` ga aylantiradi.
+    Qo'llanmaydigan sarlavha uchun ``None``, qanoatlantirib bo'lmaydigan
+    oraliq uchun ``ValueError``.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        # bytes=-N: oxirgi N bayt
+        length = int(end)
+        if length == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+class RangeFile:
+    """
+    Fayldan faqat ``[boshi, oxiri]`` oralig'ini o'qiydigan o'rovchi:
+    ``FileResponse`` uni bloklab uzatadi, oraliq xotiraga to'liq o'qilmaydi.
+    """
+
+    def __init__(self, file, start, end):
+        file.seek(start)
+        self.file = file
+        self.remaining = end - start + 1
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def select_encoding(request, fullpath):
+    """Mijoz qabul qiladigan oldindan siqilgan nusxa: ``(kodlash, yo'l)`` yoki ``None``"""
+    accepted = request.headers.get('Accept-Encoding', '')
+    for encoding, suffix in PRECOMPRESSED:
+        if encoding in accepted and os.path.isfile(fullpath + suffix):
+            return encoding, fullpath + suffix
+    return None
+
+
+def has_variants(fullpath):
+    return any(os.path.isfile(fullpath + suffix) for _, suffix in PRECOMPRESSED)
+
+
+def serve_media(request, path):
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("Fayl topilmadi")
+    if not os.path.isfile(fullpath):
+        raise Http404("Fayl topilmadi")
+
+    content_type = mimetypes.guess_type(fullpath)[0] or 'application/octet-stream'
+    range_header = request.headers.get('Range')
+
+    # Qism so'ralganda siqilmagan fayl beriladi: baytlar o'rni asl faylga tegishli
+    encoded = None if range_header else select_encoding(request, fullpath)
+    encoding, filepath = encoded or (None, fullpath)
+    stat = os.stat(filepath)
+    etag = '"%x-%x%s"' % (int(stat.st_mtime), stat.st_size, f"-{encoding}" if encoding else '')
+
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        byte_range = None
+        if range_header and request.headers.get('If-Range', etag) == etag:
+            try:
+                byte_range = parse_range(range_header, stat.st_size)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response.headers['Content-Range'] = f"bytes */{stat.st_size}"
+                return response
+
+        if byte_range:
+            start, end = byte_range
+            response = FileResponse(
+                RangeFile(open(filepath, 'rb'), start, end), status=206, content_type=content_type
+            )
+            response.headers['Content-Length'] = end - start + 1
+            response.headers['Content-Range'] = f"bytes {start}-{end}/{stat.st_size}"
+        else:
+            response = FileResponse(open(filepath, 'rb'), content_type=content_type)
+            response.headers['Content-Length'] = stat.st_size
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+
+    response.headers['ETag'] = etag
+    response.headers['Last-Modified'] = http_date(stat.st_mtime)
+    response.headers['Accept-Ranges'] = 'bytes'
+    if is_immutable(path):
+        response.headers['Cache-Control'] = f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+    else:
+        response.headers['Cache-Control'] = f"public, max-age={MUTABLE_MAX_AGE}"
+    if encoding or has_variants(fullpath):
+        patch_vary_headers(response, ('Accept-Encoding',))
+    return response
@@ -0,0 +1,293 @@
+# test_app/metrics.py
+"""
+So'rovlar bo'yicha o'lchovlar va namunaviy profillash.
+
+``MetricsMiddleware`` har bir so'rov uchun view nomi bo'yicha quyidagilarni
+yig'adi: umumiy vaqt, SQL so'rovlar soni va vaqti, tashqi HTTP (Telegram)
+so'rovlari vaqti. Natijalar ``/metrics/`` da Prometheus matn formatida
+beriladi, ``METRICS_SLOW_REQUEST_MS`` dan sekin so'rovlar esa bitta
+``key=value`` log qatori bilan yoziladi.
+
+SQL so'rovlar har bir ulanishga o'rnatiladigan ``execute_wrapper`` orqali,
+joriy so'rov ``ContextVar`` da saqlanadi: ``sync_to_async`` kontekstni
+oqimga o'tkazgani uchun async view lar ham hisoblanadi. Fon oqimlaridagi
+so'rovlar (outbox) biror so'rovga yozilmaydi, tashqi HTTP esa umumiy
+hisoblagichga baribir qo'shiladi.
+
+``METRICS_PROFILE_SAMPLE_RATE`` > 0 bo'lsa so'rovlarning shu ulushi cProfile
+ostida bajariladi va eng sekin ``METRICS_PROFILE_KEEP`` tasi
+``METRICS_PROFILE_DIR`` ga ``.prof`` fayl sifatida saqlanadi
+(``python -m pstats <fayl>`` yoki snakeviz bilan ochiladi).
+
+O'lchovlar jarayon ichida saqlanadi: har bir gunicorn worker o'z qiymatlarini
+beradi.
+"""
+import cProfile
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+
+from .caching import render_metrics as render_cache_metrics
+from .logs import render_metrics as render_log_metrics
+from .throttling import client_ip
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PROFILE_NAME_RE = re.compile(r'^(\d+\.\d)ms-')
+
+current_request = ContextVar('current_request_stats', default=None)
+# Bitta oqimda bir vaqtda faqat bitta cProfile ishlashi mumkin (async so'rovlar bitta oqimda)
+_profiling = threading.local()
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_time', 'outbound', 'outbound_time')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.outbound = 0
+        self.outbound_time = 0.0
+
+
+class Histogram:
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """View bo'yicha yig'ilgan qiymatlar (oqimlar uchun xavfsiz)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.durations = defaultdict(Histogram)
+            self.responses = defaultdict(int)       # (view, status) -> soni
+            self.queries = defaultdict(int)
+            self.db_time = defaultdict(float)
+            self.request_outbound_time = defaultdict(float)
+            self.outbound = defaultdict(int)        # servis -> soni
+            self.outbound_time = defaultdict(float)
+            self.outbound_errors = defaultdict(int)
+
+    def record_request(self, view, status, duration, stats):
+        with self._lock:
+            self.durations[view].observe(duration)
+            self.responses[(view, status)] += 1
+            self.queries[view] += stats.queries
+            self.db_time[view] += stats.db_time
+            self.request_outbound_time[view] += stats.outbound_time
+
+    def record_outbound(self, service, duration, ok=True):
+        with self._lock:
+            self.outbound[service] += 1
+            self.outbound_time[service] += duration
+            if not ok:
+                self.outbound_errors[service] += 1
+
+    def render(self):
+        """Prometheus matn formati (0.0.4)"""
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            family('http_request_duration_seconds', 'histogram', "So'rovni bajarish vaqti")
+            for view, histogram in sorted(self.durations.items()):
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    lines.append(f'http_request_duration_seconds_bucket{{view="{view}",le="{bound}"}} {count}')
+                lines.append(f'http_request_duration_seconds_bucket{{view="{view}",le="+Inf"}} {histogram.count}')
+                lines.append(f'http_request_duration_seconds_sum{{view="{view}"}} {histogram.total:.6f}')
+                lines.append(f'http_request_duration_seconds_count{{view="{view}"}} {histogram.count}')
+
+            family('http_responses_total', 'counter', "Javoblar soni (status bo'yicha)")
+            for (view, status), count in sorted(self.responses.items()):
+                lines.append(f'http_responses_total{{view="{view}",status="{status}"}} {count}')
+
+            per_view = (
+                ('db_queries_total', self.queries, "So'rovlar davomidagi SQL so'rovlar", '{}'),
+                ('db_query_duration_seconds_total', self.db_time, "SQL so'rovlar vaqti", '{:.6f}'),
+                ('http_request_outbound_seconds_total', self.request_outbound_time,
+                 "So'rov ichidagi tashqi HTTP vaqti", '{:.6f}'),
+            )
+            for name, values, help_text, fmt in per_view:
+                family(name, 'counter', help_text)
+                for view, value in sorted(values.items()):
+                    lines.append(f'{name}{{view="{view}"}} {fmt.format(value)}')
+
+            per_service = (
+                ('outbound_requests_total', self.outbound, "Tashqi HTTP so'rovlar", '{}'),
+                ('outbound_request_errors_total', self.outbound_errors, "Muvaffaqiyatsiz tashqi so'rovlar", '{}'),
+                ('outbound_request_duration_seconds_total', self.outbound_time, "Tashqi HTTP vaqti", '{:.6f}'),
+            )
+            for name, values, help_text, fmt in per_service:
+                family(name, 'counter', help_text)
+                for service, value in sorted(values.items()):
+                    lines.append(f'{name}{{service="{service}"}} {fmt.format(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+def observe_query(execute, sql, params, many, context):
+    stats = current_request.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - started
+
+
+@receiver(connection_created)
+def install_query_observer(sender, connection, **kwargs):
+    # execute_wrappers ulanish yopilganda tozalanmaydi - ikki marta qo'shilmasin
+    if observe_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(observe_query)
+
+
+def record_outbound(service, duration, ok=True):
+    """Tashqi HTTP so'rov vaqtini umumiy va (bo'lsa) joriy so'rov hisobiga yozadi"""
+    registry.record_outbound(service, duration, ok)
+    stats = current_request.get()
+    if stats is not None:
+        stats.outbound += 1
+        stats.outbound_time += duration
+
+
+def view_label(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.url_name or match.view_name or 'unnamed'
+
+
+def keep_profile(profile, duration, view):
+    """Profilni saqlaydi, eng sekin ``METRICS_PROFILE_KEEP`` tasidan boshqasini o'chiradi"""
+    directory = settings.METRICS_PROFILE_DIR
+    keep = settings.METRICS_PROFILE_KEEP
+    os.makedirs(directory, exist_ok=True)
+    existing = sorted(
+        (float(match.group(1)), name)
+        for name in os.listdir(directory)
+        if (match := PROFILE_NAME_RE.match(name))
+    )
+    duration_ms = duration * 1000
+    if len(existing) >= keep and duration_ms <= existing[0][0]:
+        return None
+    path = os.path.join(directory, f"{duration_ms:09.1f}ms-{view}-{int(time.time())}.prof")
+    profile.dump_stats(path)
+    for _, name in existing[:max(0, len(existing) + 1 - keep)]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError:
+            pass
+    return path
+
+
+class MetricsMiddleware:
+    """So'rov vaqti, SQL va tashqi HTTP o'lchovlari, namunaviy cProfile"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats, token, profile, started = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_request.reset(token)
+        self.finish(request, response, stats, profile, started)
+        return response
+
+    async def __acall__(self, request):
+        stats, token, profile, started = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_request.reset(token)
+        self.finish(request, response, stats, profile, started)
+        return response
+
+    def start(self):
+        stats = RequestStats()
+        token = current_request.set(stats)
+        profile = None
+        if random.random() < settings.METRICS_PROFILE_SAMPLE_RATE and not getattr(_profiling, 'active', False):
+            _profiling.active = True
+            profile = cProfile.Profile()
+            profile.enable()
+        return stats, token, profile, time.perf_counter()
+
+    def finish(self, request, response, stats, profile, started):
+        duration = time.perf_counter() - started
+        view = view_label(request)
+        if profile is not None:
+            profile.disable()
+            _profiling.active = False
+            try:
+                keep_profile(profile, duration, view)
+            except Exception as e:
+                logger.error(f"Profilni saqlashda xatolik: {e}")
+        registry.record_request(view, response.status_code, duration, stats)
+        if duration * 1000 >= settings.METRICS_SLOW_REQUEST_MS:
+            logger.warning(
+                f"Sekin so'rov: view={view} method={request.method} status={response.status_code} "
+                f"ms={duration * 1000:.1f} queries={stats.queries} db_ms={stats.db_time * 1000:.1f} "
+                f"outbound={stats.outbound} outbound_ms={stats.outbound_time * 1000:.1f}"
+            )
+
+
+def metrics_view(request):
+    """
+    Prometheus uchun o'lchovlar. Faqat token, staff yoki ``METRICS_ALLOWED_IPS``
+    uchun (IP proksi ortida ``throttling.client_ip`` bilan aniqlanadi)
+    """
+    token = settings.METRICS_TOKEN
+    allowed = (
+        (token and request.headers.get('Authorization') == f"Bearer {token}")
+        or (request.user.is_authenticated and request.user.is_staff)
+        or (settings.METRICS_ALLOWED_IPS and client_ip(request) in settings.METRICS_ALLOWED_IPS)
+    )
+    if not allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(
+        registry.render() + render_cache_metrics() + render_log_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
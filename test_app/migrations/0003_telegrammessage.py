@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_app', '0002_rename_sent_to_telegram_testresult_admin_notified_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TelegramMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('admin_notification', 'Admin: yangi test'), ('admin_result', 'Admin: natija'), ('user_result', 'Foydalanuvchi: natija')], max_length=20)),
+                ('chat_id', models.CharField(max_length=50)),
+                ('text', models.TextField()),
+                ('status', models.CharField(choices=[('pending', 'Kutilmoqda'), ('sent', 'Yuborildi'), ('failed', 'Xatolik')], default='pending', max_length=10)),
+                ('attempts', models.IntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('result', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='telegram_messages', to='test_app.testresult')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='test_app_te_status_41e112_idx')],
+            },
+        ),
+    ]
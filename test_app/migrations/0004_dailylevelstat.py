@@ -0,0 +1,78 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:05
+
+from django.db import migrations, models
+from django.db.models import Count, FloatField, Sum
+from django.db.models.functions import Cast, TruncDate
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def backfill_daily_stats(apps, schema_editor):
+    # stats.collect_daily_stats bilan bir xil hisob, lekin faqat tarixiy
+    # modellar bilan: keyinchalik stats.py o'zgarsa ham migratsiya o'zgarmaydi
+    TestSession = apps.get_model('test_app', 'TestSession')
+    TestResult = apps.get_model('test_app', 'TestResult')
+    DailyLevelStat = apps.get_model('test_app', 'DailyLevelStat')
+    tz = timezone.get_current_timezone()
+    rows = {}
+
+    def row(level_id, day):
+        key = (level_id, day)
+        if key not in rows:
+            rows[key] = DailyLevelStat(level_id=level_id, date=day)
+        return rows[key]
+
+    started = TestSession.objects.order_by().annotate(
+        day=TruncDate('start_time', tzinfo=tz)
+    ).values('level', 'day').annotate(started=Count('id'))
+    for item in started.iterator():
+        row(item['level'], item['day']).started = item['started']
+
+    score = Cast('score', FloatField())
+    results = TestResult.objects.order_by().annotate(
+        day=TruncDate('created_at', tzinfo=tz)
+    ).values('session__level', 'day').annotate(
+        count=Count('id'),
+        score_sum=Sum(score),
+        score_sq_sum=Sum(score * score),
+        time_sum=Sum('time_taken')
+    )
+    for item in results.iterator():
+        stat = row(item['session__level'], item['day'])
+        stat.count = item['count']
+        stat.score_sum = item['score_sum'] or 0
+        stat.score_sq_sum = item['score_sq_sum'] or 0
+        stat.time_sum = item['time_sum'] or 0
+
+    DailyLevelStat.objects.bulk_create(rows.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_app', '0003_telegrammessage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyLevelStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('started', models.IntegerField(default=0)),
+                ('count', models.IntegerField(default=0)),
+                ('score_sum', models.FloatField(default=0)),
+                ('score_sq_sum', models.FloatField(default=0)),
+                ('time_sum', models.BigIntegerField(default=0, help_text='Soniyalar bilan')),
+                ('level', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='daily_stats', to='test_app.level')),
+            ],
+            options={
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailylevelstat',
+            constraint=models.UniqueConstraint(fields=('level', 'date'), name='unique_daily_level_stat'),
+        ),
+        migrations.RunPython(backfill_daily_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_app', '0004_dailylevelstat'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['level', 'is_active', 'id'], name='question_level_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testresult',
+            index=models.Index(fields=['created_at', 'id'], name='result_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testsession',
+            index=models.Index(fields=['level', 'completed'], name='session_level_completed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testsession',
+            index=models.Index(fields=['start_time'], name='session_start_time_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_app', '0005_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='testsession',
+            name='answer_ids',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='testsession',
+            name='question_ids',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_app', '0006_session_manifest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionResponse',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('answer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='test_app.answer')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='responses', to='test_app.question')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='responses', to='test_app.testsession')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['question', 'answer'], name='response_question_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='questionresponse',
+            constraint=models.UniqueConstraint(fields=('session', 'question'), name='unique_session_question_response'),
+        ),
+    ]
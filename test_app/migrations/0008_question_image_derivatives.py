@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_app', '0007_questionresponse'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='image_derivatives',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:22
+
+from django.db import migrations, models
+import test_app.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_app', '0008_question_image_derivatives'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='question',
+            name='image',
+            field=models.ImageField(blank=True, null=True, upload_to=test_app.models.question_image_path),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_app', '0009_content_addressed_question_images'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='testsession',
+            index=models.Index(fields=['last_name', 'first_name'], name='session_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testsession',
+            index=models.Index(fields=['phone_number'], name='session_phone_idx'),
+        ),
+    ]
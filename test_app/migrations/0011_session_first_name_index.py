@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_app', '0010_admin_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='testsession',
+            index=models.Index(fields=['first_name'], name='session_first_name_idx'),
+        ),
+    ]
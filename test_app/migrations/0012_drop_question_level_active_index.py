@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:09
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_app', '0011_session_first_name_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='question',
+            name='question_level_active_idx',
+        ),
+    ]
@@ -1,5 +1,9 @@
+import hashlib
+import os
+
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 
 class Level(models.Model):
     LEVEL_CHOICES = [
@@ -34,15 +38,40 @@ class TestSession(models.Model):
     start_time = models.DateTimeField(auto_now_add=True)
     end_time = models.DateTimeField(null=True, blank=True)
     completed = models.BooleanField(default=False)
+    # Foydalanuvchiga berilgan savollar (tartibi bilan) va har biriga tanlangan
+    # javob (yoki null) - baholash va qayta baholash shu ro'yxatlar bo'yicha
+    question_ids = models.JSONField(null=True, blank=True)
+    answer_ids = models.JSONField(null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['level', 'completed'], name='session_level_completed_idx'),
+            models.Index(fields=['start_time'], name='session_start_time_idx'),
+            # Admin qidiruvi prefiks bo'yicha (admin.py: PrefixSearchMixin)
+            models.Index(fields=['last_name', 'first_name'], name='session_name_idx'),
+            # Ism bo'yicha oraliq uchun: familya yoki ism sharti (OR) ikkala indeksdan o'qiladi
+            models.Index(fields=['first_name'], name='session_first_name_idx'),
+            models.Index(fields=['phone_number'], name='session_phone_idx'),
+        ]
     
     def __str__(self):
         return f"{self.first_name} {self.last_name} - {self.session_id}"
 
+def question_image_path(instance, filename):
+    # Nom rasm tarkibining xeshidan: URL o'zgarmaydi va muddatsiz keshlanadi (media.py)
+    digest = hashlib.sha256()
+    for chunk in instance.image.chunks():
+        digest.update(chunk)
+    extension = os.path.splitext(filename)[1].lower()
+    return f"questions/{digest.hexdigest()[:16]}{extension}"
+
 class Question(models.Model):
     level = models.ForeignKey(Level, on_delete=models.CASCADE, related_name='questions')
     question_text = models.TextField()
     explanation = models.TextField(blank=True)
-    image = models.ImageField(upload_to='questions/', blank=True, null=True)  # ✅ Yangi: rasm
+    image = models.ImageField(upload_to=question_image_path, blank=True, null=True)  # ✅ Yangi: rasm
+    # Rasmning kichraytirilgan nusxalari: {format: [[kenglik, fayl nomi], ...]} (images.py)
+    image_derivatives = models.JSONField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=True)
     
@@ -61,6 +90,24 @@ class Answer(models.Model):
     def __str__(self):
         return self.answer_text
 
+class QuestionResponse(models.Model):
+    """Sessiyada berilgan savol va tanlangan javob (savollar tahlili uchun)"""
+    session = models.ForeignKey(TestSession, on_delete=models.CASCADE, related_name='responses')
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='responses')
+    answer = models.ForeignKey(Answer, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')  # javobsiz - null
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'question'], name='unique_session_question_response'),
+        ]
+        indexes = [
+            # Savollar tahlili: savol bo'yicha guruhlash
+            models.Index(fields=['question', 'answer'], name='response_question_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.session_id}: {self.question_id} -> {self.answer_id}"
+
 class TestResult(models.Model):
     session = models.OneToOneField(TestSession, on_delete=models.CASCADE, related_name='result')
     correct_answers = models.IntegerField(default=0)
@@ -73,6 +120,10 @@ class TestResult(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Natijalar ro'yxati va kursorli sahifalash (created_at, id)
+            models.Index(fields=['created_at', 'id'], name='result_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.session.first_name} {self.session.last_name}: {self.score}%"
@@ -80,4 +131,73 @@ class TestResult(models.Model):
     def get_time_taken_display(self):
         minutes = self.time_taken // 60
         seconds = self.time_taken % 60
-        return f"{minutes}:{seconds:02d}"
\ No newline at end of file
+        return f"{minutes}:{seconds:02d}"
+
+class TelegramMessage(models.Model):
+    """Telegramga yuborilishi kerak bo'lgan xabarlar navbati (outbox)"""
+    KIND_CHOICES = [
+        ('admin_notification', 'Admin: yangi test'),
+        ('admin_result', 'Admin: natija'),
+        ('user_result', 'Foydalanuvchi: natija'),
+    ]
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Kutilmoqda'),
+        (STATUS_SENT, 'Yuborildi'),
+        (STATUS_FAILED, 'Xatolik'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    chat_id = models.CharField(max_length=50)
+    text = models.TextField()
+    result = models.ForeignKey(
+        TestResult, on_delete=models.CASCADE, null=True, blank=True, related_name='telegram_messages'
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} -> {self.chat_id} ({self.status})"
+
+
+class DailyLevelStat(models.Model):
+    """Daraja va kun bo'yicha yig'ma statistika (submit_test da yangilanadi)"""
+    level = models.ForeignKey(Level, on_delete=models.SET_NULL, null=True, related_name='daily_stats')
+    date = models.DateField()
+    started = models.IntegerField(default=0)  # boshlangan testlar
+    count = models.IntegerField(default=0)  # yakunlangan testlar (natijalar)
+    score_sum = models.FloatField(default=0)
+    score_sq_sum = models.FloatField(default=0)
+    time_sum = models.BigIntegerField(default=0, help_text="Soniyalar bilan")
+
+    class Meta:
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['level', 'date'], name='unique_daily_level_stat'),
+        ]
+
+    def __str__(self):
+        return f"{self.level.name if self.level else '-'} {self.date}: {self.count}"
+
+    @property
+    def avg_score(self):
+        return self.score_sum / self.count if self.count else 0
+
+    @property
+    def score_stddev(self):
+        if not self.count:
+            return 0
+        variance = self.score_sq_sum / self.count - self.avg_score ** 2
+        return max(variance, 0) ** 0.5
@@ -0,0 +1,80 @@
+# test_app/notifications.py
+"""Telegram xabarlari matni. Xabarlar outbox orqali fonda yuboriladi"""
+from django.conf import settings
+
+from .outbox import enqueue
+
+
+def admin_chat_id():
+    return getattr(settings, 'ADMIN_TELEGRAM_ID', None)
+
+
+def session_started_message(session):
+    level = session.level
+    return (
+        "🎯 *Yangi test boshlandi!*\n\n"
+        f"👤 *Ism:* {session.first_name} {session.last_name}\n"
+        f"📞 *Telefon:* {session.phone_number or 'Noma lum'}\n"
+        f"📊 *Daraja:* {level.name}\n"
+        f"🆔 *Session ID:* `{session.session_id}`\n"
+        f"⏰ *Vaqt limiti:* {level.time_limit} daqiqa"
+    )
+
+
+def user_result_message(session, result):
+    message = (
+        "🎓 *IT House Test Natijasi*\n\n"
+        f"👤 *Ishtirokchi:* {session.first_name} {session.last_name}\n"
+        f"📊 *Daraja:* {session.level.name}\n"
+        f"⏰ *Sarflangan vaqt:* {result.get_time_taken_display()}\n\n"
+        f"📈 *Natija:*\n"
+        f"✅ To'g'ri javoblar: {result.correct_answers}/{result.total_questions}\n"
+        f"🏆 Foiz: {result.score}%\n\n"
+        f"🆔 *ID:* `{session.session_id}`\n"
+        f"📅 *Sana:* {result.created_at.strftime('%d.%m.%Y %H:%M')}\n"
+    )
+
+    if result.score >= 80:
+        message += "\n🎉 Ajoyib natija! Siz bu darajani mukammal egallagansiz!"
+    elif result.score >= 60:
+        message += "\n👍 Yaxshi natija! Biroz mashq qilsangiz yanada yaxshilashingiz mumkin."
+    else:
+        message += "\n💪 Qayta urinib ko'ring! Ko'proq mashq qilishingiz kerak."
+    return message
+
+
+def admin_result_message(session, result):
+    return (
+        "📊 *TEST YAKUNLANDI*\n\n"
+        f"👤 *Ishtirokchi:* {session.first_name} {session.last_name}\n"
+        f"📞 *Telefon:* {session.phone_number or 'Noma lum'}\n"
+        f"📚 *Daraja:* {session.level.name}\n"
+        f"⏱️ *Vaqt:* {result.get_time_taken_display()}\n\n"
+        f"📈 *NATIJALAR:*\n"
+        f"🎯 To'g'ri javoblar: {result.correct_answers}/{result.total_questions}\n"
+        f"🏆 Foiz: {result.score}%\n\n"
+        f"🆔 *Session ID:* `{session.session_id}`\n"
+        f"📅 *Yakunlangan vaqt:* {result.created_at.strftime('%d.%m.%Y %H:%M:%S')}"
+    )
+
+
+def notify_session_started(session):
+    """Adminga yangi test boshlanganligi haqida xabar"""
+    return enqueue('admin_notification', admin_chat_id(), session_started_message(session)) is not None
+
+
+def notify_result(session, result):
+    """
+    Natijani foydalanuvchiga va adminga navbatga qo'yadi.
+    ``(foydalanuvchiga, adminga)`` xabar navbatga qo'yilganini qaytaradi.
+    """
+    telegram_queued = False
+    if session.phone_number and session.phone_number.isdigit():
+        telegram_queued = enqueue(
+            'user_result', session.phone_number, user_result_message(session, result), result
+        ) is not None
+
+    admin_queued = enqueue(
+        'admin_result', admin_chat_id(), admin_result_message(session, result), result
+    ) is not None
+    return telegram_queued, admin_queued
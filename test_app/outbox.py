@@ -0,0 +1,238 @@
+# test_app/outbox.py
+"""
+Telegram xabarlarini fonda yetkazish.
+
+View lar xabarni ``TelegramMessage`` jadvaliga yozadi va darhol javob
+qaytaradi. Xabarlarni jarayon ichidagi fon oqimi (``TELEGRAM_OUTBOX_THREAD``)
+yoki ``manage.py telegram_worker`` buyrug'i yuboradi. Muvaffaqiyatsiz
+urinishlar eksponensial kechikish bilan qayta yuboriladi, xabar yetkazilgach
+``TestResult.telegram_sent`` / ``admin_notified`` belgilanadi.
+
+Bir nechta worker bir vaqtda ishlashi mumkin: xabar shartli UPDATE bilan
+"band qilinadi", shuning uchun u ikki marta yuborilmaydi. Imtihon paytida
+ko'plab "Yangi test boshlandi" xabarlari bitta digest xabarga birlashtiriladi.
+"""
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import TelegramMessage, TestResult
+from .telegram import MAX_MESSAGE_LENGTH, get_client
+
+logger = logging.getLogger(__name__)
+
+BACKOFF_BASE = 5          # soniya
+BACKOFF_MAX = 60 * 60
+# Band qilingan xabar shu vaqtdan keyin yana bo'shaydi. Band qilish har bir
+# yuborishdan oldin yangilanadi, shuning uchun u bitta so'rovdan (klient
+# timeouti 10 s) uzunroq bo'lishi kifoya, butun paketdan emas
+CLAIM_TIMEOUT = 60
+POLL_INTERVAL = 5
+
+# Shu turdagi xabarlar bitta digestga birlashtiriladi. Ular darhol emas,
+# DIGEST_DELAY soniyadan keyin yuboriladi - aks holda commit da uyg'onadigan
+# worker har bir xabarni alohida yuborib qo'yadi
+DIGEST_KINDS = {'admin_notification'}
+DIGEST_DELAY = 30
+DIGEST_SEPARATOR = "\n\n➖➖➖➖➖\n\n"
+
+# Yetkazilgan xabar turi -> TestResult dagi belgi
+RESULT_FLAGS = {
+    'user_result': 'telegram_sent',
+    'admin_result': 'admin_notified',
+}
+
+
+def enqueue(kind, chat_id, text, result=None):
+    """Xabarni navbatga qo'yadi. Bot sozlanmagan bo'lsa ``None`` qaytaradi"""
+    if not settings.TELEGRAM_BOT_TOKEN or not chat_id:
+        return None
+    message = TelegramMessage(kind=kind, chat_id=str(chat_id), text=text, result=result)
+    if kind in DIGEST_KINDS:
+        message.next_attempt_at = digest_due(message.chat_id)
+    message.save()
+    transaction.on_commit(worker.wake)
+    return message
+
+
+def digest_due(chat_id):
+    """
+    Digest xabarining yuborilish vaqti: shu chat uchun kutayotgan digest
+    bo'lsa, unga qo'shiladi, aks holda yangi oyna ochiladi.
+    """
+    now = timezone.now()
+    window_end = now + timedelta(seconds=DIGEST_DELAY)
+    pending = TelegramMessage.objects.filter(
+        kind__in=DIGEST_KINDS,
+        chat_id=chat_id,
+        status=TelegramMessage.STATUS_PENDING,
+        attempts=0,
+        next_attempt_at__gt=now,
+        next_attempt_at__lte=window_end
+    ).order_by('next_attempt_at').values_list('next_attempt_at', flat=True).first()
+    return pending or window_end
+
+
+def backoff(attempts):
+    return timedelta(seconds=min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempts - 1)))
+
+
+def claim_due(limit=50):
+    """Vaqti kelgan xabarlarni band qiladi va ularni qaytaradi"""
+    now = timezone.now()
+    due = TelegramMessage.objects.filter(
+        status=TelegramMessage.STATUS_PENDING,
+        next_attempt_at__lte=now
+    ).order_by('next_attempt_at', 'id').values_list('id', 'next_attempt_at')[:limit]
+
+    claimed = []
+    for pk, next_attempt_at in due:
+        updated = TelegramMessage.objects.filter(
+            pk=pk,
+            status=TelegramMessage.STATUS_PENDING,
+            next_attempt_at=next_attempt_at
+        ).update(next_attempt_at=now + timedelta(seconds=CLAIM_TIMEOUT))
+        if updated:
+            claimed.append(pk)
+    return list(TelegramMessage.objects.filter(pk__in=claimed).order_by('id'))
+
+
+def renew_claim(messages):
+    """
+    Yuborishdan oldin band qilishni uzaytiradi. Band qilish muddati o'tib,
+    xabarni boshqa worker olib ulgurgan bo'lsa, u ro'yxatdan chiqariladi.
+    """
+    owned = []
+    claimed_until = timezone.now() + timedelta(seconds=CLAIM_TIMEOUT)
+    for message in messages:
+        updated = TelegramMessage.objects.filter(
+            pk=message.pk,
+            status=TelegramMessage.STATUS_PENDING,
+            next_attempt_at=message.next_attempt_at
+        ).update(next_attempt_at=claimed_until)
+        if updated:
+            message.next_attempt_at = claimed_until
+            owned.append(message)
+    return owned
+
+
+def digest_text(messages):
+    return f"🗂 *{len(messages)} ta yangi test boshlandi*\n\n" + DIGEST_SEPARATOR.join(
+        message.text for message in messages
+    )
+
+
+def coalesce(messages):
+    """
+    Bir chatga ketadigan "yangi test" xabarlarini digestlarga birlashtiradi,
+    qolgan xabarlar alohida yuboriladi. Har bir guruh bitta so'rov bo'ladi.
+    """
+    batches = []
+    digests = {}
+    for message in messages:
+        if message.kind not in DIGEST_KINDS:
+            batches.append([message])
+            continue
+        batch = digests.get(message.chat_id)
+        if batch is None or len(digest_text(batch + [message])) > MAX_MESSAGE_LENGTH:
+            batch = digests[message.chat_id] = [message]
+            batches.append(batch)
+        else:
+            batch.append(message)
+    return batches
+
+
+def deliver(batch, client):
+    text = batch[0].text if len(batch) == 1 else digest_text(batch)
+    result = client.send_message(batch[0].chat_id, text)
+    now = timezone.now()
+    for message in batch:
+        message.attempts += 1
+        if result.ok:
+            message.status = TelegramMessage.STATUS_SENT
+            message.sent_at = now
+            message.last_error = ''
+        else:
+            message.last_error = result.error
+            if result.retryable and message.attempts < settings.TELEGRAM_OUTBOX_MAX_ATTEMPTS:
+                delay = max(backoff(message.attempts), timedelta(seconds=result.retry_after))
+                message.next_attempt_at = now + delay
+            else:
+                message.status = TelegramMessage.STATUS_FAILED
+        message.save(update_fields=['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at'])
+
+        flag = RESULT_FLAGS.get(message.kind)
+        if result.ok and flag and message.result_id:
+            TestResult.objects.filter(pk=message.result_id).update(**{flag: True})
+
+    if not result.ok:
+        ids = ', '.join(f"#{message.pk}" for message in batch)
+        logger.warning(f"Telegram xabari yuborilmadi ({ids}): {result.error}")
+    return len(batch) if result.ok else 0
+
+
+def deliver_pending(limit=50):
+    """Navbatdagi xabarlarni yuboradi, yuborilganlar sonini qaytaradi"""
+    client = get_client()
+    sent = 0
+    batches = coalesce(claim_due(limit))
+    for index, batch in enumerate(batches):
+        wait = client.retry_after()
+        if wait:
+            # Telegram 429 qaytardi - qolgan xabarlarni urinish sanamasdan keyinga suramiz
+            for message in renew_claim([message for pending in batches[index:] for message in pending]):
+                TelegramMessage.objects.filter(
+                    pk=message.pk, next_attempt_at=message.next_attempt_at
+                ).update(next_attempt_at=timezone.now() + timedelta(seconds=wait))
+            break
+        batch = renew_claim(batch)
+        if batch:
+            sent += deliver(batch, client)
+    return sent
+
+
+class OutboxWorker:
+    """Jarayon ichidagi fon oqimi. Birinchi xabar navbatga qo'yilganda ishga tushadi"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def wake(self):
+        if not settings.TELEGRAM_OUTBOX_THREAD:
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='telegram-outbox', daemon=True
+                )
+                self._thread.start()
+        self._event.set()
+
+    def stop(self, timeout=None):
+        """Oqimni to'xtatadi (testlar uchun)"""
+        self._stopped.set()
+        self._event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._event.wait(POLL_INTERVAL)
+            self._event.clear()
+            try:
+                while deliver_pending():
+                    pass
+            except Exception as e:
+                logger.error(f"Outbox workerda xatolik: {e}")
+            finally:
+                close_old_connections()
+
+
+worker = OutboxWorker()
@@ -0,0 +1,94 @@
+# test_app/pagination.py
+"""
+``(created_at, id)`` bo'yicha kursorli (keyset) sahifalash.
+
+OFFSET ishlatilmaydi: keyingi sahifa oldingi sahifaning oxirgi qatoridan
+keyin boshlanadi, shuning uchun chuqur sahifalar ham birinchi sahifa kabi
+tez ochiladi.
+
+Admin ro'yxatlari uchun ``EstimatedCountPaginator`` katta jadvallarda
+``COUNT(*)`` o'rniga taxminiy sonni ishlatadi.
+"""
+import base64
+from datetime import datetime
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(created_at, pk):
+    raw = f"{created_at.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, pk = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor(cursor) from e
+
+
+def keyset_page(queryset, cursor=None, size=50, field='created_at'):
+    """
+    Yangidan eskiga tartiblangan sahifa va keyingi sahifa kursorini qaytaradi.
+    Keyingi sahifa bo'lmasa kursor ``None``.
+    """
+    queryset = queryset.order_by(f'-{field}', '-pk')
+    if cursor:
+        value, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(**{f'{field}__lt': value}) | Q(**{field: value, 'pk__lt': pk})
+        )
+    items = list(queryset[:size + 1])
+    next_cursor = None
+    if len(items) > size:
+        items = items[:size]
+        last = items[-1]
+        if isinstance(last, dict):
+            next_cursor = encode_cursor(last[field], last['id'])
+        else:
+            next_cursor = encode_cursor(getattr(last, field), last.pk)
+    return items, next_cursor
+
+
+def estimate_table_rows(model, using='default'):
+    """Jadvaldagi qatorlar sonining arzon taxmini (``None`` - taxmin yo'q)"""
+    connection = connections[using]
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [model._meta.db_table])
+        elif connection.vendor == 'sqlite':
+            # Eng katta id - PK indeksidan bitta qadam (o'chirilganlar hisobga olinmaydi)
+            cursor.execute(f"SELECT MAX(rowid) FROM {table}")
+        else:
+            return None
+        row = cursor.fetchone()
+    return max(int(row[0] or 0), 0) if row else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Filtrsiz ro'yxatda jadval hajmi taxmini, filtrlangan ro'yxatda esa
+    ``count_limit`` gacha chegaralangan ``COUNT`` ishlatiladi. Kichik
+    jadvallarda son aniq.
+    """
+    count_limit = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_table_rows(queryset.model, queryset.db)
+            if estimate is not None and estimate > self.count_limit:
+                return estimate
+        # COUNT(*) FROM (SELECT ... LIMIT n): butun jadvalni sanamaydi
+        return queryset.order_by()[:self.count_limit].count()
@@ -0,0 +1,207 @@
+# test_app/question_bank.py
+"""
+Savollar bankini fayldan import va faylga eksport qilish (``manage.py question_bank``).
+
+Yozuv formati (JSON / NDJSON)::
+
+    {"level": "beginner", "question_text": "...", "explanation": "",
+     "is_active": true, "answers": [{"text": "...", "is_correct": true}, ...]}
+
+CSV da har bir qator bitta savol: ``level, question_text, explanation,
+is_active, correct, answer_1, answer_2, ...``; ``correct`` - to'g'ri javob(lar)
+raqami, 1 dan boshlab, bir nechta bo'lsa ``;`` bilan.
+
+Daraja ``Level.code`` bo'yicha topiladi. Import bitta tranzaksiyada,
+savollar va javoblar ``bulk_create`` bilan partiyalab yoziladi; ``bulk_create``
+signal yubormaydi, shuning uchun o'zgargan darajalar snapshoti oxirida
+bekor qilinadi. Rasmlar import/eksport qilinmaydi.
+"""
+import csv
+import json
+
+from django.db import transaction
+
+from .models import Answer, Level, Question
+from .snapshots import snapshot_store
+
+FORMATS = ('json', 'ndjson', 'csv')
+EXTENSIONS = {'json': 'json', 'ndjson': 'ndjson', 'jsonl': 'ndjson', 'csv': 'csv'}
+CSV_FIXED_COLUMNS = ['level', 'question_text', 'explanation', 'is_active', 'correct']
+TRUE_VALUES = {'1', 'true', 'yes', 'ha', 'y'}
+
+
+class QuestionBankError(ValueError):
+    pass
+
+
+def detect_format(path):
+    extension = path.rsplit('.', 1)[-1].lower()
+    fmt = EXTENSIONS.get(extension)
+    if fmt is None:
+        raise QuestionBankError(f"Fayl formatini aniqlab bo'lmadi: {path} (--format bering)")
+    return fmt
+
+
+def parse_bool(value, default=True):
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+def csv_record(row):
+    correct = {int(index) for index in (row.get('correct') or '').split(';') if index.strip()}
+    answers = []
+    number = 1
+    while f'answer_{number}' in row:
+        text = (row[f'answer_{number}'] or '').strip()
+        if text:
+            answers.append({'text': text, 'is_correct': number in correct})
+        number += 1
+    return {
+        'level': row.get('level'),
+        'question_text': row.get('question_text'),
+        'explanation': row.get('explanation') or '',
+        'is_active': parse_bool(row.get('is_active')),
+        'answers': answers,
+    }
+
+
+def read_records(stream, fmt):
+    """Fayldan yozuvlarni bittalab o'qiydi (JSON dan tashqari - u to'liq yuklanadi)"""
+    if fmt == 'ndjson':
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+    elif fmt == 'csv':
+        for row in csv.DictReader(stream):
+            yield csv_record(row)
+    elif fmt == 'json':
+        yield from json.load(stream)
+    else:
+        raise QuestionBankError(f"Noma'lum format: {fmt}")
+
+
+def import_questions(records, batch_size=2000):
+    """
+    Yozuvlarni bazaga yozadi, ``(savollar, javoblar)`` sonini qaytaradi.
+    Xatolikda hech narsa saqlanmaydi.
+    """
+    levels = Level.objects.in_bulk(field_name='code')
+    touched = set()
+    question_count = answer_count = 0
+
+    def flush(batch):
+        nonlocal question_count, answer_count
+        questions = Question.objects.bulk_create([question for question, _ in batch])
+        # question_id/level_id to'g'ridan-to'g'ri: bog'langan obyekt deskriptorlarisiz tezroq
+        answers = [
+            Answer(question_id=question.id, answer_text=answer['text'],
+                   is_correct=parse_bool(answer.get('is_correct'), False), order=order)
+            for question, (_, answer_list) in zip(questions, batch)
+            for order, answer in enumerate(answer_list)
+        ]
+        Answer.objects.bulk_create(answers, batch_size=batch_size)
+        question_count += len(questions)
+        answer_count += len(answers)
+
+    with transaction.atomic():
+        batch = []
+        for number, record in enumerate(records, 1):
+            level = levels.get(record.get('level'))
+            if level is None:
+                raise QuestionBankError(f"{number}-yozuv: daraja topilmadi: {record.get('level')!r}")
+            text = (record.get('question_text') or '').strip()
+            if not text:
+                raise QuestionBankError(f"{number}-yozuv: question_text bo'sh")
+            question = Question(
+                level_id=level.id,
+                question_text=text,
+                explanation=record.get('explanation') or '',
+                is_active=parse_bool(record.get('is_active')),
+            )
+            batch.append((question, record.get('answers') or []))
+            touched.add(level.id)
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+
+    for level_id in touched:
+        snapshot_store.invalidate(level_id)
+    return question_count, answer_count
+
+
+def export_records(queryset=None, chunk_size=2000):
+    """
+    Savollarni javoblari bilan yozuv ko'rinishida bittalab qaytaradi. Har bir
+    partiya uchun ikki so'rov (savollar va ularning javoblari), model
+    obyektlari yaratilmaydi.
+    """
+    if queryset is None:
+        queryset = Question.objects.all()
+    codes = dict(Level.objects.values_list('id', 'code'))
+    questions = queryset.order_by('id').values_list(
+        'id', 'level_id', 'question_text', 'explanation', 'is_active'
+    )
+    last_id = 0
+    while True:
+        chunk = list(questions.filter(id__gt=last_id)[:chunk_size])
+        if not chunk:
+            break
+        last_id = chunk[-1][0]
+        answers = {}
+        for question_id, text, is_correct in Answer.objects.filter(
+            question_id__in=[row[0] for row in chunk]
+        ).order_by('question_id', 'order', 'id').values_list('question_id', 'answer_text', 'is_correct'):
+            answers.setdefault(question_id, []).append({'text': text, 'is_correct': is_correct})
+        for question_id, level_id, text, explanation, is_active in chunk:
+            yield {
+                'level': codes[level_id],
+                'question_text': text,
+                'explanation': explanation,
+                'is_active': is_active,
+                'answers': answers.get(question_id, []),
+            }
+
+
+def write_records(records, stream, fmt, answer_columns=4):
+    """
+    Yozuvlarni faylga oqim bilan yozadi, yozuvlar sonini qaytaradi.
+    ``answer_columns`` - CSV dagi javob ustunlari soni.
+    """
+    count = 0
+    if fmt == 'ndjson':
+        for record in records:
+            stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+            count += 1
+    elif fmt == 'json':
+        stream.write('[\n')
+        for record in records:
+            if count:
+                stream.write(',\n')
+            stream.write(json.dumps(record, ensure_ascii=False))
+            count += 1
+        stream.write('\n]\n')
+    elif fmt == 'csv':
+        writer = csv.writer(stream)
+        writer.writerow(CSV_FIXED_COLUMNS + [f'answer_{i}' for i in range(1, answer_columns + 1)])
+        for record in records:
+            texts = [answer['text'] for answer in record['answers']]
+            if len(texts) > answer_columns:
+                raise QuestionBankError(
+                    f"CSV uchun javoblar soni {answer_columns} dan ko'p: {record['question_text'][:50]!r}"
+                )
+            correct = ';'.join(
+                str(i) for i, answer in enumerate(record['answers'], 1) if answer['is_correct']
+            )
+            writer.writerow([
+                record['level'], record['question_text'], record['explanation'],
+                int(record['is_active']), correct,
+            ] + texts + [''] * (answer_columns - len(texts)))
+            count += 1
+    else:
+        raise QuestionBankError(f"Noma'lum format: {fmt}")
+    return count
@@ -0,0 +1,134 @@
+# test_app/services.py
+"""
+Test oqimidagi yozish amallari. Sinxron (views.py) va async (async_views.py)
+view lar uchun umumiy: async view lar ularni ``sync_to_async`` orqali
+chaqiradi, chunki ``transaction.atomic`` async kodda ishlamaydi.
+"""
+import uuid
+
+from django.db import transaction
+from django.utils import timezone
+
+from .analytics import record_responses
+from .grading import grade_answers, grade_manifest, score_for
+from .models import Question, TestSession, TestResult
+from .notifications import notify_session_started, notify_result
+from .snapshots import snapshot_store
+from .stats import record_result, record_session_started
+
+
+def new_session_id():
+    return f"IT_{timezone.now().strftime('%Y%m%d')}_{str(uuid.uuid4())[:8].upper()}"
+
+
+@transaction.atomic
+def start_session(level, first_name, last_name, phone_number):
+    session = TestSession.objects.create(
+        session_id=new_session_id(),
+        level=level,
+        first_name=first_name,
+        last_name=last_name,
+        phone_number=phone_number
+    )
+    record_session_started(session)
+
+    # Adminga yangi test boshlanganligi haqida xabar (fonda yuboriladi)
+    notify_session_started(session)
+    return session
+
+
+def assign_questions(session, snapshot, count):
+    """
+    Sessiya savollarini (manifest) bir marta tanlaydi va saqlaydi; sahifa
+    yangilansa o'sha savollar qaytariladi.
+    """
+    if session.question_ids is None:
+        question_ids = snapshot.sample(count)
+        # Parallel so'rovlar bir-birining manifestini almashtirmasligi uchun
+        updated = TestSession.objects.filter(
+            pk=session.pk, question_ids__isnull=True
+        ).update(question_ids=question_ids)
+        if updated:
+            session.question_ids = question_ids
+        else:
+            session.refresh_from_db(fields=['question_ids'])
+    return session.question_ids
+
+
+def drop_unserved(question_ids, answer_ids, active_ids=None):
+    """
+    Manifestdan sessiyaga berilgandan keyin nofaol qilingan va javobsiz qolgan
+    savollarni olib tashlaydi: ``snapshot.render`` ularni ko'rsatmaydi, shuning
+    uchun ular jami savollar soniga kirmaydi. ``active_ids`` - joriy
+    snapshotdagi savollar, ``None`` bo'lsa bazadan olinadi.
+    """
+    if active_ids is None:
+        active_ids = set(Question.objects.filter(
+            id__in=question_ids, is_active=True
+        ).values_list('id', flat=True))
+    served = [
+        (question_id, answer_id)
+        for question_id, answer_id in zip(question_ids, answer_ids)
+        if answer_id is not None or question_id in active_ids
+    ]
+    if len(served) == len(question_ids):
+        return question_ids, answer_ids
+    return [question_id for question_id, _ in served], [answer_id for _, answer_id in served]
+
+
+def finish_session(session, answers, time_taken):
+    """
+    Javoblarni baholaydi va natijani saqlaydi.
+    ``(natija, foydalanuvchiga xabar navbatda, adminga xabar navbatda)`` qaytaradi
+    (navbatda - hali yetkazilgani emas).
+    """
+    # To'g'ri javoblarni hisoblash (bitta so'rov bilan)
+    if session.question_ids is not None:
+        # Faqat foydalanuvchiga berilgan savollar baholanadi, javoblar kaliti
+        # daraja snapshotidan olinadi (odatda bazaga murojaatsiz). Boshqa
+        # workerda kalit tuzatilgan bo'lsa, baho bazadagi kalit bo'yicha
+        snapshot = snapshot_store.get(session.level_id)
+        if snapshot_store.is_current(snapshot):
+            answer_key, active_ids = snapshot.answer_key, snapshot.entries
+        else:
+            answer_key = active_ids = None
+            snapshot_store.invalidate(session.level_id, shared=False)
+        correct, answer_ids = grade_manifest(
+            session.question_ids, answers, answer_key
+        )
+        # Manifest foydalanuvchi ko'rgan savollarga qisqartiriladi (regrade ham shunga tayanadi)
+        session.question_ids, session.answer_ids = drop_unserved(
+            session.question_ids, answer_ids, active_ids
+        )
+        total = len(session.question_ids)
+    else:
+        # Manifestsiz (savollar olinmagan) eski sessiyalar
+        correct = grade_answers(session.level_id, answers)
+        total = len(answers)
+
+    with transaction.atomic():
+        # Testni tugatilgan deb belgilash
+        session.completed = True
+        session.end_time = timezone.now()
+        session.save()
+
+        # Natijani saqlash
+        test_result = TestResult.objects.create(
+            session=session,
+            correct_answers=correct,
+            total_questions=total,
+            score=score_for(correct, total),
+            time_taken=time_taken
+        )
+        # Kunlik yig'ma statistikani yangilash
+        record_result(test_result, session.level_id)
+        if session.answer_ids is not None:
+            # Savollar tahlili uchun har bir javob (bitta INSERT)
+            record_responses(session, session.question_ids, session.answer_ids)
+
+        # Foydalanuvchiga va adminga natija navbatga qo'yiladi, Telegram
+        # javobini kutmaymiz. telegram_sent / admin_notified xabar
+        # yetkazilgach outbox tomonidan belgilanadi
+        telegram_queued, admin_queued = notify_result(session, test_result)
+
+    return test_result, telegram_queued, admin_queued
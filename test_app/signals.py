@@ -0,0 +1,92 @@
+# test_app/signals.py
+from django.db import transaction
+from django.db.models.signals import pre_delete, pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .images import refresh_question_derivatives
+from .levels import levels_cache
+from .models import Level, Question, Answer, TestResult, TestSession
+from .snapshots import snapshot_store
+from .stats import invalidate_statistics, record_result_deleted, record_session_deleted
+
+
+@receiver(post_save, sender=Level)
+@receiver(post_delete, sender=Level)
+def level_changed(sender, instance, **kwargs):
+    levels_cache.invalidate()
+    # Statistikada daraja nomi va tartibi bor
+    invalidate_statistics()
+
+
+@receiver(pre_save, sender=Question)
+def remember_question_level(sender, instance, **kwargs):
+    # Savol boshqa darajaga ko'chirilsa, eski daraja snapshotini ham yangilash kerak
+    if instance.pk:
+        previous = Question.objects.filter(pk=instance.pk).values_list('level_id', 'image').first()
+        if previous:
+            instance._previous_level_id, instance._previous_image = previous
+
+
+@receiver(post_save, sender=Question)
+def question_image_changed(sender, instance, created, raw=False, **kwargs):
+    # Yangi yoki almashtirilgan rasm uchun kichraytirilgan nusxalar
+    if raw:
+        return
+    image = instance.image.name if instance.image else ''
+    previous = '' if created else (getattr(instance, '_previous_image', None) or '')
+    if image != previous or (image and instance.image_derivatives is None):
+        # Pillow bilan ishlov ~1 s davom etadi: admin tranzaksiyasi (SQLite
+        # yozish qulfi) yopilgandan keyin bajariladi
+        transaction.on_commit(lambda: rebuild_question_derivatives(instance.pk))
+
+
+def rebuild_question_derivatives(question_id):
+    question = Question.objects.filter(pk=question_id).first()
+    if question is not None:
+        refresh_question_derivatives(question)
+        # Snapshot dagi rasm URL lari nusxalardan olinadi
+        snapshot_store.invalidate(question.level_id)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def question_changed(sender, instance, **kwargs):
+    previous_level_id = getattr(instance, '_previous_level_id', None)
+    if previous_level_id and previous_level_id != instance.level_id:
+        snapshot_store.invalidate(previous_level_id)
+    snapshot_store.invalidate(instance.level_id)
+
+
+@receiver(post_save, sender=Answer)
+@receiver(post_delete, sender=Answer)
+def answer_changed(sender, instance, **kwargs):
+    level_id = Question.objects.filter(
+        pk=instance.question_id
+    ).values_list('level_id', flat=True).first()
+    if level_id:
+        snapshot_store.invalidate(level_id)
+
+
+@receiver(post_save, sender=TestResult)
+@receiver(post_delete, sender=TestResult)
+def result_changed(sender, instance, **kwargs):
+    invalidate_statistics()
+
+
+@receiver(pre_delete, sender=TestResult)
+def remember_result_level(sender, instance, **kwargs):
+    # Sessiya bilan birga (cascade) o'chirilganda post_delete da sessiya qatori yo'q bo'ladi
+    instance._stat_level_id = TestSession.objects.filter(
+        pk=instance.session_id
+    ).values_list('level_id', flat=True).first()
+
+
+@receiver(post_delete, sender=TestResult)
+def result_deleted(sender, instance, **kwargs):
+    record_result_deleted(instance, getattr(instance, '_stat_level_id', None))
+
+
+@receiver(post_delete, sender=TestSession)
+def session_deleted(sender, instance, **kwargs):
+    record_session_deleted(instance)
+    invalidate_statistics()
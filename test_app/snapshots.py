@@ -0,0 +1,205 @@
+# test_app/snapshots.py
+"""
+Daraja savollari bankining tayyor (oldindan JSON ga o'girilgan) nusxasi.
+
+``get_questions`` har safar ORM obyektlarini yaratib, ularni qayta JSON ga
+o'girmasligi uchun har bir daraja faol savollari va javoblari bir marta
+kodlanadi va jarayon xotirasida saqlanadi. View faqat tanlangan savollarning
+tayyor JSON bo'laklarini birlashtiradi.
+
+Question yoki Answer o'zgarganda signal (signals.py) darajani eskirgan deb
+belgilaydi, snapshot esa keyingi so'rovda qayta quriladi - admin inline
+saqlashda har bir javob uchun qayta qurilmasligi uchun. Boshqa worker
+jarayonlari o'zgarishni ``SNAPSHOT_TTL`` o'tgach ko'radi: muddati o'tgan
+snapshotni bitta oqim (daraja qulfi ostida) qayta quradi, qolgan so'rovlar
+shu vaqtda eski nusxani oladi - katta savollar bankida ham kechikish har
+daqiqada sakramaydi.
+
+Javob formati ixcham: har bir savol ``[id, matn, [[javob_id, matn], ...]]``
+massivi, rasm bo'lsa oxirida ``image_url`` va ``{format: srcset}`` (images.py). To'g'ri javoblar mijozga
+yuborilmaydi - ular snapshotdagi ``answer_key`` da qoladi va baholash
+(grading.py) bazaga murojaat qilmasdan shu kalit bo'yicha bajariladi.
+
+Har bir bekor qilish umumiy keshga (``shared_cache``) daraja versiyasini ham
+yozadi. Snapshot qurilgandagi versiyani eslab qoladi: baholashdan oldin
+``is_current`` uni umumiy versiya bilan solishtiradi, shunda boshqa workerda
+tuzatilgan javoblar kaliti TTL kutmasdan hisobga olinadi.
+
+Savollarni tasodifiy tanlash ham snapshot ichidagi ID lar ustida bajariladi:
+``ORDER BY RANDOM()`` bilan butun jadvalni saralash o'rniga ``question_count``
+ta ID O(k) da olinadi.
+
+Snapshot umumiy keshga (caching.py) qo'yilmaydi: LocMemCache har ``get`` da
+pickle dan tiklaydi, bu esa snapshot tejagan vaqtni qaytarib oladi. Hit/miss
+lar o'sha hisoblagichlarga ``snapshots`` bosqichi sifatida yoziladi.
+"""
+import itertools
+import json
+import random
+import threading
+import time
+import uuid
+
+from django.db.models import Prefetch
+
+from .caching import record, shared_cache
+from .images import image_sources
+from .models import Answer, Question
+
+SNAPSHOT_TTL = 60
+SHARED_VERSION_KEY = 'test_app:snapshot_version:%s'
+
+_versions = itertools.count(1)
+
+
+def shared_version(level_id):
+    """Umumiy keshdagi ``(barcha darajalar, shu daraja)`` versiyasi"""
+    keys = [SHARED_VERSION_KEY % 'all', SHARED_VERSION_KEY % level_id]
+    values = shared_cache().get_many(keys)
+    return tuple(values.get(key) for key in keys)
+
+
+def bump_shared_version(level_id=None):
+    # Qiymat faqat farq qilishi kerak: incr emas, jarayonlar orasida atomik bo'lmagani uchun
+    key = SHARED_VERSION_KEY % ('all' if level_id is None else level_id)
+    shared_cache().set(key, uuid.uuid4().hex, None)
+
+
+class LevelSnapshot:
+    """Bitta daraja savollarining o'zgarmas nusxasi"""
+
+    __slots__ = ('level_id', 'version', 'shared_version', 'built_at', 'ids', 'entries', 'answer_key')
+
+    def __init__(self, level_id, version, entries, answer_key, shared_version=None):
+        self.level_id = level_id
+        self.version = version
+        self.shared_version = shared_version
+        self.built_at = time.monotonic()
+        # question_id -> (JSON bo'lak, (rasmning nisbiy URL i, srcset JSON) yoki None)
+        self.entries = entries
+        self.ids = tuple(entries)
+        # answer_id -> (question_id, is_correct)
+        self.answer_key = answer_key
+
+    @classmethod
+    def build(cls, level_id):
+        # Versiya bazadan o'qishdan oldin olinadi: oraliqdagi o'zgarish snapshotni eskirgan qiladi
+        current = shared_version(level_id)
+        questions = Question.objects.filter(
+            level_id=level_id, is_active=True
+        ).prefetch_related(
+            Prefetch('answers', queryset=Answer.objects.order_by('order'))
+        ).order_by('id')
+
+        entries = {}
+        answer_key = {}
+        for question in questions:
+            answers = question.answers.all()
+            encoded = json.dumps(
+                [question.id, question.question_text, [[answer.id, answer.answer_text] for answer in answers]],
+                ensure_ascii=False, separators=(',', ':')
+            )
+            image = None
+            if question.image:
+                image_url, srcset = image_sources(question.image, question.image_derivatives)
+                image = (image_url, json.dumps(srcset, ensure_ascii=False, separators=(',', ':')))
+            entries[question.id] = (encoded, image)
+            for answer in answers:
+                answer_key[answer.id] = (question.id, answer.is_correct)
+        return cls(level_id, next(_versions), entries, answer_key, current)
+
+    def sample(self, k):
+        """``k`` ta tasodifiy savol ID sini qaytaradi"""
+        return random.sample(self.ids, min(k, len(self.ids)))
+
+    def render(self, question_ids, build_absolute_uri):
+        """Tanlangan savollarni JSON massiv elementlari sifatida qaytaradi"""
+        parts = []
+        for question_id in question_ids:
+            entry = self.entries.get(question_id)
+            if entry is None:
+                continue
+            encoded, image = entry
+            if image:
+                # Rasm URL i so'rov hostiga bog'liq, shuning uchun oxirida qo'shiladi
+                image_url, srcset = image
+                encoded = '%s,%s,%s]' % (
+                    encoded[:-1], json.dumps(build_absolute_uri(image_url), ensure_ascii=False), srcset
+                )
+            parts.append(encoded)
+        return parts
+
+
+class SnapshotStore:
+    def __init__(self, ttl=SNAPSHOT_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._build_locks = {}  # level_id -> qayta qurish qulfi
+        self._snapshots = {}
+        self._generations = {}
+        self._epoch = 0
+
+    def _build_lock(self, level_id):
+        with self._lock:
+            return self._build_locks.setdefault(level_id, threading.Lock())
+
+    def get_cached(self, level_id):
+        """Yangi snapshot bo'lsa qaytaradi, aks holda ``None`` (bazaga murojaat qilmaydi)"""
+        snapshot = self._snapshots.get(level_id)
+        if snapshot is not None and time.monotonic() - snapshot.built_at <= self.ttl:
+            record('snapshots', True)
+            return snapshot
+        return None
+
+    def get(self, level_id):
+        snapshot = self.get_cached(level_id)
+        if snapshot is not None:
+            return snapshot
+
+        lock = self._build_lock(level_id)
+        stale = self._snapshots.get(level_id)
+        if stale is not None:
+            # Muddati o'tgan: boshqa oqim qayta qurayotgan bo'lsa eski nusxa beriladi
+            if not lock.acquire(blocking=False):
+                record('snapshots', True)
+                return stale
+        else:
+            # Snapshot yo'q (yoki bekor qilingan): bir vaqtdagi so'rovlar bitta qurishni kutadi
+            lock.acquire()
+        try:
+            snapshot = self.get_cached(level_id)
+            if snapshot is not None:
+                return snapshot
+            record('snapshots', False)
+            generation = (self._epoch, self._generations.get(level_id, 0))
+            snapshot = LevelSnapshot.build(level_id)
+            with self._lock:
+                # Qurish vaqtida daraja o'zgargan bo'lsa, eskirgan nusxani saqlamaymiz
+                if (self._epoch, self._generations.get(level_id, 0)) == generation:
+                    self._snapshots[level_id] = snapshot
+            return snapshot
+        finally:
+            lock.release()
+
+    def is_current(self, snapshot):
+        """Snapshot qurilgandan keyin hech bir workerda daraja o'zgarmaganmi"""
+        return snapshot.shared_version == shared_version(snapshot.level_id)
+
+    def invalidate(self, level_id=None, shared=True):
+        """``shared=False`` - faqat shu jarayon nusxasi (umumiy versiya allaqachon yangi)"""
+        if shared:
+            bump_shared_version(level_id)
+        with self._lock:
+            if level_id is None:
+                self._epoch += 1
+                self._snapshots.clear()
+            else:
+                self._generations[level_id] = self._generations.get(level_id, 0) + 1
+                self._snapshots.pop(level_id, None)
+
+
+snapshot_store = SnapshotStore()
+
+
+def get_snapshot(level):
+    return snapshot_store.get(level.id)
@@ -0,0 +1,166 @@
+# test_app/stats.py
+"""
+Statistika sahifasi uchun hisob-kitoblar.
+
+Har bir daraja va kun uchun yig'ma qator (``DailyLevelStat``) testlar soni,
+ball yig'indisi, ball kvadratlari yig'indisi va sarflangan vaqtni saqlaydi.
+Qatorlar test boshlanganda va natija yozilganda atomik ``F()`` UPDATE bilan
+yangilanadi, o'chirilganda esa xuddi shunday kamaytiriladi (signals.py),
+shuning uchun statistika narxi natijalar soniga bog'liq emas - faqat
+darajalar va kunlar soniga. ``manage.py rebuild_daily_stats`` (va 0004
+migratsiyasi) jadvalni noldan qayta quradi.
+
+Tayyor kontekst qisqa muddat keshlanadi (caching.py) va TestResult yoki Level
+o'zgarganda keshdan o'chiriladi (signals.py).
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Sum
+from django.db.models.functions import Cast, TruncDate
+from django.utils import timezone
+
+from .models import DailyLevelStat, TestResult, TestSession
+
+STATISTICS_CACHE_KEY = 'test_app:statistics'
+STATISTICS_TTL = 60
+
+
+def _increment(level_id, day, **increments):
+    row, _ = DailyLevelStat.objects.get_or_create(level_id=level_id, date=day)
+    DailyLevelStat.objects.filter(pk=row.pk).update(
+        **{field: F(field) + value for field, value in increments.items()}
+    )
+
+
+def _decrement(level_id, day, **decrements):
+    # Daraja o'chirilganda (SET_NULL) bir kunda bir nechta level=NULL qator bo'lishi mumkin
+    pk = DailyLevelStat.objects.filter(level_id=level_id, date=day).values_list('pk', flat=True).first()
+    if pk is not None:
+        DailyLevelStat.objects.filter(pk=pk).update(
+            **{field: F(field) - value for field, value in decrements.items()}
+        )
+
+
+def record_session_started(session):
+    _increment(session.level_id, timezone.localdate(session.start_time), started=1)
+
+
+def record_result(result, level_id):
+    score = result.score
+    _increment(
+        level_id,
+        timezone.localdate(result.created_at),
+        count=1,
+        score_sum=score,
+        score_sq_sum=score * score,
+        time_sum=result.time_taken
+    )
+
+
+def record_session_deleted(session):
+    _decrement(session.level_id, timezone.localdate(session.start_time), started=1)
+
+
+def record_result_deleted(result, level_id):
+    score = result.score
+    _decrement(
+        level_id,
+        timezone.localdate(result.created_at),
+        count=1,
+        score_sum=score,
+        score_sq_sum=score * score,
+        time_sum=result.time_taken
+    )
+
+
+def collect_daily_stats():
+    """
+    Yig'ma qatorlarni (saqlanmagan ``DailyLevelStat`` obyektlari) hisoblaydi.
+    0004 migratsiyasida xuddi shu hisobning tarixiy modellar uchun nusxasi bor.
+    """
+    tz = timezone.get_current_timezone()
+    rows = {}
+
+    def row(level_id, day):
+        key = (level_id, day)
+        if key not in rows:
+            rows[key] = DailyLevelStat(level_id=level_id, date=day)
+        return rows[key]
+
+    started = TestSession.objects.order_by().annotate(
+        day=TruncDate('start_time', tzinfo=tz)
+    ).values('level', 'day').annotate(started=Count('id'))
+    for item in started.iterator():
+        row(item['level'], item['day']).started = item['started']
+
+    score = Cast('score', FloatField())
+    results = TestResult.objects.order_by().annotate(
+        day=TruncDate('created_at', tzinfo=tz)
+    ).values('session__level', 'day').annotate(
+        count=Count('id'),
+        score_sum=Sum(score),
+        score_sq_sum=Sum(score * score),
+        time_sum=Sum('time_taken')
+    )
+    for item in results.iterator():
+        stat = row(item['session__level'], item['day'])
+        stat.count = item['count']
+        stat.score_sum = item['score_sum'] or 0
+        stat.score_sq_sum = item['score_sq_sum'] or 0
+        stat.time_sum = item['time_sum'] or 0
+    return list(rows.values())
+
+
+@transaction.atomic
+def rebuild_daily_stats():
+    """Yig'ma jadvalni TestSession va TestResult jadvallaridan qayta quradi"""
+    rows = collect_daily_stats()
+    DailyLevelStat.objects.all().delete()
+    DailyLevelStat.objects.bulk_create(rows, batch_size=1000)
+    invalidate_statistics()
+    return len(rows)
+
+
+def build_statistics():
+    rows = DailyLevelStat.objects.order_by().values(
+        'level', 'level__name', 'level__order'
+    ).annotate(
+        started=Sum('started'),
+        count=Sum('count'),
+        score_sum=Sum('score_sum')
+    )
+
+    level_rows = []
+    total_started = total_count = total_score = 0
+    for row in rows:
+        total_started += row['started']
+        total_count += row['count']
+        total_score += row['score_sum']
+        if row['level'] is not None and row['count'] > 0:
+            level_rows.append(row)
+    level_rows.sort(key=lambda row: (row['level__order'], row['level']))
+
+    return {
+        'total_tests': total_started,
+        'completed_tests': total_count,
+        'avg_score': round(total_score / total_count, 1) if total_count else 0,
+        'level_stats': [
+            {
+                'level': row['level__name'],
+                'count': row['count'],
+                'avg_score': round(row['score_sum'] / row['count'], 1)
+            } for row in level_rows
+        ]
+    }
+
+
+def get_statistics():
+    context = cache.get(STATISTICS_CACHE_KEY)
+    if context is None:
+        context = build_statistics()
+        cache.set(STATISTICS_CACHE_KEY, context, STATISTICS_TTL)
+    return context
+
+
+def invalidate_statistics():
+    cache.delete(STATISTICS_CACHE_KEY)
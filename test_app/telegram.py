@@ -0,0 +1,90 @@
+# test_app/telegram.py
+"""
+Telegram Bot API mijozi.
+
+Bitta ``requests.Session`` ulanishlar pulini saqlaydi (keep-alive), shuning
+uchun har bir xabar uchun yangi TLS ulanish ochilmaydi. Bot URL i bir marta
+quriladi. Telegram 429 bilan ``retry_after`` qaytarsa, mijoz shu vaqtgacha
+boshqa so'rov yubormaydi.
+"""
+import threading
+import time
+from collections import namedtuple
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from .metrics import record_outbound
+
+# Telegram xabar uzunligi chegarasi
+MAX_MESSAGE_LENGTH = 4096
+
+SendResult = namedtuple('SendResult', ['ok', 'error', 'retryable', 'retry_after'])
+
+
+class TelegramClient:
+    def __init__(self, token, api_url, timeout=10, pool_size=4):
+        self.timeout = timeout
+        self.base_url = f"{api_url.rstrip('/')}/bot{token}/"
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._lock = threading.Lock()
+        self._blocked_until = 0.0
+
+    def retry_after(self):
+        """429 dan keyin yana necha soniya kutish kerakligi"""
+        return max(0.0, self._blocked_until - time.monotonic())
+
+    def send_message(self, chat_id, text, parse_mode='Markdown'):
+        wait = self.retry_after()
+        if wait:
+            return SendResult(False, 'Telegram cheklovi (429) tugashi kutilmoqda', True, wait)
+
+        payload = {
+            'chat_id': chat_id,
+            'text': text,
+            'parse_mode': parse_mode
+        }
+        started = time.perf_counter()
+        try:
+            response = self.session.post(self.base_url + 'sendMessage', json=payload, timeout=self.timeout)
+        except requests.RequestException as e:
+            record_outbound('telegram', time.perf_counter() - started, ok=False)
+            return SendResult(False, str(e), True, 0)
+        record_outbound('telegram', time.perf_counter() - started, ok=response.status_code == 200)
+
+        if response.status_code == 200:
+            return SendResult(True, '', False, 0)
+
+        error = f"HTTP {response.status_code}: {response.text[:500]}"
+        if response.status_code == 429:
+            try:
+                retry_after = float(response.json()['parameters']['retry_after'])
+            except (ValueError, KeyError, TypeError):
+                retry_after = 1.0
+            with self._lock:
+                self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+            return SendResult(False, error, True, retry_after)
+        # 4xx (429 dan tashqari) - masalan chat topilmadi, qayta urinish foydasiz
+        return SendResult(False, error, response.status_code >= 500, 0)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client():
+    """Joriy sozlamalar uchun umumiy mijozni qaytaradi"""
+    key = (settings.TELEGRAM_API_URL, settings.TELEGRAM_BOT_TOKEN)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = TelegramClient(
+                    settings.TELEGRAM_BOT_TOKEN, settings.TELEGRAM_API_URL
+                )
+    return client
@@ -1,3 +1,1398 @@
-from django.test import TestCase
+import gzip
+import json
+import logging
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+
+from .models import (
+    Level, Question, Answer, TestSession, TestResult, TelegramMessage, DailyLevelStat, QuestionResponse
+)
+from .snapshots import LevelSnapshot, SnapshotStore, bump_shared_version, snapshot_store
+from .levels import levels_cache
+from .grading import grade_answers
+from .services import finish_session
+from .analytics import is_flagged, item_statistics, record_responses
+from .outbox import deliver_pending, enqueue
+from .telegram import get_client
+from .stats import get_statistics, invalidate_statistics, rebuild_daily_stats
+from .pagination import EstimatedCountPaginator, keyset_page
+from .logs import JsonFormatter, QueueListenerHandler
+from . import logs
+from .metrics import registry as metrics_registry
+from .caching import cache_counters, reset_counters
+from . import throttling
+from .bench import ClientTransport, FakeTelegramServer, LoadStats, take_test
+
+
+def setUpModule():
+    # Umumiy fayl keshi vaqtinchalik papkada: haqiqiy BASE_DIR/.cache ga
+    # tegilmaydi va oldingi ishga tushirishdan qolgan qiymatlar ko'rinmaydi
+    cache_dir = tempfile.mkdtemp()
+    unittest.addModuleCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+    cache_override = override_settings(
+        CACHES={**settings.CACHES, 'shared': {**settings.CACHES['shared'], 'LOCATION': cache_dir}}
+    )
+    cache_override.enable()
+    unittest.addModuleCleanup(cache_override.disable)
+
+
+class QuestionSnapshotTests(TestCase):
+    def setUp(self):
+        snapshot_store.invalidate()
+        self.level = Level.objects.create(name='Beginner', code='beginner', question_count=5)
+        self.questions = [
+            Question.objects.create(level=self.level, question_text=f"Savol {i}")
+            for i in range(10)
+        ]
+
+    def test_sample_returns_unique_active_ids(self):
+        ids = snapshot_store.get(self.level.id).sample(5)
+        self.assertEqual(len(ids), 5)
+        self.assertEqual(len(set(ids)), 5)
+        self.assertTrue(set(ids) <= {q.id for q in self.questions})
+
+    def test_snapshot_follows_question_changes(self):
+        version = snapshot_store.get(self.level.id).version
+        hidden = self.questions[0]
+        hidden.is_active = False
+        hidden.save()
+        added = Question.objects.create(level=self.level, question_text="Yangi savol")
+        removed_id = self.questions[1].id
+        self.questions[1].delete()
+
+        snapshot = snapshot_store.get(self.level.id)
+        self.assertGreater(snapshot.version, version)
+        ids = set(snapshot.ids)
+        self.assertNotIn(hidden.id, ids)
+        self.assertNotIn(removed_id, ids)
+        self.assertIn(added.id, ids)
+        self.assertEqual(len(ids), 9)
+
+    def test_answer_change_rebuilds_snapshot(self):
+        answer = Answer.objects.create(question=self.questions[0], answer_text="Eski")
+        snapshot_store.get(self.level.id)
+        answer.answer_text = "Yangi"
+        answer.save()
+
+        encoded, _ = snapshot_store.get(self.level.id).entries[self.questions[0].id]
+        self.assertIn('"Yangi"', encoded)
+
+    def test_expired_snapshot_is_served_while_one_rebuild_runs(self):
+        store = SnapshotStore(ttl=0)
+        stale = store.get(self.level.id)
+        lock = store._build_lock(self.level.id)
+        lock.acquire()
+        try:
+            # Boshqa oqim qayta qurayapti: eski nusxa bazaga murojaatsiz qaytadi
+            with self.assertNumQueries(0):
+                self.assertIs(store.get(self.level.id), stale)
+        finally:
+            lock.release()
+        with self.assertNumQueries(2):
+            self.assertGreater(store.get(self.level.id).version, stale.version)
+
+    def test_concurrent_misses_build_once(self):
+        store = SnapshotStore()
+        builds = []
+
+        def slow_build(level_id):
+            # Boshqa oqimlar test tranzaksiyasidagi qatorlarni ko'rmaydi - bazasiz nusxa
+            builds.append(level_id)
+            time.sleep(0.05)
+            return LevelSnapshot(level_id, len(builds), {}, {})
+
+        results = []
+        with mock.patch.object(LevelSnapshot, 'build', side_effect=slow_build):
+            threads = [
+                threading.Thread(target=lambda: results.append(store.get(self.level.id))) for _ in range(4)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(builds), 1)
+        self.assertEqual([snapshot.version for snapshot in results], [1] * 4)
+
+    def test_get_questions_uses_level_question_count(self):
+        TestSession.objects.create(
+            session_id='IT_TEST_1', level=self.level, first_name='Ali', last_name='Valiyev'
+        )
+        response = self.client.get('/api/questions/IT_TEST_1/', secure=True)
+        data = response.json()
+        self.assertTrue(data['success'])
+        self.assertEqual(len(data['questions']), 5)
+
+
+class QuestionPayloadQueryTests(TestCase):
+    def setUp(self):
+        snapshot_store.invalidate()
+        self.level = Level.objects.create(name='Elementary', code='elementary')
+        for i in range(30):
+            question = Question.objects.create(level=self.level, question_text=f"Savol {i}")
+            for j in range(4):
+                Answer.objects.create(
+                    question=question, answer_text=f"Javob {j}", is_correct=(j == 0), order=j
+                )
+
+    def test_query_count_does_not_depend_on_question_count(self):
+        snapshot_store.get(self.level.id)
+        for count in (1, 10, 30):
+            Level.objects.filter(id=self.level.id).update(question_count=count)
+            TestSession.objects.create(
+                session_id=f'IT_TEST_2_{count}', level=self.level, first_name='Ali', last_name='Valiyev'
+            )
+            # Sessiya (daraja bilan) va manifestni saqlash - savollar snapshotdan olinadi
+            with self.assertNumQueries(2):
+                response = self.client.get(f'/api/questions/IT_TEST_2_{count}/', secure=True)
+            questions = response.json()['questions']
+            self.assertEqual(len(questions), count)
+            for question_id, question_text, answers in questions:
+                self.assertEqual(
+                    [answer_text for _, answer_text in answers],
+                    ['Javob 0', 'Javob 1', 'Javob 2', 'Javob 3'],
+                )
+
+    def test_payload_has_no_answer_key(self):
+        TestSession.objects.create(
+            session_id='IT_TEST_2_KEY', level=self.level, first_name='Ali', last_name='Valiyev'
+        )
+        response = self.client.get('/api/questions/IT_TEST_2_KEY/', secure=True)
+        self.assertNotIn(b'is_correct', response.content)
+        self.assertNotIn(b'true', response.content.replace(b'"success":true', b''))
+
+
+class GradingTests(TestCase):
+    def setUp(self):
+        self.level = Level.objects.create(name='Intermediate', code='intermediate')
+        self.other_level = Level.objects.create(name='Advanced', code='advanced')
+        self.key = {}
+        for level in (self.level, self.other_level):
+            for i in range(3):
+                question = Question.objects.create(level=level, question_text=f"Savol {i}")
+                right = Answer.objects.create(question=question, answer_text="Ha", is_correct=True)
+                wrong = Answer.objects.create(question=question, answer_text="Yo'q", order=1)
+                self.key[question.id] = (question, right, wrong)
+
+    def answers_for(self, level):
+        return [(q, r, w) for q, r, w in self.key.values() if q.level_id == level.id]
+
+    def test_grades_with_single_query(self):
+        (q1, r1, _), (q2, _, w2), (q3, r3, _) = self.answers_for(self.level)
+        answers = [
+            {'question_id': q1.id, 'answer_id': r1.id},
+            {'question_id': q2.id, 'answer_id': w2.id},
+            {'question_id': q3.id, 'answer_id': r3.id},
+        ]
+        with self.assertNumQueries(1):
+            self.assertEqual(grade_answers(self.level.id, answers), 2)
+
+    def test_ignores_foreign_mismatched_and_duplicate_answers(self):
+        (q1, r1, w1), (q2, r2, _), _ = self.answers_for(self.level)
+        (_, foreign_right, _), *_ = self.answers_for(self.other_level)
+        answers = [
+            {'question_id': q1.id, 'answer_id': w1.id},
+            {'question_id': q1.id, 'answer_id': r1.id},
+            {'question_id': q1.id, 'answer_id': r2.id},
+            {'question_id': q2.id, 'answer_id': foreign_right.id},
+            {'question_id': q2.id, 'answer_id': 'x'},
+            {'answer_id': 999999},
+        ]
+        self.assertEqual(grade_answers(self.level.id, answers), 0)
+
+
+@override_settings(TELEGRAM_OUTBOX_THREAD=False)
+class SessionManifestTests(TestCase):
+    def setUp(self):
+        snapshot_store.invalidate()
+        self.level = Level.objects.create(name='Beginner', code='beginner', question_count=3)
+        self.other_level = Level.objects.create(name='Advanced', code='advanced')
+        self.key = {}
+        for i in range(6):
+            question = Question.objects.create(level=self.level, question_text=f"Savol {i}")
+            right = Answer.objects.create(question=question, answer_text="Ha", is_correct=True)
+            wrong = Answer.objects.create(question=question, answer_text="Yo'q", order=1)
+            self.key[question.id] = (right, wrong)
+        foreign = Question.objects.create(level=self.other_level, question_text="Boshqa")
+        self.foreign_right = Answer.objects.create(question=foreign, answer_text="Ha", is_correct=True)
+        self.session = TestSession.objects.create(
+            session_id='IT_TEST_M', level=self.level, first_name='Ali', last_name='Valiyev'
+        )
+
+    def served_ids(self):
+        response = self.client.get('/api/questions/IT_TEST_M/', secure=True)
+        return [question[0] for question in response.json()['questions']]
+
+    def submit(self, answers):
+        return self.client.post(
+            '/api/submit-test/',
+            data=json.dumps({'session_id': 'IT_TEST_M', 'answers': answers, 'time_taken': 30}),
+            content_type='application/json', secure=True,
+        ).json()
+
+    def test_manifest_is_stable_across_reloads(self):
+        served = self.served_ids()
+        self.assertEqual(len(served), 3)
+        self.assertEqual(self.served_ids(), served)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.question_ids, served)
+
+    def test_only_served_questions_are_graded(self):
+        served = self.served_ids()
+        not_served = next(qid for qid in self.key if qid not in served)
+        answers = [
+            {'question_id': served[0], 'answer_id': self.key[served[0]][0].id},
+            {'question_id': not_served, 'answer_id': self.key[not_served][0].id},
+            {'answer_id': self.foreign_right.id},
+        ]
+        data = self.submit(answers)
+        self.assertEqual((data['correct'], data['total']), (1, 3))
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.answer_ids, [self.key[served[0]][0].id, None, None])
+        self.assertEqual(
+            list(QuestionResponse.objects.order_by('id').values_list('question_id', 'answer_id')),
+            list(zip(served, self.session.answer_ids)),
+        )
+
+    def test_grading_uses_cached_answer_key(self):
+        served = self.served_ids()
+        answers = [{'question_id': qid, 'answer_id': self.key[qid][0].id} for qid in served]
+        session = TestSession.objects.select_related('level').get(pk=self.session.pk)
+        with CaptureQueriesContext(connection) as queries:
+            finish_session(session, answers, 30)
+        self.assertFalse([q for q in queries if 'test_app_answer' in q['sql']])
+        self.assertEqual(TestResult.objects.get().correct_answers, 3)
+
+    def test_key_corrected_in_another_worker_is_not_graded_from_cache(self):
+        served = self.served_ids()
+        right, wrong = self.key[served[0]]
+        # Boshqa worker: kalit tuzatildi, umumiy versiya yangilandi, bu jarayon snapshoti eski
+        Answer.objects.filter(id=wrong.id).update(is_correct=True)
+        bump_shared_version(self.level.id)
+        self.assertIsNotNone(snapshot_store.get_cached(self.level.id))
+
+        data = self.submit([{'question_id': served[0], 'answer_id': wrong.id}])
+        self.assertEqual(data['correct'], 1)
+        # Eski nusxa tashlandi, keyingi so'rov yangi kalit bilan quradi
+        self.assertIsNone(snapshot_store.get_cached(self.level.id))
+        self.assertTrue(snapshot_store.is_current(snapshot_store.get(self.level.id)))
+
+    def test_questions_deactivated_after_assignment_are_not_counted(self):
+        served = self.served_ids()
+        hidden = Question.objects.get(id=served[2])
+        hidden.is_active = False
+        hidden.save()
+        # Sahifa qayta yuklanganda nofaol savol ko'rsatilmaydi
+        self.assertEqual(self.served_ids(), served[:2])
+
+        data = self.submit([
+            {'question_id': qid, 'answer_id': self.key[qid][0].id} for qid in served[:2]
+        ])
+        self.assertEqual((data['correct'], data['total'], data['score']), (2, 2, 100))
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.question_ids, served[:2])
+        self.assertEqual(QuestionResponse.objects.count(), 2)
+
+        # Qayta baholash qisqartirilgan manifest bo'yicha - natija o'zgarmaydi
+        call_command('regrade_sessions', stdout=StringIO())
+        self.assertEqual(TestResult.objects.get().total_questions, 2)
+
+    def test_regrade_applies_corrected_answer_key(self):
+        served = self.served_ids()
+        self.submit([
+            {'question_id': qid, 'answer_id': self.key[qid][1].id} for qid in served
+        ])
+        right, wrong = self.key[served[0]]
+        Answer.objects.filter(id=wrong.id).update(is_correct=True)
+
+        call_command('regrade_sessions', stdout=StringIO())
+        result = TestResult.objects.get()
+        self.assertEqual((result.correct_answers, result.total_questions, result.score), (1, 3, 33.3))
+        self.assertEqual(DailyLevelStat.objects.get().score_sum, 33.3)
+
+    def test_regrade_commits_each_batch_separately(self):
+        for i in range(3):
+            session = TestSession.objects.create(
+                session_id=f'IT_TEST_R{i}', level=self.level, first_name='Ali', last_name='Valiyev',
+                question_ids=[q.id for q in Question.objects.filter(level=self.level)[:1]], answer_ids=[None],
+            )
+            TestResult.objects.create(session=session, correct_answers=1, total_questions=1, score=100)
+
+        with CaptureQueriesContext(connection) as queries:
+            call_command('regrade_sessions', batch=1, stdout=StringIO())
+        self.assertFalse(TestResult.objects.filter(score=100).exists())
+        # Test tranzaksiyasi ichida har bir partiya (va statistika) o'z savepoint ida
+        savepoints = [q for q in queries if q['sql'].startswith('SAVEPOINT')]
+        self.assertEqual(len(savepoints), 4)
+
+
+class ImageDerivativeTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        snapshot_store.invalidate()
+        self.level = Level.objects.create(name='Beginner', code='beginner', question_count=1)
+
+    def upload(self, size):
+        buffer = BytesIO()
+        Image.new('RGBA', size, (200, 30, 30, 128)).save(buffer, 'PNG')
+        return SimpleUploadedFile('rasm.png', buffer.getvalue(), content_type='image/png')
+
+    def test_derivatives_are_built_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            question = Question.objects.create(
+                level=self.level, question_text="Rasmli savol", image=self.upload((1600, 900))
+            )
+            question.refresh_from_db()
+            # Tranzaksiya ichida Pillow ishlamaydi
+            self.assertIsNone(question.image_derivatives)
+        self.assertEqual(len(callbacks), 1)
+
+    def test_upload_builds_hashed_derivatives(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            question = Question.objects.create(
+                level=self.level, question_text="Rasmli savol", image=self.upload((1600, 900))
+            )
+        question.refresh_from_db()
+        derivatives = question.image_derivatives
+        self.assertEqual([width for width, _ in derivatives['webp']], [320, 640, 1024])
+        storage = question.image.storage
+        for fmt, variants in derivatives.items():
+            for width, name in variants:
+                self.assertRegex(name, rf'^questions/derived/[0-9a-f]{{16}}-{width}\.{fmt}$')
+                with storage.open(name) as derived:
+                    self.assertEqual(Image.open(derived).width, width)
+
+        TestSession.objects.create(
+            session_id='IT_TEST_IMG', level=self.level, first_name='Ali', last_name='Valiyev'
+        )
+        [[_, _, _, image_url, srcset]] = self.client.get(
+            '/api/questions/IT_TEST_IMG/', secure=True
+        ).json()['questions']
+        self.assertTrue(image_url.endswith('-640.jpeg'))
+        self.assertIn('-320.webp 320w', srcset['webp'])
+
+    def test_small_image_is_not_upscaled(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            question = Question.objects.create(
+                level=self.level, question_text="Kichik rasm", image=self.upload((200, 100))
+            )
+        question.refresh_from_db()
+        self.assertEqual([width for width, _ in question.image_derivatives['jpeg']], [200])
+
+
+class MediaServingTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        os.makedirs(os.path.join(self.media_root, 'questions'))
+        self.content = bytes(range(256)) * 4
+
+    def write(self, name, content):
+        with open(os.path.join(self.media_root, name), 'wb') as f:
+            f.write(content)
+
+    def test_uploaded_image_name_is_content_hash(self):
+        level = Level.objects.create(name='Beginner', code='beginner')
+        buffer = BytesIO()
+        Image.new('RGB', (10, 10)).save(buffer, 'PNG')
+        question = Question.objects.create(
+            level=level, question_text="Rasm",
+            image=SimpleUploadedFile('Untitled-1.PNG', buffer.getvalue(), content_type='image/png')
+        )
+        self.assertRegex(question.image.name, r'^questions/[0-9a-f]{16}\.png$')
+        response = self.client.get(question.image.url, secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertEqual(b''.join(response.streaming_content), buffer.getvalue())
+
+    def test_legacy_name_revalidates(self):
+        self.write('questions/4.jpg', self.content)
+        response = self.client.get('/media/questions/4.jpg', secure=True)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=3600')
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+
+        response = self.client.get(
+            '/media/questions/4.jpg', secure=True, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_range_requests(self):
+        self.write('questions/4.jpg', self.content)
+        response = self.client.get('/media/questions/4.jpg', secure=True, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), self.content[10:20])
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/1024')
+        self.assertEqual(response['Content-Length'], '10')
+
+        response = self.client.get('/media/questions/4.jpg', secure=True, HTTP_RANGE='bytes=-4')
+        self.assertEqual(b''.join(response.streaming_content), self.content[-4:])
+
+        response = self.client.get('/media/questions/4.jpg', secure=True, HTTP_RANGE='bytes=5000-')
+        self.assertEqual(response.status_code, 416)
+
+    def test_large_range_is_streamed_in_blocks(self):
+        content = os.urandom(200 * 1024)
+        self.write('questions/katta.jpg', content)
+        response = self.client.get('/media/questions/katta.jpg', secure=True, HTTP_RANGE='bytes=100-150099')
+        self.assertEqual(response.status_code, 206)
+        self.assertTrue(response.streaming)
+        blocks = list(response.streaming_content)
+        # Oraliq bir martada emas, FileResponse bloklari bilan o'qiladi
+        self.assertGreater(len(blocks), 1)
+        self.assertLessEqual(max(len(block) for block in blocks), response.block_size)
+        self.assertEqual(b''.join(blocks), content[100:150100])
+
+    def test_precompressed_variant_and_traversal(self):
+        self.write('questions/chizma.svg', b'<svg/>' * 100)
+        self.write('questions/chizma.svg.gz', gzip.compress(b'<svg/>' * 100))
+        response = self.client.get(
+            '/media/questions/chizma.svg', secure=True, HTTP_ACCEPT_ENCODING='gzip, deflate'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b'<svg/>' * 100)
+
+        response = self.client.get('/media/questions/chizma.svg', secure=True)
+        self.assertNotIn('Content-Encoding', response)
+
+        response = self.client.get('/media/../manage.py', secure=True)
+        self.assertEqual(response.status_code, 404)
+
+
+class QuestionBankTests(TestCase):
+    def setUp(self):
+        snapshot_store.invalidate()
+        self.level = Level.objects.create(name='Beginner', code='beginner')
+        self.other_level = Level.objects.create(name='Advanced', code='advanced', order=1)
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir, ignore_errors=True)
+
+    def path(self, name):
+        return os.path.join(self.tmpdir, name)
+
+    def test_round_trip_through_all_formats(self):
+        question = Question.objects.create(level=self.level, question_text="Men ____ talabaman", explanation="am")
+        Answer.objects.create(question=question, answer_text="am", is_correct=True)
+        Answer.objects.create(question=question, answer_text="is", order=1)
+        Question.objects.create(level=self.other_level, question_text="Javobsiz", is_active=False)
+
+        for fmt in ('ndjson', 'json', 'csv'):
+            call_command('question_bank', 'export', self.path(f'bank.{fmt}'), stdout=StringIO())
+        exported = Question.objects.count()
+        snapshot_store.get(self.level.id)
+
+        for fmt in ('ndjson', 'json', 'csv'):
+            call_command('question_bank', 'import', self.path(f'bank.{fmt}'), stdout=StringIO())
+        self.assertEqual(Question.objects.count(), exported * 4)
+        self.assertEqual(
+            set(Question.objects.values_list('level__code', 'question_text', 'is_active')),
+            {('beginner', "Men ____ talabaman", True), ('advanced', "Javobsiz", False)},
+        )
+        for imported in Question.objects.filter(question_text="Men ____ talabaman"):
+            self.assertEqual(imported.explanation, "am")
+            self.assertEqual(
+                list(imported.answers.values_list('answer_text', 'is_correct', 'order')),
+                [("am", True, 0), ("is", False, 1)],
+            )
+        # bulk_create signal yubormaydi - snapshot import tomonidan yangilanadi
+        self.assertEqual(len(snapshot_store.get(self.level.id).ids), 4)
+
+    def test_unknown_level_rolls_back_whole_file(self):
+        with open(self.path('bank.ndjson'), 'w') as f:
+            f.write(json.dumps({'level': 'beginner', 'question_text': 'Birinchi', 'answers': []}) + '\n')
+            f.write(json.dumps({'level': 'yoq', 'question_text': 'Ikkinchi', 'answers': []}) + '\n')
+        with self.assertRaisesMessage(CommandError, "daraja topilmadi: 'yoq'"):
+            call_command('question_bank', 'import', self.path('bank.ndjson'), '--batch', '1', stdout=StringIO())
+        self.assertFalse(Question.objects.exists())
+
+
+class ItemAnalyticsTests(TestCase):
+    def setUp(self):
+        self.level = Level.objects.create(name='Beginner', code='beginner')
+        self.questions = []
+        for i in range(2):
+            question = Question.objects.create(level=self.level, question_text=f"Savol {i}")
+            right = Answer.objects.create(question=question, answer_text="Ha", is_correct=True)
+            wrong = Answer.objects.create(question=question, answer_text="Yo'q", order=1)
+            self.questions.append((question, right, wrong))
+
+    def add_result(self, score, correct_flags):
+        session = TestSession.objects.create(
+            session_id=f'IT_A_{TestSession.objects.count()}', level=self.level,
+            first_name='Ali', last_name='Valiyev'
+        )
+        TestResult.objects.create(session=session, score=score)
+        question_ids = [question.id for question, _, _ in self.questions]
+        answer_ids = [
+            (right if flag else wrong).id
+            for (_, right, wrong), flag in zip(self.questions, correct_flags)
+        ]
+        with self.assertNumQueries(2):
+            record_responses(session, question_ids, answer_ids)
+
+    def test_difficulty_and_discrimination(self):
+        self.add_result(100, (True, True))
+        self.add_result(50, (True, False))
+        self.add_result(50, (False, True))
+        self.add_result(0, (False, False))
+
+        items = {item['question_id']: item for item in item_statistics(self.level)}
+        first = items[self.questions[0][0].id]
+        self.assertEqual(first['responses'], 4)
+        self.assertEqual(first['difficulty'], 0.5)
+        self.assertAlmostEqual(first['discrimination'], 0.707, places=3)
+
+    def test_corrected_answer_key_changes_difficulty(self):
+        self.add_result(0, (False, False))
+        question, _, wrong = self.questions[0]
+        Answer.objects.filter(id=wrong.id).update(is_correct=True)
+        items = {item['question_id']: item for item in item_statistics(self.level)}
+        self.assertEqual(items[question.id]['difficulty'], 1.0)
+        self.assertTrue(is_flagged(items[question.id]))
+
+
+@override_settings(ADMIN_TELEGRAM_ID='1000', TELEGRAM_OUTBOX_THREAD=False)
+class TelegramOutboxTests(TestCase):
+    def setUp(self):
+        self.level = Level.objects.create(name='Beginner', code='beginner')
+        question = Question.objects.create(level=self.level, question_text="Savol")
+        self.answer = Answer.objects.create(question=question, answer_text="Ha", is_correct=True)
+        self.question = question
+        TestSession.objects.create(
+            session_id='IT_TEST_3', level=self.level,
+            first_name='Ali', last_name='Valiyev', phone_number='998901234567'
+        )
+
+    def submit(self):
+        return self.client.post(
+            '/api/submit-test/',
+            data=json.dumps({
+                'session_id': 'IT_TEST_3',
+                'answers': [{'question_id': self.question.id, 'answer_id': self.answer.id}],
+                'time_taken': 30,
+            }),
+            content_type='application/json',
+            secure=True,
+        )
+
+    def test_submit_queues_messages_without_sending(self):
+        with FakeTelegramServer() as server, override_settings(TELEGRAM_API_URL=server.url):
+            data = self.submit().json()
+        self.assertTrue(data['success'])
+        # Navbatga qo'yilgan xabar hali yuborilgan deb ko'rsatilmaydi
+        self.assertFalse(data['telegram_sent'])
+        self.assertTrue(data['telegram_queued'])
+        self.assertFalse(data['admin_notified'])
+        self.assertTrue(data['admin_queued'])
+        self.assertEqual(server.requests, [])
+        self.assertEqual(
+            sorted(TelegramMessage.objects.values_list('kind', flat=True)),
+            ['admin_result', 'user_result'],
+        )
+        result = TestResult.objects.get()
+        self.assertFalse(result.telegram_sent)
+        self.assertFalse(result.admin_notified)
+
+    def test_delivery_marks_result(self):
+        self.submit()
+        with FakeTelegramServer() as server, override_settings(TELEGRAM_API_URL=server.url):
+            self.assertEqual(deliver_pending(), 2)
+        self.assertEqual(
+            sorted(payload['chat_id'] for _, payload in server.requests),
+            ['1000', '998901234567'],
+        )
+        result = TestResult.objects.get()
+        self.assertTrue(result.telegram_sent)
+        self.assertTrue(result.admin_notified)
+        self.assertFalse(TelegramMessage.objects.exclude(status=TelegramMessage.STATUS_SENT).exists())
+
+    def test_failed_delivery_is_retried_later(self):
+        self.submit()
+        responses = [(502, {'ok': False}), (400, {'ok': False, 'description': 'chat not found'})]
+        with FakeTelegramServer(responses) as server, override_settings(TELEGRAM_API_URL=server.url):
+            self.assertEqual(deliver_pending(), 0)
+            # Qayta urinish vaqti hali kelmagan
+            self.assertEqual(deliver_pending(), 0)
+        self.assertEqual(len(server.requests), 2)
+
+        retried = TelegramMessage.objects.get(status=TelegramMessage.STATUS_PENDING)
+        self.assertEqual(retried.attempts, 1)
+        self.assertGreater(retried.next_attempt_at, timezone.now())
+        failed = TelegramMessage.objects.get(status=TelegramMessage.STATUS_FAILED)
+        self.assertIn('400', failed.last_error)
+
+    def test_admin_notifications_are_coalesced_into_digest(self):
+        for i in range(3):
+            enqueue('admin_notification', '1000', f"Yangi test {i}")
+        # Digest oynasi hali ochiq
+        self.assertEqual(len(set(TelegramMessage.objects.values_list('next_attempt_at', flat=True))), 1)
+        with FakeTelegramServer() as server, override_settings(TELEGRAM_API_URL=server.url):
+            self.assertEqual(deliver_pending(), 0)
+            TelegramMessage.objects.update(next_attempt_at=timezone.now())
+            self.assertEqual(deliver_pending(), 3)
+        self.assertEqual(len(server.requests), 1)
+        path, payload = server.requests[0]
+        self.assertTrue(path.endswith('/sendMessage'))
+        self.assertIn('3 ta yangi test boshlandi', payload['text'])
+        self.assertIn('Yangi test 2', payload['text'])
+
+    def test_message_reclaimed_by_another_worker_is_not_resent(self):
+        enqueue('admin_result', '1000', "Birinchi")
+        second = enqueue('admin_result', '1000', "Ikkinchi")
+        from . import outbox
+        real_deliver = outbox.deliver
+
+        def slow_deliver(batch, client):
+            # Birinchi yuborish paytida band qilish muddati o'tdi va
+            # ikkinchi xabarni boshqa worker olib qo'ydi
+            TelegramMessage.objects.filter(pk=second.pk).update(
+                next_attempt_at=timezone.now() + timedelta(seconds=outbox.CLAIM_TIMEOUT)
+            )
+            return real_deliver(batch, client)
+
+        with FakeTelegramServer() as server, override_settings(TELEGRAM_API_URL=server.url), \
+                mock.patch.object(outbox, 'deliver', side_effect=slow_deliver):
+            self.assertEqual(deliver_pending(), 1)
+        self.assertEqual([payload['text'] for _, payload in server.requests], ["Birinchi"])
+        second.refresh_from_db()
+        self.assertEqual((second.status, second.attempts), (TelegramMessage.STATUS_PENDING, 0))
+
+    def test_rate_limit_honours_retry_after(self):
+        enqueue('admin_result', '1000', "Birinchi")
+        enqueue('admin_result', '1000', "Ikkinchi")
+        responses = [(429, {'ok': False, 'parameters': {'retry_after': 120}})]
+        with FakeTelegramServer(responses) as server, override_settings(TELEGRAM_API_URL=server.url):
+            self.assertEqual(deliver_pending(), 0)
+            self.assertGreater(get_client().retry_after(), 100)
+        # Ikkinchi xabar umuman yuborilmadi va urinish sanalmadi
+        self.assertEqual(len(server.requests), 1)
+        first, second = TelegramMessage.objects.order_by('id')
+        self.assertEqual((first.attempts, second.attempts), (1, 0))
+        for message in (first, second):
+            self.assertGreater(message.next_attempt_at, timezone.now() + timedelta(seconds=100))
+
+
+@override_settings(TELEGRAM_OUTBOX_THREAD=True)
+class OutboxWorkerDigestTests(TransactionTestCase):
+    """Worker har bir commit da uyg'onadi, lekin digest oynasini kutadi"""
+
+    def test_burst_is_sent_as_one_digest(self):
+        from . import outbox
+        burst_worker = outbox.OutboxWorker()
+        with FakeTelegramServer() as server, override_settings(TELEGRAM_API_URL=server.url), \
+                mock.patch.object(outbox, 'worker', burst_worker), \
+                mock.patch.object(outbox, 'DIGEST_DELAY', 2), \
+                mock.patch.object(outbox, 'POLL_INTERVAL', 0.05):
+            try:
+                for i in range(5):
+                    with transaction.atomic():
+                        enqueue('admin_notification', '1000', f"Yangi test {i}")
+                    time.sleep(0.1)
+                # Oyna davomida hech narsa yuborilmadi
+                self.assertEqual(server.requests, [])
+                deadline = time.monotonic() + 5
+                while not server.requests and time.monotonic() < deadline:
+                    time.sleep(0.05)
+                time.sleep(0.2)
+            finally:
+                burst_worker.stop(timeout=5)
+        self.assertEqual(len(server.requests), 1)
+        self.assertIn('5 ta yangi test boshlandi', server.requests[0][1]['text'])
+        self.assertEqual(
+            TelegramMessage.objects.filter(status=TelegramMessage.STATUS_SENT).count(), 5
+        )
+
+
+@override_settings(TELEGRAM_OUTBOX_THREAD=False)
+class AdminNotificationSettingsTests(TestCase):
+    """Admin chat ID loyiha sozlamalaridan olinadi (override siz)"""
+
+    def test_admin_messages_use_project_setting(self):
+        level = Level.objects.create(name='Beginner', code='beginner')
+        response = self.client.post(
+            '/api/start-session/',
+            data=json.dumps({'level_id': level.id, 'first_name': 'Ali', 'last_name': 'Valiyev'}),
+            content_type='application/json', secure=True,
+        )
+        session_id = response.json()['session_id']
+        self.client.post(
+            '/api/submit-test/',
+            data=json.dumps({'session_id': session_id, 'answers': [], 'time_taken': 30}),
+            content_type='application/json', secure=True,
+        )
+        self.assertEqual(
+            sorted(TelegramMessage.objects.values_list('kind', 'chat_id')),
+            [('admin_notification', settings.ADMIN_TELEGRAM_ID), ('admin_result', settings.ADMIN_TELEGRAM_ID)],
+        )
+
+
+class StatisticsTests(TestCase):
+    def setUp(self):
+        invalidate_statistics()
+        for order in range(5):
+            level = Level.objects.create(name=f"Daraja {order}", code=f"level_{order}", order=order)
+            for i in range(3):
+                session = TestSession.objects.create(
+                    session_id=f"IT_{order}_{i}", level=level,
+                    first_name='Ali', last_name='Valiyev', completed=True
+                )
+                TestResult.objects.create(session=session, score=10 * (order + i), time_taken=60)
+        TestSession.objects.create(session_id='IT_OPEN', level=level, first_name='Ali', last_name='Valiyev')
+        rebuild_daily_stats()
+
+    def test_statistics_query_count_is_constant(self):
+        with self.assertNumQueries(1):
+            context = get_statistics()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_statistics(), context)
+
+        self.assertEqual(context['total_tests'], 16)
+        self.assertEqual(context['completed_tests'], 15)
+        self.assertEqual(context['avg_score'], 30.0)
+        self.assertEqual([row['level'] for row in context['level_stats']], [f"Daraja {i}" for i in range(5)])
+        self.assertEqual(context['level_stats'][1], {'level': 'Daraja 1', 'count': 3, 'avg_score': 20.0})
+
+    def test_rebuild_computes_sums(self):
+        stat = DailyLevelStat.objects.get(level__code='level_1')
+        self.assertEqual((stat.started, stat.count, stat.time_sum), (3, 3, 180))
+        self.assertEqual(stat.score_sum, 60)
+        self.assertEqual(stat.score_sq_sum, 100 + 400 + 900)
+        self.assertAlmostEqual(stat.score_stddev, (200 / 3) ** 0.5)
+
+    @override_settings(TELEGRAM_BOT_TOKEN='')
+    def test_submit_updates_daily_stats_incrementally(self):
+        level = Level.objects.get(code='level_4')
+        get_statistics()
+        response = self.client.post(
+            '/api/start-session/',
+            data=json.dumps({'level_id': level.id, 'first_name': 'Vali', 'last_name': 'Aliyev'}),
+            content_type='application/json', secure=True,
+        )
+        session_id = response.json()['session_id']
+        self.client.post(
+            '/api/submit-test/',
+            data=json.dumps({'session_id': session_id, 'answers': [], 'time_taken': 40}),
+            content_type='application/json', secure=True,
+        )
+
+        stat = DailyLevelStat.objects.get(level=level)
+        self.assertEqual((stat.started, stat.count, stat.time_sum), (5, 4, 220))
+        context = get_statistics()
+        self.assertEqual((context['total_tests'], context['completed_tests']), (17, 16))
+        self.assertEqual(context['level_stats'][-1]['count'], 4)
+
+    def test_deletes_decrement_daily_stats(self):
+        # /statistics/ ning konteksti (shablon bu daraxtda yo'q)
+        get_statistics()
+        TestResult.objects.get(session__session_id='IT_1_2').delete()
+
+        context = get_statistics()
+        self.assertEqual((context['total_tests'], context['completed_tests']), (16, 14))
+        self.assertEqual(context['level_stats'][1], {'level': 'Daraja 1', 'count': 2, 'avg_score': 15.0})
+        stat = DailyLevelStat.objects.get(level__code='level_1')
+        self.assertEqual((stat.started, stat.count, stat.time_sum), (3, 2, 120))
+        self.assertEqual(stat.score_sq_sum, 100 + 400)
+
+        # Sessiya bilan birga natija ham (cascade) o'chadi
+        TestSession.objects.filter(session_id='IT_2_0').delete()
+        context = get_statistics()
+        self.assertEqual((context['total_tests'], context['completed_tests']), (15, 13))
+        self.assertEqual(context['level_stats'][2], {'level': 'Daraja 2', 'count': 2, 'avg_score': 35.0})
+
+    def test_migration_backfill_matches_rebuild(self):
+        from importlib import import_module
+        from django.apps import apps
+
+        migration = import_module('test_app.migrations.0004_dailylevelstat')
+        expected = sorted(DailyLevelStat.objects.values_list(
+            'level', 'date', 'started', 'count', 'score_sum', 'score_sq_sum', 'time_sum'
+        ))
+        DailyLevelStat.objects.all().delete()
+        migration.backfill_daily_stats(apps, None)
+        self.assertEqual(sorted(DailyLevelStat.objects.values_list(
+            'level', 'date', 'started', 'count', 'score_sum', 'score_sq_sum', 'time_sum'
+        )), expected)
+
+
+class ResultsPaginationTests(TestCase):
+    def setUp(self):
+        level = Level.objects.create(name='Beginner', code='beginner')
+        for i in range(7):
+            session = TestSession.objects.create(
+                session_id=f"IT_{i}", level=level, first_name=f"Ism{i}", last_name='Familya'
+            )
+            TestResult.objects.create(session=session, score=i)
+        # Bir xil vaqtli qatorlar ham tushib qolmasligi kerak
+        TestResult.objects.filter(score__in=[2, 3, 4]).update(
+            created_at=TestResult.objects.get(score=2).created_at
+        )
+        staff = User.objects.create_user('admin', password='parol', is_staff=True)
+        self.client.force_login(staff)
+
+    def test_keyset_pages_cover_all_rows_once(self):
+        seen = []
+        cursor = None
+        while True:
+            page, cursor = keyset_page(TestResult.objects.all(), cursor, size=3)
+            seen.extend(result.score for result in page)
+            if cursor is None:
+                break
+        self.assertEqual(sorted(seen), list(range(7)))
+        self.assertEqual(len(seen), 7)
+
+    def test_results_api_follows_cursor(self):
+        first = self.client.get('/api/results/', {'limit': 4}, secure=True).json()
+        second = self.client.get(
+            '/api/results/', {'limit': 4, 'cursor': first['next_cursor']}, secure=True
+        ).json()
+        self.assertEqual(len(first['results']), 4)
+        self.assertEqual(len(second['results']), 3)
+        self.assertIsNone(second['next_cursor'])
+        ids = [row['id'] for row in first['results'] + second['results']]
+        self.assertEqual(len(set(ids)), 7)
+        self.assertEqual(first['results'][0]['level'], 'Beginner')
+
+        bad = self.client.get('/api/results/', {'cursor': 'yaroqsiz'}, secure=True)
+        self.assertEqual(bad.status_code, 400)
+
+    def test_export_streams_csv_and_ndjson(self):
+        response = self.client.get('/api/results/export/', {'format': 'csv'}, secure=True)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:3], ['id', 'session_id', 'first_name'])
+        self.assertEqual(len(lines), 8)
+
+        response = self.client.get('/api/results/export/', {'format': 'ndjson'}, secure=True)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(len(rows), 7)
+        self.assertIn('phone_number', rows[0])
+
+    def test_export_requires_staff(self):
+        self.client.logout()
+        response = self.client.get('/api/results/export/', secure=True)
+        self.assertEqual(response.status_code, 302)
+
+
+class SQLitePragmaTests(TestCase):
+    def test_pragmas_are_applied_to_connections(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 20000)
+
+
+class LevelsCacheTests(TestCase):
+    def setUp(self):
+        levels_cache.invalidate()
+        self.level = Level.objects.create(name='Beginner', code='beginner')
+
+    def test_payload_is_cached_and_revalidated(self):
+        response = self.client.get('/api/levels/', secure=True)
+        self.assertEqual(response.json()['levels'][0]['code'], 'beginner')
+        etag = response.headers['ETag']
+        # Qurilish vaqti workerlar orasida farq qiladi - faqat ETag
+        self.assertNotIn('Last-Modified', response.headers)
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/levels/', secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        # Boshqa worker (yoki qayta qurish) o'sha tana uchun o'sha ETag ni beradi
+        levels_cache.invalidate()
+        response = self.client.get('/api/levels/', secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_level_change_invalidates_payload(self):
+        etag = self.client.get('/api/levels/', secure=True).headers['ETag']
+        self.level.name = 'Starter'
+        self.level.save()
+
+        response = self.client.get('/api/levels/', secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['levels'][0]['name'], 'Starter')
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+
+@override_settings(ROOT_URLCONF='test_project.urls_async', TELEGRAM_OUTBOX_THREAD=False)
+class AsyncApiTests(TestCase):
+    def setUp(self):
+        snapshot_store.invalidate()
+        self.level = Level.objects.create(name='Beginner', code='beginner', question_count=3)
+        self.questions = [
+            Question.objects.create(level=self.level, question_text=f"Savol {i}")
+            for i in range(3)
+        ]
+        self.answers = [
+            Answer.objects.create(question=question, answer_text="Ha", is_correct=True)
+            for question in self.questions
+        ]
+
+    async def test_async_flow_matches_sync_api(self):
+        response = await self.async_client.get('/api/levels/', secure=True)
+        self.assertEqual(response.json()['levels'][0]['code'], 'beginner')
+
+        response = await self.async_client.post(
+            '/api/start-session/',
+            data={'level_id': self.level.id, 'first_name': 'Ali', 'last_name': 'Valiyev'},
+            content_type='application/json', secure=True,
+        )
+        session_id = response.json()['session_id']
+
+        response = await self.async_client.get(f'/api/questions/{session_id}/', secure=True)
+        self.assertEqual(len(response.json()['questions']), 3)
+
+        response = await self.async_client.post(
+            '/api/submit-test/',
+            data={
+                'session_id': session_id,
+                'answers': [
+                    {'question_id': answer.question_id, 'answer_id': answer.id}
+                    for answer in self.answers[:2]
+                ],
+                'time_taken': 40,
+            },
+            content_type='application/json', secure=True,
+        )
+        self.assertEqual(response.json()['correct'], 2)
+
+        response = await self.async_client.get(f'/api/test-results/{session_id}/', secure=True)
+        self.assertEqual(response.json()['result']['correct_answers'], 2)
+        self.assertTrue(await TestSession.objects.filter(session_id=session_id, completed=True).aexists())
+
+        response = await self.async_client.get('/api/test-results/IT_YOQ/', secure=True)
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class AdminChangelistTests(TestCase):
+    def setUp(self):
+        self.level = Level.objects.create(name='Beginner', code='beginner')
+        self.number = 0
+        admin_user = User.objects.create_superuser('admin', password='parol')
+        self.client.force_login(admin_user)
+
+    def add_results(self, count):
+        for _ in range(count):
+            self.number += 1
+            session = TestSession.objects.create(
+                session_id=f"IT_{self.number:05d}", level=self.level, first_name='Ali',
+                last_name=f"Valiyev{self.number}", phone_number=f"+99890{self.number:07d}", completed=True,
+            )
+            TestResult.objects.create(session=session, score=80, correct_answers=8, total_questions=10)
+
+    def changelist_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, secure=True)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_queries_do_not_grow_with_rows(self):
+        for url in ('/admin/test_app/testresult/', '/admin/test_app/testsession/'):
+            self.add_results(5)
+            small = self.changelist_queries(url)
+            self.add_results(15)
+            self.assertEqual(self.changelist_queries(url), small, url)
+
+    def test_estimated_count_paginator(self):
+        self.add_results(5)
+        paginator = EstimatedCountPaginator(TestResult.objects.all(), 2)
+        paginator.count_limit = 3
+        # Filtrsiz: jadval taxmini, filtrlangan: chegaralangan son
+        self.assertEqual(paginator.count, 5)
+        bounded = EstimatedCountPaginator(TestResult.objects.filter(score=80), 2)
+        bounded.count_limit = 3
+        self.assertEqual(bounded.count, 3)
+
+    def test_prefix_search(self):
+        self.add_results(12)
+        response = self.client.get('/admin/test_app/testresult/', {'q': 'valiyev1'}, secure=True)
+        # Valiyev1, Valiyev10, Valiyev11, Valiyev12
+        self.assertEqual(response.context['cl'].result_count, 4)
+        response = self.client.get('/admin/test_app/testsession/', {'q': '+998900000007'}, secure=True)
+        self.assertEqual(response.context['cl'].result_count, 1)
+        response = self.client.get('/admin/test_app/testsession/', {'q': 'it_0000'}, secure=True)
+        self.assertEqual(response.context['cl'].result_count, 9)
+
+    def test_search_by_full_name_and_lowercase_session_id(self):
+        self.add_results(3)
+        TestSession.objects.create(
+            session_id='IT_20241018_ABCD1234', level=self.level, first_name='Vali', last_name='Aliyev'
+        )
+        for q, expected in (('Ali Valiyev2', 1), ('valiyev ali', 3), ('ali', 4), ('Ali Karimov', 0)):
+            response = self.client.get('/admin/test_app/testsession/', {'q': q}, secure=True)
+            self.assertEqual(response.context['cl'].result_count, expected, q)
+        response = self.client.get('/admin/test_app/testresult/', {'q': 'ali valiyev1'}, secure=True)
+        self.assertEqual(response.context['cl'].result_count, 1)
+        response = self.client.get('/admin/test_app/testsession/', {'q': 'it_20241018_abcd'}, secure=True)
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+    def test_name_search_uses_indexes(self):
+        self.add_results(3)
+        for url in ('/admin/test_app/testsession/', '/admin/test_app/testresult/'):
+            response = self.client.get(url, {'q': 'ali val'}, secure=True)
+            queryset = response.context['cl'].result_list
+            sql, params = queryset.query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+                plan = ' '.join(row[-1] for row in cursor.fetchall())
+            self.assertIn('session_first_name_idx', plan, url)
+            self.assertNotIn('SCAN test_app_testsession', plan, url)
+
+
+@override_settings(TELEGRAM_OUTBOX_THREAD=False)
+class LoadHarnessTests(TestCase):
+    def setUp(self):
+        snapshot_store.invalidate()
+        self.level = Level.objects.create(name='Beginner', code='beginner', question_count=3)
+        for i in range(5):
+            question = Question.objects.create(level=self.level, question_text=f"Savol {i}")
+            Answer.objects.create(question=question, answer_text="Ha", is_correct=True)
+            Answer.objects.create(question=question, answer_text="Yo'q", order=1)
+
+    def test_take_test_records_every_endpoint(self):
+        stats = LoadStats()
+        self.assertTrue(take_test(ClientTransport(), self.level.id, stats, random.Random(0)))
+        rows = {row['endpoint']: row for row in stats.report(1.0)}
+        self.assertEqual(set(rows), {'start-session', 'questions', 'submit-test', 'test-result'})
+        for row in rows.values():
+            self.assertEqual((row['count'], row['errors']), (1, 0))
+            self.assertGreater(row['queries'], 0)
+        self.assertEqual(TestResult.objects.get().total_questions, 3)
+
+    def test_failed_step_stops_the_flow(self):
+        stats = LoadStats()
+        self.assertFalse(take_test(ClientTransport(), 0, stats, random.Random(0)))
+        rows = {row['endpoint']: row for row in stats.report(1.0)}
+        self.assertEqual(rows['start-session']['errors'], 1)
+        self.assertEqual(rows['questions']['count'] + rows['questions']['errors'], 0)
+
+
+@override_settings(TELEGRAM_OUTBOX_THREAD=False, METRICS_TOKEN='maxfiy')
+class MetricsTests(TestCase):
+    def setUp(self):
+        metrics_registry.reset()
+        levels_cache.invalidate()
+        Level.objects.create(name='Beginner', code='beginner')
+
+    def test_requests_are_counted_per_view(self):
+        self.client.get('/api/levels/', secure=True)
+        self.client.get('/api/levels/', secure=True)
+        self.assertEqual(metrics_registry.responses[('get_levels', 200)], 2)
+        self.assertEqual(metrics_registry.durations['get_levels'].count, 2)
+        # Birinchi so'rov bazadan o'qiydi, ikkinchisi keshdan
+        self.assertGreater(metrics_registry.queries['get_levels'], 0)
+        self.assertGreater(metrics_registry.db_time['get_levels'], 0)
+
+        response = self.client.get('/metrics/', secure=True, HTTP_AUTHORIZATION='Bearer maxfiy')
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('http_responses_total{view="get_levels",status="200"} 2', body)
+        self.assertIn('http_request_duration_seconds_count{view="get_levels"} 2', body)
+
+    def test_metrics_endpoint_is_restricted(self):
+        response = self.client.get('/metrics/', secure=True, REMOTE_ADDR='10.0.0.5')
+        self.assertEqual(response.status_code, 403)
+        # Lokal proksi ortida loopback manzili o'z-o'zidan ruxsat bermaydi
+        response = self.client.get('/metrics/', secure=True)
+        self.assertEqual(response.status_code, 403)
+        with override_settings(METRICS_ALLOWED_IPS=['10.0.0.5'], RATE_LIMIT_PROXY_COUNT=1):
+            response = self.client.get('/metrics/', secure=True, HTTP_X_FORWARDED_FOR='10.0.0.5')
+            self.assertEqual(response.status_code, 200)
+            response = self.client.get('/metrics/', secure=True, HTTP_X_FORWARDED_FOR='8.8.8.8')
+            self.assertEqual(response.status_code, 403)
+        with override_settings(METRICS_TOKEN='maxfiy'):
+            response = self.client.get(
+                '/metrics/', secure=True, REMOTE_ADDR='10.0.0.5', HTTP_AUTHORIZATION='Bearer maxfiy'
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_telegram_calls_are_timed(self):
+        with FakeTelegramServer([(400, {'ok': False})]) as server, override_settings(TELEGRAM_API_URL=server.url):
+            get_client().send_message('1', 'salom')
+            get_client().send_message('1', 'salom')
+        self.assertEqual(metrics_registry.outbound['telegram'], 2)
+        self.assertEqual(metrics_registry.outbound_errors['telegram'], 1)
+        self.assertGreater(metrics_registry.outbound_time['telegram'], 0)
+
+    def test_sampled_profiles_keep_only_slowest(self):
+        profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, profile_dir, ignore_errors=True)
+        with override_settings(
+            METRICS_PROFILE_SAMPLE_RATE=1.0, METRICS_PROFILE_DIR=profile_dir, METRICS_PROFILE_KEEP=2
+        ):
+            for _ in range(4):
+                self.client.get('/api/levels/', secure=True)
+        profiles = os.listdir(profile_dir)
+        self.assertEqual(len(profiles), 2)
+        self.assertTrue(all(name.endswith('.prof') and '-get_levels-' in name for name in profiles))
+
+
+class LoggingTests(TestCase):
+    def setUp(self):
+        self.log_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.log_dir, ignore_errors=True)
+        self.filename = os.path.join(self.log_dir, 'app.log')
+
+    def make_logger(self, handler):
+        logger = logging.getLogger(f'test_app.tests.{self._testMethodName}')
+        logger.propagate = False
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+        return logger
+
+    def test_json_lines_with_exception_and_extra(self):
+        handler = QueueListenerHandler(self.filename, console=False)
+        self.addCleanup(handler.close)
+        logger = self.make_logger(handler)
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            logger.exception("Xatolik: %s", 'IT_1', extra={'session_id': 'IT_1'})
+        logger.warning("Ikkinchi")
+        handler.flush()
+
+        with open(self.filename, encoding='utf-8') as f:
+            first, second = [json.loads(line) for line in f]
+        self.assertEqual((first['level'], first['message'], first['session_id']), ('ERROR', 'Xatolik: IT_1', 'IT_1'))
+        self.assertIn('ZeroDivisionError', first['exc'])
+        self.assertEqual(second['message'], 'Ikkinchi')
+        self.assertNotIn('exc', second)
+
+    @unittest.skipIf(logs.fcntl is None, "fcntl yo'q")
+    def test_file_is_rotated_by_size(self):
+        handler = QueueListenerHandler(self.filename, max_bytes=1000, backup_count=2, console=False)
+        self.addCleanup(handler.close)
+        logger = self.make_logger(handler)
+        for i in range(100):
+            logger.warning("Qator %s", i)
+        handler.flush()
+        self.assertEqual(sorted(os.listdir(self.log_dir)), ['app.log', 'app.log.1', 'app.log.2', 'app.log.lock'])
+        self.assertLessEqual(os.path.getsize(self.filename), 1000)
+
+    @unittest.skipIf(logs.fcntl is None, "fcntl yo'q")
+    def test_processes_share_rotation_without_losing_lines(self):
+        script = (
+            "import logging, sys\n"
+            "from test_app.logs import QueueListenerHandler\n"
+            "handler = QueueListenerHandler(sys.argv[1], max_bytes=2000, backup_count=100, console=False)\n"
+            "logger = logging.getLogger('worker')\n"
+            "logger.addHandler(handler)\n"
+            "for i in range(300):\n"
+            "    logger.warning('%s %s', sys.argv[2], i)\n"
+            "handler.flush()\n"
+        )
+        workers = [
+            subprocess.Popen([sys.executable, '-c', script, self.filename, name], cwd=settings.BASE_DIR)
+            for name in ('a', 'b')
+        ]
+        for worker in workers:
+            self.assertEqual(worker.wait(timeout=60), 0)
+
+        messages = []
+        for name in os.listdir(self.log_dir):
+            if name.endswith('.lock'):
+                continue
+            path = os.path.join(self.log_dir, name)
+            # Aylantirilgan har bir fayl chegaradan bir qatordan ortiq oshmaydi
+            self.assertLess(os.path.getsize(path), 2200, name)
+            with open(path, encoding='utf-8') as f:
+                messages += [json.loads(line)['message'] for line in f]
+        self.assertEqual(sorted(messages), sorted(f'{name} {i}' for name in 'ab' for i in range(300)))
+
+    def test_shared_file_is_reopened_after_external_rotation(self):
+        handler = QueueListenerHandler(self.filename, console=False)
+        self.addCleanup(handler.close)
+        logger = self.make_logger(handler)
+        logger.warning("Birinchi")
+        handler.flush()
+        # logrotate: fayl qayta nomlanadi, handler yangi faylni ochadi
+        os.rename(self.filename, f'{self.filename}.1')
+        logger.warning("Ikkinchi")
+        handler.flush()
+        for filename, message in ((f'{self.filename}.1', 'Birinchi'), (self.filename, 'Ikkinchi')):
+            with open(filename, encoding='utf-8') as f:
+                self.assertEqual([json.loads(line)['message'] for line in f], [message])
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        handler = QueueListenerHandler(self.filename, console=False, queue_size=1)
+        self.addCleanup(handler.close)
+        handler.listener.stop()
+        logger = self.make_logger(handler)
+        for i in range(3):
+            logger.warning("Qator %s", i)
+        self.assertEqual(handler.dropped, 2)
+        self.assertEqual(json.loads(JsonFormatter().format(handler.queue.get_nowait()))['message'], 'Qator 0')
+
+        with override_settings(METRICS_TOKEN='maxfiy'):
+            response = self.client.get('/metrics/', secure=True, HTTP_AUTHORIZATION='Bearer maxfiy')
+        dropped = next(
+            line for line in response.content.decode().splitlines() if line.startswith('log_records_dropped_total ')
+        )
+        self.assertGreaterEqual(int(dropped.split()[1]), 2)
+
+
+@override_settings(
+    TELEGRAM_OUTBOX_THREAD=False,
+    RATE_LIMITS={'start_session': {'ip': (2, 60), 'phone': (1, 600)}},
+)
+class ThrottlingTests(TestCase):
+    def setUp(self):
+        throttling.reset()
+        self.level = Level.objects.create(name='Beginner', code='beginner')
+
+    def start(self, ip, phone='', client=None):
+        return (client or self.client).post(
+            '/api/start-session/',
+            data={'level_id': self.level.id, 'first_name': 'Ali', 'last_name': 'Valiyev', 'phone_number': phone},
+            content_type='application/json', secure=True, REMOTE_ADDR=ip,
+        )
+
+    def test_ip_bucket(self):
+        self.assertEqual(self.start('10.0.0.1').status_code, 200)
+        self.assertEqual(self.start('10.0.0.1').status_code, 200)
+        response = self.start('10.0.0.1')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertEqual(self.start('10.0.0.2').status_code, 200)
+        self.assertEqual(TestSession.objects.count(), 3)
+
+    def test_phone_bucket_across_ips(self):
+        self.assertEqual(self.start('10.0.0.1', '+998 90 123-45-67').status_code, 200)
+        self.assertEqual(self.start('10.0.0.2', '998901234567').status_code, 429)
+
+    def test_token_bucket_refills(self):
+        limiter = throttling.TokenBucketLimiter(2, 60)
+        self.assertEqual(limiter.consume('a', now=0), 0)
+        self.assertEqual(limiter.consume('a', now=0), 0)
+        self.assertAlmostEqual(limiter.consume('a', now=0), 30)
+        self.assertEqual(limiter.consume('a', now=30), 0)
+
+    @override_settings(ADMISSION_MAX_WRITERS=0, ADMISSION_MAX_WAITING=0)
+    def test_admission_sheds_load_when_writers_are_busy(self):
+        response = self.start('10.0.0.1')
+        self.assertEqual(response.status_code, 429)
+        self.assertFalse(TestSession.objects.exists())
+
+    @unittest.skipIf(throttling.fcntl is None, "fcntl yo'q")
+    def test_writer_slots_are_shared_across_processes(self):
+        lock_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, lock_dir, ignore_errors=True)
+        # Boshqa worker jarayoni yagona slotni band qilib turadi
+        holder = subprocess.Popen(
+            [sys.executable, '-c', (
+                "import fcntl, os, sys\n"
+                f"fd = os.open(os.path.join({lock_dir!r}, 'slot-0.lock'), os.O_RDWR | os.O_CREAT)\n"
+                "fcntl.flock(fd, fcntl.LOCK_EX)\n"
+                "print('ok', flush=True)\n"
+                "sys.stdin.read()\n"
+            )],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+        )
+        self.addCleanup(holder.wait)
+        self.assertEqual(holder.stdout.readline().strip(), 'ok')
+
+        slots = throttling.WriterSlots()
+        with override_settings(ADMISSION_LOCK_DIR=lock_dir):
+            self.assertIsNone(slots.acquire(1, 1, 0.05))
+            self.assertEqual(slots.rejected, 1)
+            holder.stdin.close()
+            slot = slots.acquire(1, 1, 5)
+            self.assertIsNotNone(slot)
+            # Slot shu jarayonning boshqa oqimlari uchun ham band
+            self.assertIsNone(throttling.WriterSlots().try_acquire(1))
+            slots.release(slot)
+            throttling.WriterSlots().release(slots.try_acquire(1))
+
+    @override_settings(ROOT_URLCONF='test_project.urls_async')
+    async def test_async_views_are_throttled(self):
+        for _ in range(2):
+            await self.start('10.0.0.1', client=self.async_client)
+        response = await self.start('10.0.0.1', client=self.async_client)
+        self.assertEqual(response.status_code, 429)
+
+
+class TieredCacheTests(TestCase):
+    def setUp(self):
+        shared_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, shared_dir, ignore_errors=True)
+        settings_override = override_settings(CACHES={
+            'default': {'BACKEND': 'test_app.caching.TieredCache', 'OPTIONS': {'TIERS': ['local', 'shared']}},
+            'local': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tiered-tests',
+                'TIMEOUT': 30, 'OPTIONS': {'MAX_ENTRIES': 2, 'CULL_FREQUENCY': 2},
+            },
+            'shared': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': shared_dir,
+                'TIMEOUT': 300,
+            },
+        })
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        caches['local'].clear()
+        reset_counters()
+
+    def test_shared_tier_fills_local_tier(self):
+        caches['default'].set('kalit', {'qiymat': 1}, 120)
+        # Boshqa worker: lokal bosqich bo'sh, qiymat umumiy bosqichdan olinadi
+        caches['local'].clear()
+        self.assertEqual(caches['default'].get('kalit'), {'qiymat': 1})
+        self.assertEqual(caches['local'].get('kalit'), {'qiymat': 1})
+        self.assertEqual(caches['default'].get('kalit'), {'qiymat': 1})
+        self.assertIsNone(caches['default'].get('yoq'))
+        self.assertEqual(cache_counters(), {
+            ('local', 'miss'): 2, ('local', 'hit'): 1, ('shared', 'hit'): 1, ('shared', 'miss'): 1,
+        })
+
+    def test_local_ttl_is_capped_and_size_is_bounded(self):
+        default = caches['default']
+        default.set('kalit', 1, 120)
+        local = caches['local']
+        expiry = local._expire_info[local.make_key('kalit')]
+        self.assertLessEqual(expiry - time.time(), 30)
+        for i in range(5):
+            default.set(f'k{i}', i)
+        self.assertLessEqual(len(local._cache), 2)
+        self.assertEqual(default.get('k0'), 0)
+
+    def test_delete_and_add_reach_every_tier(self):
+        default = caches['default']
+        self.assertTrue(default.add('kalit', 1))
+        self.assertFalse(default.add('kalit', 2))
+        default.delete('kalit')
+        self.assertIsNone(caches['local'].get('kalit'))
+        self.assertIsNone(caches['shared'].get('kalit'))
+
+    def test_counters_in_metrics(self):
+        caches['default'].get('yoq')
+        with override_settings(METRICS_TOKEN='maxfiy'):
+            response = self.client.get('/metrics/', secure=True, HTTP_AUTHORIZATION='Bearer maxfiy')
+        self.assertIn('cache_requests_total{tier="shared",result="miss"} 1', response.content.decode())
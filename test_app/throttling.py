@@ -0,0 +1,259 @@
+# test_app/throttling.py
+"""
+Yozuvchi API lar (``start-session``, ``submit-test``) uchun so'rovlar
+cheklovi va yuklamani boshqarish.
+
+``rate_limit(scope)`` - IP va telefon raqami bo'yicha token bucket.
+Chegaralar ``settings.RATE_LIMITS`` da: ``{scope: {kalit: (so'rovlar, soniya)}}``,
+ya'ni ``soniya`` ichida ``so'rovlar`` tagacha ketma-ket so'rov, keyin har
+``soniya / so'rovlar`` da bittadan. Bucketlar jarayon xotirasida saqlanadi
+(har bir gunicorn worker alohida hisoblaydi).
+
+``admit_write`` - bir vaqtda bajarilayotgan yozuvchi so'rovlar soni
+``ADMISSION_MAX_WRITERS`` dan oshsa, so'rov navbatda kutadi; navbat ham to'lgan
+yoki ``ADMISSION_WAIT_TIMEOUT`` o'tgan bo'lsa darhol 429 qaytariladi. SQLite
+barcha jarayonlar uchun bitta yozish qulfiga ega, shuning uchun yozuvchilar
+soni ham barcha workerlar bo'yicha umumiy: ``ADMISSION_LOCK_DIR`` dagi slot
+fayllari ``fcntl.flock`` bilan band qilinadi (jarayon o'lsa qulf o'zi
+ochiladi). To'lqin paytida so'rovlar ``busy_timeout`` da uzoq kutib qolmaydi
+va haqiqiy foydalanuvchilar uchun kechikish barqaror qoladi. ``fcntl`` yo'q
+platformada (Windows) cheklov o'chiq.
+
+"""
+import json
+import math
+import os
+import threading
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+class TokenBucketLimiter:
+    """Kalit bo'yicha token bucket: sig'imi ``capacity``, ``period`` soniyada to'ladi"""
+
+    def __init__(self, capacity, period, max_keys=100000):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets = {}  # kalit -> (tokenlar, yangilangan vaqt)
+
+    def consume(self, key, now=None):
+        """Ruxsat bo'lsa 0, aks holda keyingi token uchun kutish (soniya)"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                wait = 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                wait = (1 - tokens) / self.rate
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+            return wait
+
+    def _prune(self, now):
+        # To'lib bo'lgan bucketlar yangisidan farq qilmaydi - o'chiriladi
+        self._buckets = {
+            key: (tokens, updated) for key, (tokens, updated) in self._buckets.items()
+            if tokens + (now - updated) * self.rate < self.capacity
+        }
+        if len(self._buckets) > self.max_keys:
+            # Hammasi faol (hujum) - xotira cheklanmagan o'sishidan ko'ra cheklovni unutgan yaxshi
+            self._buckets.clear()
+
+
+class WriterSlots:
+    """
+    Jarayonlar orasida umumiy semafor: ``limit`` ta slot fayli, har biri
+    ``flock`` bilan band qilinadi. Navbatdagilar soni (``waiting``) jarayon
+    ichida hisoblanadi.
+    """
+
+    poll_interval = 0.05
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.rejected = 0
+
+    def try_acquire(self, limit):
+        """Bo'sh slot deskriptori yoki ``None``"""
+        directory = settings.ADMISSION_LOCK_DIR
+        os.makedirs(directory, exist_ok=True)
+        for index in range(limit):
+            fd = os.open(os.path.join(directory, f"slot-{index}.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                continue
+            return fd
+        return None
+
+    def acquire(self, limit, max_waiting, timeout):
+        slot = self.try_acquire(limit)
+        if slot is not None:
+            return slot
+        with self._lock:
+            if self.waiting >= max_waiting:
+                self.rejected += 1
+                return None
+            self.waiting += 1
+        try:
+            deadline = time.monotonic() + timeout
+            delay = 0.002
+            while (remaining := deadline - time.monotonic()) > 0:
+                # Boshqa jarayondagi bo'shashni kutib bo'lmaydi - so'rash oralig'i asta oshadi
+                time.sleep(min(delay, remaining))
+                delay = min(delay * 2, self.poll_interval)
+                slot = self.try_acquire(limit)
+                if slot is not None:
+                    return slot
+        finally:
+            with self._lock:
+                self.waiting -= 1
+        with self._lock:
+            self.rejected += 1
+        return None
+
+    def release(self, slot):
+        # Deskriptor yopilganda flock ham ochiladi
+        os.close(slot)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+admission = WriterSlots()
+
+
+def get_limiter(scope, kind, capacity, period):
+    key = (scope, kind, capacity, period)
+    limiter = _limiters.get(key)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.setdefault(key, TokenBucketLimiter(capacity, period))
+    return limiter
+
+
+def reset():
+    """Barcha bucketlarni tozalaydi (testlar uchun)"""
+    with _limiters_lock:
+        _limiters.clear()
+
+
+def client_ip(request):
+    """
+    Mijoz IP si. ``RATE_LIMIT_PROXY_COUNT`` ta ishonchli proksi ortida
+    ``X-Forwarded-For`` ning o'ngdan shu raqamdagi qiymati olinadi
+    (chapdagilarini mijoz o'zi yozishi mumkin).
+    """
+    proxies = settings.RATE_LIMIT_PROXY_COUNT
+    if proxies:
+        forwarded = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def client_phone(request):
+    try:
+        data = json.loads(request.body)
+        phone = data.get('phone_number') if isinstance(data, dict) else None
+    except (ValueError, UnicodeDecodeError):
+        return None
+    digits = ''.join(ch for ch in str(phone or '') if ch.isdigit())
+    return digits or None
+
+
+KEY_FUNCTIONS = {
+    'ip': client_ip,
+    'phone': client_phone,
+}
+
+
+def too_many_requests(retry_after):
+    response = JsonResponse({
+        'success': False,
+        'error': "So'rovlar juda ko'p. Birozdan keyin qayta urinib ko'ring."
+    }, status=429)
+    response['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def check_rate(scope, request):
+    """Chegaradan oshgan bo'lsa 429 javob, aks holda ``None``"""
+    wait = 0.0
+    for kind, (capacity, period) in settings.RATE_LIMITS.get(scope, {}).items():
+        key = KEY_FUNCTIONS[kind](request)
+        if key:
+            wait = max(wait, get_limiter(scope, kind, capacity, period).consume(key))
+    return too_many_requests(wait) if wait else None
+
+
+def rate_limit(scope):
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                if request.method == 'POST':
+                    rejected = check_rate(scope, request)
+                    if rejected is not None:
+                        return rejected
+                return await view(request, *args, **kwargs)
+        else:
+            @wraps(view)
+            def wrapper(request, *args, **kwargs):
+                if request.method == 'POST':
+                    rejected = check_rate(scope, request)
+                    if rejected is not None:
+                        return rejected
+                return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def admit_write(view):
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            limit = settings.ADMISSION_MAX_WRITERS
+            if request.method != 'POST' or limit is None or fcntl is None:
+                return await view(request, *args, **kwargs)
+            # Bo'sh slot bo'lsa event loop dan chiqmasdan, aks holda kutish alohida oqimda
+            slot = admission.try_acquire(limit)
+            if slot is None:
+                slot = await sync_to_async(admission.acquire, thread_sensitive=False)(
+                    limit, settings.ADMISSION_MAX_WAITING, settings.ADMISSION_WAIT_TIMEOUT
+                )
+            if slot is None:
+                return too_many_requests(settings.ADMISSION_WAIT_TIMEOUT)
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                admission.release(slot)
+    else:
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            limit = settings.ADMISSION_MAX_WRITERS
+            if request.method != 'POST' or limit is None or fcntl is None:
+                return view(request, *args, **kwargs)
+            slot = admission.acquire(limit, settings.ADMISSION_MAX_WAITING, settings.ADMISSION_WAIT_TIMEOUT)
+            if slot is None:
+                return too_many_requests(settings.ADMISSION_WAIT_TIMEOUT)
+            try:
+                return view(request, *args, **kwargs)
+            finally:
+                admission.release(slot)
+    return wrapper
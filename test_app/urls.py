@@ -1,6 +1,6 @@
 # test_app/urls.py
 from django.urls import path
-from . import views
+from . import views, async_views
 
 urlpatterns = [
     # Asosiy sahifalar
@@ -15,6 +15,17 @@ urlpatterns = [
     path('api/questions/<str:session_id>/', views.get_questions, name='get_questions'),
     path('api/submit-test/', views.submit_test, name='submit_test'),
     path('api/test-results/<str:session_id>/', views.get_test_result, name='get_test_result'),
+    path('api/results/', views.results_api, name='results_api'),
+    path('api/results/export/', views.export_results, name='export_results'),
+]
+
+# ASGI uchun test oqimi API ning async versiyalari (test_project/urls_async.py)
+async_api_urlpatterns = [
+    path('api/levels/', async_views.get_levels, name='get_levels'),
+    path('api/start-session/', async_views.start_test_session, name='start_test_session'),
+    path('api/questions/<str:session_id>/', async_views.get_questions, name='get_questions'),
+    path('api/submit-test/', async_views.submit_test, name='submit_test'),
+    path('api/test-results/<str:session_id>/', async_views.get_test_result, name='get_test_result'),
 ]
 
 # BU QISMI O'CHIRING YO'Q QILING! Xatolik handlerlari faqat asosiy urls.py da bo'lishi kerak
\ No newline at end of file
@@ -1,14 +1,21 @@
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.utils import timezone
+from django.utils.dateparse import parse_date
+import csv
+import itertools
 import json
-import requests
-from .models import Level, Question, Answer, TestSession, TestResult
-import uuid
+from datetime import datetime, time, timedelta
+from .models import Level, TestSession, TestResult
+from .snapshots import get_snapshot
+from .levels import levels_cache, levels_response
+from .services import start_session, assign_questions, finish_session
+from .stats import get_statistics
+from .pagination import InvalidCursor, keyset_page
+from .throttling import admit_write, rate_limit
 import logging
-from django.db.models import Avg, Count
 
 logger = logging.getLogger(__name__)
 
@@ -43,34 +50,129 @@ def instructions(request):
     return render(request, 'test_app/instructions.html')
 
 def statistics(request):
-    total_tests = TestSession.objects.count()
-    completed_tests = TestSession.objects.filter(completed=True).count()
-    avg_score = TestResult.objects.aggregate(Avg('score'))['score__avg'] or 0
+    # Bitta guruhlangan so'rov, natija qisqa muddat keshlanadi (stats.py)
+    return render(request, 'test_app/statistics.html', get_statistics())
+
+def all_results(request):
+    # Kursorli sahifalash: ?cursor=... keyingi (eskiroq) natijalar
+    try:
+        results, next_cursor = keyset_page(
+            TestResult.objects.select_related('session', 'session__level'),
+            request.GET.get('cursor'),
+            size=RESULTS_PAGE_SIZE
+        )
+    except InvalidCursor:
+        return custom_400(request)
+    return render(request, 'test_app/results.html', {
+        'results': results,
+        'next_cursor': next_cursor
+    })
+
+# Natijalar API va eksport uchun ustunlar: (nomi, ORM yo'li)
+RESULT_COLUMNS = [
+    ('id', 'id'),
+    ('session_id', 'session__session_id'),
+    ('first_name', 'session__first_name'),
+    ('last_name', 'session__last_name'),
+    ('phone_number', 'session__phone_number'),
+    ('level', 'session__level__name'),
+    ('correct_answers', 'correct_answers'),
+    ('total_questions', 'total_questions'),
+    ('score', 'score'),
+    ('time_taken', 'time_taken'),
+    ('telegram_sent', 'telegram_sent'),
+    ('admin_notified', 'admin_notified'),
+    ('created_at', 'created_at'),
+]
+RESULTS_PAGE_SIZE = 100
+RESULTS_API_MAX_LIMIT = 500
+EXPORT_CHUNK_SIZE = 2000
+
+def parse_date_param(request, name):
+    try:
+        return parse_date(request.GET.get(name) or '')
+    except ValueError:
+        return None
+
+def filter_results(request):
+    """?level=<code>&from=YYYY-MM-DD&to=YYYY-MM-DD filtrlari"""
+    results = TestResult.objects.all()
+    level_code = request.GET.get('level')
+    if level_code:
+        results = results.filter(session__level__code=level_code)
+    date_from = parse_date_param(request, 'from')
+    if date_from:
+        results = results.filter(
+            created_at__gte=timezone.make_aware(datetime.combine(date_from, time.min))
+        )
+    date_to = parse_date_param(request, 'to')
+    if date_to:
+        results = results.filter(
+            created_at__lt=timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min))
+        )
+    return results
+
+def result_row(values):
+    row = dict(zip((name for name, _ in RESULT_COLUMNS), values))
+    row['created_at'] = timezone.localtime(row['created_at']).isoformat()
+    return row
+
+@staff_member_required
+def results_api(request):
+    try:
+        limit = min(int(request.GET.get('limit', 50)), RESULTS_API_MAX_LIMIT)
+    except ValueError:
+        limit = 50
+    try:
+        rows, next_cursor = keyset_page(
+            filter_results(request).values(*(lookup for _, lookup in RESULT_COLUMNS)),
+            request.GET.get('cursor'),
+            size=max(limit, 1)
+        )
+    except InvalidCursor:
+        return JsonResponse({'success': False, 'error': 'Noto\'g\'ri cursor'}, status=400)
     
-    level_stats = []
-    for level in Level.objects.all():
-        level_results = TestResult.objects.filter(session__level=level)
-        level_count = level_results.count()
-        if level_count > 0:
-            avg_level_score = level_results.aggregate(Avg('score'))['score__avg'] or 0
-            level_stats.append({
-                'level': level.name,
-                'count': level_count,
-                'avg_score': round(avg_level_score, 1)
-            })
+    lookups = [lookup for _, lookup in RESULT_COLUMNS]
+    return JsonResponse({
+        'success': True,
+        'results': [result_row([row[lookup] for lookup in lookups]) for row in rows],
+        'next_cursor': next_cursor
+    })
+
+class Echo:
+    """csv.writer uchun yozilgan qatorni qaytaruvchi psevdo-buffer"""
+    def write(self, value):
+        return value
+
+@staff_member_required
+def export_results(request):
+    # Natijalar xotiraga to'liq yuklanmaydi: .iterator() bo'laklab o'qiydi
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in ('csv', 'ndjson'):
+        return JsonResponse({'success': False, 'error': 'Format csv yoki ndjson bo\'lishi kerak'}, status=400)
     
-    context = {
-        'total_tests': total_tests,
-        'completed_tests': completed_tests,
-        'avg_score': round(avg_score, 1),
-        'level_stats': level_stats
-    }
+    rows = filter_results(request).order_by('-created_at', '-id').values_list(
+        *(lookup for _, lookup in RESULT_COLUMNS)
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
     
-    return render(request, 'test_app/statistics.html', context)
-
-def all_results(request):
-    results = TestResult.objects.select_related('session', 'session__level').order_by('-created_at')[:100]
-    return render(request, 'test_app/results.html', {'results': results})
+    if export_format == 'csv':
+        writer = csv.writer(Echo())
+        header = [name for name, _ in RESULT_COLUMNS]
+        content = itertools.chain(
+            [writer.writerow(header)],
+            (writer.writerow(result_row(values).values()) for values in rows)
+        )
+        content_type = 'text/csv; charset=utf-8'
+    else:
+        content = (
+            json.dumps(result_row(values), ensure_ascii=False) + '\n' for values in rows
+        )
+        content_type = 'application/x-ndjson; charset=utf-8'
+    
+    response = StreamingHttpResponse(content, content_type=content_type)
+    filename = f"results_{timezone.localdate().strftime('%Y%m%d')}.{export_format}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
 
 def result_detail(request, session_id):
     session = get_object_or_404(TestSession, session_id=session_id)
@@ -81,22 +183,11 @@ def result_detail(request, session_id):
 @csrf_exempt
 def get_levels(request):
     if request.method == 'GET':
-        levels = Level.objects.filter(is_active=True).order_by('order')
-        levels_data = [{
-            'id': level.id,
-            'name': level.name,
-            'code': level.code,
-            'description': level.description,
-            'time_limit': level.time_limit,
-            'question_count': level.question_count
-        } for level in levels]
-        
-        return JsonResponse({
-            'success': True,
-            'levels': levels_data
-        })
+        return levels_response(request, levels_cache.get())
 
 @csrf_exempt
+@rate_limit('start_session')
+@admit_write
 def start_test_session(request):
     if request.method == 'POST':
         try:
@@ -119,31 +210,11 @@ def start_test_session(request):
                 })
             
             level = get_object_or_404(Level, id=level_id)
-            session_id = f"IT_{timezone.now().strftime('%Y%m%d')}_{str(uuid.uuid4())[:8].upper()}"
-            
-            session = TestSession.objects.create(
-                session_id=session_id,
-                level=level,
-                first_name=first_name,
-                last_name=last_name,
-                phone_number=phone_number
-            )
-            
-            # Adminga yangi test boshlanganligi haqida xabar
-            message = (
-                "🎯 *Yangi test boshlandi!*\n\n"
-                f"👤 *Ism:* {first_name} {last_name}\n"
-                f"📞 *Telefon:* {phone_number or 'Noma lum'}\n"
-                f"📊 *Daraja:* {level.name}\n"
-                f"🆔 *Session ID:* `{session_id}`\n"
-                f"⏰ *Vaqt limiti:* {level.time_limit} daqiqa"
-            )
-            
-            send_admin_notification(message)
+            session = start_session(level, first_name, last_name, phone_number)
             
             return JsonResponse({
                 'success': True,
-                'session_id': session_id,
+                'session_id': session.session_id,
                 'time_limit': level.time_limit,
                 'question_count': level.question_count
             })
@@ -155,46 +226,32 @@ def start_test_session(request):
                 'error': str(e)
             }, status=500)
 
+def questions_response(request, level, snapshot, question_ids):
+    # Tayyor snapshotdan savollarni olish (ORM va JSON kodlashsiz)
+    questions_json = snapshot.render(question_ids, request.build_absolute_uri)
+    
+    body = '{"success":true,"questions":[%s],"level_name":%s,"time_limit":%s}' % (
+        ','.join(questions_json),
+        json.dumps(level.name, ensure_ascii=False),
+        json.dumps(level.time_limit)
+    )
+    response = HttpResponse(body, content_type='application/json; charset=utf-8')
+    response['X-Snapshot-Version'] = snapshot.version
+    return response
+
 @csrf_exempt
 def get_questions(request, session_id):
     if request.method == 'GET':
         try:
-            session = get_object_or_404(TestSession, session_id=session_id)
+            session = get_object_or_404(
+                TestSession.objects.select_related('level'),
+                session_id=session_id
+            )
             level = session.level
+            snapshot = get_snapshot(level)
+            question_ids = assign_questions(session, snapshot, level.question_count)
             
-            # Tasodifiy savollarni olish
-            questions = Question.objects.filter(
-                level=level, 
-                is_active=True
-            ).order_by('?')[:level.question_count]
-            
-            questions_data = []
-            for question in questions:
-                answers = question.answers.all().order_by('order')
-                question_data = {
-                    'id': question.id,
-                    'question_text': question.question_text,
-                    'answers': [
-                        {
-                            'id': answer.id,
-                            'answer_text': answer.answer_text,
-                            'is_correct': answer.is_correct
-                        } for answer in answers
-                    ]
-                }
-                
-                # Agar rasm bo'lsa
-                if question.image:
-                    question_data['image_url'] = request.build_absolute_uri(question.image.url)
-                
-                questions_data.append(question_data)
-            
-            return JsonResponse({
-                'success': True,
-                'questions': questions_data,
-                'level_name': level.name,
-                'time_limit': level.time_limit
-            })
+            return questions_response(request, level, snapshot, question_ids)
         except Exception as e:
             logger.error(f"Savollarni olishda xatolik: {e}")
             return JsonResponse({
@@ -203,6 +260,8 @@ def get_questions(request, session_id):
             }, status=500)
 
 @csrf_exempt
+@rate_limit('submit_test')
+@admit_write
 def submit_test(request):
     if request.method == 'POST':
         try:
@@ -215,64 +274,20 @@ def submit_test(request):
                 return JsonResponse({'success': False, 'error': 'Session ID talab qilinadi'})
             
             session = get_object_or_404(TestSession, session_id=session_id)
-            
-            # Testni tugatilgan deb belgilash
-            session.completed = True
-            session.end_time = timezone.now()
-            session.save()
-            
-            # To'g'ri javoblarni hisoblash
-            correct = 0
-            for answer_data in answers:
-                try:
-                    selected_answer = Answer.objects.get(id=answer_data['answer_id'])
-                    if selected_answer.is_correct:
-                        correct += 1
-                except Answer.DoesNotExist:
-                    continue
-            
-            total = len(answers)
-            score = (correct / total * 100) if total > 0 else 0
-            
-            # Natijani saqlash
-            test_result = TestResult.objects.create(
-                session=session,
-                correct_answers=correct,
-                total_questions=total,
-                score=round(score, 1),
-                time_taken=time_taken
-            )
-            
-            # Foydalanuvchiga Telegram orqali natija yuborish
-            telegram_sent = False
-            if session.phone_number and session.phone_number.isdigit():
-                telegram_sent = send_telegram_message(
-                    chat_id=session.phone_number,
-                    session=session,
-                    result=test_result
-                )
-                if telegram_sent:
-                    test_result.telegram_sent = True
-            
-            # Adminga to'liq natija yuborish
-            admin_notified = send_admin_result(
-                session=session,
-                result=test_result
-            )
-            if admin_notified:
-                test_result.admin_notified = True
-            
-            test_result.save()
+            test_result, telegram_queued, admin_queued = finish_session(session, answers, time_taken)
             
             return JsonResponse({
                 'success': True,
                 'session_id': session_id,
-                'correct': correct,
-                'total': total,
-                'score': round(score, 1),
-                'time_taken': time_taken,
-                'telegram_sent': telegram_sent,
-                'admin_notified': admin_notified
+                'correct': test_result.correct_answers,
+                'total': test_result.total_questions,
+                'score': test_result.score,
+                'time_taken': test_result.time_taken,
+                # Xabar fonda yuboriladi: *_sent outbox yetkazgach rost bo'ladi
+                'telegram_sent': test_result.telegram_sent,
+                'telegram_queued': telegram_queued,
+                'admin_notified': test_result.admin_notified,
+                'admin_queued': admin_queued
             })
             
         except Exception as e:
@@ -282,102 +297,19 @@ def submit_test(request):
                 'error': str(e)
             }, status=500)
 
-def send_telegram_message(chat_id, session, result):
-    try:
-        bot_token = settings.TELEGRAM_BOT_TOKEN
-        
-        if not bot_token:
-            return False
-        
-        message = (
-            "🎓 *IT House Test Natijasi*\n\n"
-            f"👤 *Ishtirokchi:* {session.first_name} {session.last_name}\n"
-            f"📊 *Daraja:* {session.level.name}\n"
-            f"⏰ *Sarflangan vaqt:* {result.get_time_taken_display()}\n\n"
-            f"📈 *Natija:*\n"
-            f"✅ To'g'ri javoblar: {result.correct_answers}/{result.total_questions}\n"
-            f"🏆 Foiz: {result.score}%\n\n"
-            f"🆔 *ID:* `{session.session_id}`\n"
-            f"📅 *Sana:* {result.created_at.strftime('%d.%m.%Y %H:%M')}\n"
-        )
-        
-        if result.score >= 80:
-            message += "\n🎉 Ajoyib natija! Siz bu darajani mukammal egallagansiz!"
-        elif result.score >= 60:
-            message += "\n👍 Yaxshi natija! Biroz mashq qilsangiz yanada yaxshilashingiz mumkin."
-        else:
-            message += "\n💪 Qayta urinib ko'ring! Ko'proq mashq qilishingiz kerak."
-        
-        url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-        payload = {
-            'chat_id': chat_id,
-            'text': message,
-            'parse_mode': 'Markdown'
-        }
-        
-        response = requests.post(url, json=payload, timeout=10)
-        return response.status_code == 200
-        
-    except Exception as e:
-        logger.error(f"Telegramga yuborishda xatolik: {e}")
-        return False
-
-def send_admin_notification(message):
-    try:
-        bot_token = settings.TELEGRAM_BOT_TOKEN
-        admin_chat_id = settings.TELEGRAM_ADMIN_CHAT_ID
-        
-        if not bot_token or not admin_chat_id:
-            return False
-        
-        url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-        payload = {
-            'chat_id': admin_chat_id,
-            'text': message,
-            'parse_mode': 'Markdown'
-        }
-        
-        response = requests.post(url, json=payload, timeout=10)
-        return response.status_code == 200
-        
-    except Exception as e:
-        logger.error(f"Adminga xabar yuborishda xatolik: {e}")
-        return False
-
-def send_admin_result(session, result):
-    try:
-        bot_token = settings.TELEGRAM_BOT_TOKEN
-        admin_chat_id = settings.TELEGRAM_ADMIN_CHAT_ID
-        
-        if not bot_token or not admin_chat_id:
-            return False
-        
-        message = (
-            "📊 *TEST YAKUNLANDI*\n\n"
-            f"👤 *Ishtirokchi:* {session.first_name} {session.last_name}\n"
-            f"📞 *Telefon:* {session.phone_number or 'Noma lum'}\n"
-            f"📚 *Daraja:* {session.level.name}\n"
-            f"⏱️ *Vaqt:* {result.get_time_taken_display()}\n\n"
-            f"📈 *NATIJALAR:*\n"
-            f"🎯 To'g'ri javoblar: {result.correct_answers}/{result.total_questions}\n"
-            f"🏆 Foiz: {result.score}%\n\n"
-            f"🆔 *Session ID:* `{session.session_id}`\n"
-            f"📅 *Yakunlangan vaqt:* {result.created_at.strftime('%d.%m.%Y %H:%M:%S')}"
-        )
-        
-        url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-        payload = {
-            'chat_id': admin_chat_id,
-            'text': message,
-            'parse_mode': 'Markdown'
-        }
-        
-        response = requests.post(url, json=payload, timeout=10)
-        return response.status_code == 200
-        
-    except Exception as e:
-        logger.error(f"Adminga natija yuborishda xatolik: {e}")
-        return False
+def result_data(session, result):
+    return {
+        'session_id': session.session_id,
+        'first_name': session.first_name,
+        'last_name': session.last_name,
+        'level': session.level.name if session.level else None,
+        'correct_answers': result.correct_answers,
+        'total_questions': result.total_questions,
+        'score': result.score,
+        'time_taken': result.time_taken,
+        'time_taken_display': result.get_time_taken_display(),
+        'created_at': result.created_at.strftime('%Y-%m-%d %H:%M:%S')
+    }
 
 @csrf_exempt
 def get_test_result(request, session_id):
@@ -387,18 +319,7 @@ def get_test_result(request, session_id):
         
         return JsonResponse({
             'success': True,
-            'result': {
-                'session_id': session.session_id,
-                'first_name': session.first_name,
-                'last_name': session.last_name,
-                'level': session.level.name if session.level else None,
-                'correct_answers': result.correct_answers,
-                'total_questions': result.total_questions,
-                'score': result.score,
-                'time_taken': result.time_taken,
-                'time_taken_display': result.get_time_taken_display(),
-                'created_at': result.created_at.strftime('%Y-%m-%d %H:%M:%S')
-            }
+            'result': result_data(session, result)
         })
     except TestResult.DoesNotExist:
         return JsonResponse({
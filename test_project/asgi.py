@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'test_project.settings')
+# Test oqimi API si async view lar bilan xizmat qiladi
+os.environ.setdefault('DJANGO_ROOT_URLCONF', 'test_project.urls_async')
 
 application = get_asgi_application()
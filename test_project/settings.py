@@ -47,6 +47,8 @@ INSTALLED_APPS = [
 # MIDDLEWARE
 # ========================
 MIDDLEWARE = [
+    # Birinchi: boshqa middleware lar vaqti ham o'lchovga kiradi
+    "test_app.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
 
@@ -58,7 +60,8 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
-ROOT_URLCONF = "test_project.urls"
+# ASGI da test_project.urls_async ishlatiladi (asgi.py)
+ROOT_URLCONF = os.environ.get("DJANGO_ROOT_URLCONF", "test_project.urls")
 
 # ========================
 # TEMPLATES
@@ -87,10 +90,53 @@ WSGI_APPLICATION = "test_project.wsgi.application"
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "NAME": os.environ.get("SQLITE_PATH", BASE_DIR / "db.sqlite3"),
+        # Har so'rovda qayta ulanmaslik uchun doimiy ulanishlar
+        "CONN_MAX_AGE": int(os.environ.get("DJANGO_CONN_MAX_AGE", "600")),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            # Yozish qulfini kutish (soniya), busy_timeout bilan bir xil
+            "timeout": 20,
+        },
     }
 }
 
+# Har bir yangi SQLite ulanishida bajariladigan PRAGMA lar (test_app/db.py).
+# WAL o'qiydiganlar va yozuvchini bir-biridan ajratadi, shuning uchun
+# parallel submit_test lar "database is locked" bilan to'xtab qolmaydi.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 20000,
+    "mmap_size": 128 * 1024 * 1024,
+    "cache_size": -20000,  # ~20 MB
+    "temp_store": "MEMORY",
+}
+
+# ========================
+# CACHE (test_app/caching.py)
+# ========================
+# Jarayon ichidagi LRU + barcha workerlar uchun umumiy fayl keshi. Lokal TTL
+# qisqa: boshqa workerda bekor qilingan qiymat ko'pi bilan shuncha eskiradi
+CACHES = {
+    "default": {
+        "BACKEND": "test_app.caching.TieredCache",
+        "OPTIONS": {"TIERS": ["local", "shared"]},
+    },
+    "local": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "test_app",
+        "TIMEOUT": 30,
+        "OPTIONS": {"MAX_ENTRIES": 1000},
+    },
+    "shared": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.environ.get("CACHE_DIR", str(BASE_DIR / ".cache")),
+        "TIMEOUT": 300,
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+}
+
 # ========================
 # PASSWORD VALIDATION
 # ========================
@@ -143,6 +189,50 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # ========================
 TELEGRAM_BOT_TOKEN = os.environ.get("8293332210:AAFO3fjZ_btS6CXgXHJQQkxOOkYP6PMWh5w", "8293332210:AAFO3fjZ_btS6CXgXHJQQkxOOkYP6PMWh5w")
 ADMIN_TELEGRAM_ID = os.environ.get("5629187258", "5629187258")
+TELEGRAM_API_URL = os.environ.get("TELEGRAM_API_URL", "https://api.telegram.org")
+
+# Xabarlar navbati (outbox): so'rovlar Telegramni kutmaydi, xabarlarni
+# fon oqimi yoki `manage.py telegram_worker` yuboradi
+TELEGRAM_OUTBOX_THREAD = os.environ.get("TELEGRAM_OUTBOX_THREAD", "True") == "True"
+TELEGRAM_OUTBOX_MAX_ATTEMPTS = int(os.environ.get("TELEGRAM_OUTBOX_MAX_ATTEMPTS", "8"))
+
+# ========================
+# METRICS (test_app/metrics.py)
+# ========================
+# /metrics/ ga ruxsat: "Authorization: Bearer <token>", staff yoki shu IP lar.
+# IP lar odatda bo'sh: lokal proksi (nginx -> gunicorn) ortida har bir so'rov
+# 127.0.0.1 dan keladi. Mijoz IP si RATE_LIMIT_PROXY_COUNT bo'yicha aniqlanadi.
+METRICS_ALLOWED_IPS = [ip for ip in os.environ.get("METRICS_ALLOWED_IPS", "").split(",") if ip]
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+# Shundan sekin so'rovlar log ga yoziladi (ms)
+METRICS_SLOW_REQUEST_MS = float(os.environ.get("METRICS_SLOW_REQUEST_MS", "500"))
+# cProfile bilan o'lchanadigan so'rovlar ulushi (0 - o'chiq) va saqlanadigan eng sekinlari
+METRICS_PROFILE_SAMPLE_RATE = float(os.environ.get("METRICS_PROFILE_SAMPLE_RATE", "0"))
+METRICS_PROFILE_DIR = os.environ.get("METRICS_PROFILE_DIR", str(BASE_DIR / "profiles"))
+METRICS_PROFILE_KEEP = int(os.environ.get("METRICS_PROFILE_KEEP", "20"))
+
+# ========================
+# RATE LIMIT / ADMISSION (test_app/throttling.py)
+# ========================
+# {endpoint: {kalit: (so'rovlar, soniya)}}. IP chegarasi keng: o'quv markazida
+# butun sinf bitta IP dan test topshiradi
+RATE_LIMITS = {
+    "start_session": {"ip": (60, 60), "phone": (5, 600)},
+    "submit_test": {"ip": (60, 60)},
+}
+# X-Forwarded-For qo'shadigan ishonchli proksilar soni, 0 - REMOTE_ADDR.
+# Render da (RENDER=true o'rnatiladi) so'rov bitta proksi orqali keladi -
+# 0 bo'lsa barcha foydalanuvchilar proksi IP si bo'yicha bitta bucketga tushadi
+RATE_LIMIT_PROXY_COUNT = int(
+    os.environ.get("RATE_LIMIT_PROXY_COUNT", "1" if os.environ.get("RENDER") else "0")
+)
+# Bir vaqtda bajariladigan yozuvchi so'rovlar (bo'sh - cheklovsiz), navbat va kutish (soniya).
+# Yozuvchilar soni barcha workerlar uchun umumiy (SQLite yonidagi flock slotlari),
+# navbat esa har bir worker ichida
+ADMISSION_MAX_WRITERS = int(os.environ.get("ADMISSION_MAX_WRITERS", "8") or 0) or None
+ADMISSION_MAX_WAITING = int(os.environ.get("ADMISSION_MAX_WAITING", "64"))
+ADMISSION_WAIT_TIMEOUT = float(os.environ.get("ADMISSION_WAIT_TIMEOUT", "5"))
+ADMISSION_LOCK_DIR = os.environ.get("ADMISSION_LOCK_DIR", f"{DATABASES['default']['NAME']}-writers")
 
 # ========================
 # SECURITY (PRODUCTION)
@@ -151,6 +241,8 @@ if not DEBUG:
     CSRF_COOKIE_SECURE = True
     SESSION_COOKIE_SECURE = True
     SECURE_SSL_REDIRECT = True
+    # Prometheus ichki tarmoqdan HTTP orqali o'qiydi
+    SECURE_REDIRECT_EXEMPT = [r"^metrics/$"]
 
     SECURE_HSTS_SECONDS = 31536000
     SECURE_HSTS_INCLUDE_SUBDOMAINS = True
@@ -165,20 +257,33 @@ else:
 # ========================
 # LOGGING
 # ========================
+# So'rov oqimi yozuvni navbatga qo'yadi, faylga (JSON) va konsolga fon oqimi
+# yozadi (test_app/logs.py). Barcha workerlar bitta faylga yozadi va uni
+# LOG_MAX_BYTES hajmida birgalikda (flock bilan) aylantiradi. Render da
+# logrotate yo'q, shuning uchun standart 10 MB; 0 - tashqi logrotate uchun
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
     "handlers": {
-        "console": {
-            "class": "logging.StreamHandler",
-        },
-        "file": {
-            "class": "logging.FileHandler",
-            "filename": BASE_DIR / "debug.log",
+        "queue": {
+            "()": "test_app.logs.QueueListenerHandler",
+            "filename": os.environ.get("LOG_FILE", str(BASE_DIR / "debug.log")),
+            "max_bytes": int(os.environ.get("LOG_MAX_BYTES", str(10 * 1024 * 1024))),
+            "backup_count": int(os.environ.get("LOG_BACKUP_COUNT", "5")),
         },
     },
     "root": {
-        "handlers": ["console", "file"],
-        "level": "INFO",
+        "handlers": ["queue"],
+        "level": LOG_LEVEL,
+    },
+    # Django ning sershovqin loggerlari: har bir 404/400 va runserver so'rovi yozilmaydi
+    "loggers": {
+        "django": {"level": "WARNING"},
+        "django.request": {"level": "ERROR"},
+        "django.server": {"level": "WARNING"},
+        "django.db.backends": {"level": "WARNING"},
+        "django.template": {"level": "WARNING"},
+        "test_app": {"level": LOG_LEVEL},
     },
 }
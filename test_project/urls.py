@@ -1,11 +1,17 @@
 # test_project/urls.py
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from test_app.media import serve_media
+from test_app.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics/', metrics_view, name='metrics'),
+    # Yuklangan rasmlar DEBUG siz ham beriladi (keshlash sarlavhalari bilan)
+    re_path(r'^%s(?P<path>.+)$' % settings.MEDIA_URL.lstrip('/'), serve_media, name='media'),
     path('', include('test_app.urls')),  # test_app urls
 ]
 
@@ -15,7 +21,6 @@ handler403 = 'test_app.views.custom_403'
 handler404 = 'test_app.views.custom_404'
 handler500 = 'test_app.views.custom_500'
 
-# Debug rejimida static va media fayllar uchun
+# Debug rejimida static fayllar uchun
 if settings.DEBUG:
-    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
\ No newline at end of file
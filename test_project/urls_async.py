@@ -0,0 +1,8 @@
+# test_project/urls_async.py
+# ASGI uchun URL lar: test oqimi API si async view larga, qolganlari
+# test_project/urls.py dagidek
+from test_app.urls import async_api_urlpatterns
+from test_project.urls import *  # noqa: F401,F403 - xatolik handlerlari ham
+from test_project.urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = async_api_urlpatterns + sync_urlpatterns